@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Pooled Anthropic Clients
+One long-lived client per (API key, model) with keep-alive HTTP connections
+sized to the scoring concurrency, so query generation and scoring reuse
+open TLS connections. Records per-request connect / time-to-first-byte /
+total latency to show what pooling saves.
+"""
+
+import atexit
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+import anthropic
+
+try:
+    import httpx
+except ImportError:
+    import httpx2 as httpx  # Newer anthropic SDKs ship on the httpx2 fork
+
+from claude_scoring import SCORING_CONCURRENCY
+
+REQUEST_TIMEOUT = 60.0  # Seconds
+KEEPALIVE_EXPIRY = 120.0  # Seconds an idle connection stays open
+POOL_HEADROOM = 2  # Extra connections beyond scoring concurrency (query generation etc.)
+LATENCY_WINDOW = 1000  # Recent requests kept for percentiles
+
+
+class RequestTimings:
+    """Rolling connect / TTFB / total samples for Claude HTTP requests"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.samples = deque(maxlen=window)
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    def record(self, connect: float, ttfb: float, total: float):
+        with self._lock:
+            self.samples.append((connect, ttfb, total))
+            if connect:
+                self.new_connections += 1
+            else:
+                self.reused_connections += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            samples = list(self.samples)
+            stats = {
+                'requests': len(samples),
+                'new_connections': self.new_connections,
+                'reused_connections': self.reused_connections,
+            }
+
+        for i, name in enumerate(('connect', 'ttfb', 'total')):
+            values = sorted(s[i] for s in samples)
+            if not values:
+                continue
+            stats[name] = {
+                'avg_ms': round(statistics.mean(values) * 1000, 1),
+                'p50_ms': round(values[len(values) // 2] * 1000, 1),
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+            }
+        return stats
+
+
+_timings = RequestTimings()
+
+
+def _on_request(request: httpx.Request):
+    """Start the clock and attach an httpcore trace to catch connection setup"""
+    timing = {'start': time.perf_counter(), 'connect_started': None, 'connect': 0.0}
+
+    def trace(event_name: str, info: Dict):
+        # connect_tcp + start_tls only fire when the pool opens a new connection
+        if event_name == 'connection.connect_tcp.started':
+            timing['connect_started'] = time.perf_counter()
+        elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+            if timing['connect_started'] is not None:
+                timing['connect'] = time.perf_counter() - timing['connect_started']
+
+    request.extensions['trace'] = trace
+    request.extensions['claude_timing'] = timing
+
+
+def _on_response(response: httpx.Response):
+    """TTFB is when headers arrive; total once the (non-streamed) body is read"""
+    timing = response.request.extensions.get('claude_timing')
+    if timing is None:
+        return
+
+    ttfb = time.perf_counter() - timing['start']
+    if 'text/event-stream' not in response.headers.get('content-type', ''):
+        response.read()
+    total = time.perf_counter() - timing['start']
+    _timings.record(timing['connect'], ttfb, total)
+
+
+class AnthropicClientManager:
+    """Process-wide cache of pooled Anthropic clients"""
+
+    def __init__(self, pool_size: int = SCORING_CONCURRENCY + POOL_HEADROOM):
+        self.pool_size = pool_size
+        self._clients: Dict[tuple, anthropic.Anthropic] = {}
+        self._retired: List[anthropic.Anthropic] = []  # Smaller-pool clients, closed at exit
+        self._lock = threading.Lock()
+
+    def _new_client(self, api_key: str) -> anthropic.Anthropic:
+        http_client = anthropic.DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            event_hooks={'request': [_on_request], 'response': [_on_response]},
+        )
+        # Retries are handled by claude_scoring.create_message
+        return anthropic.Anthropic(
+            api_key=api_key,
+            max_retries=0,
+            timeout=REQUEST_TIMEOUT,
+            http_client=http_client,
+        )
+
+    def get_client(self, api_key: str, model: str) -> anthropic.Anthropic:
+        key = (api_key, model)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._new_client(api_key)
+                self._clients[key] = client
+            return client
+
+    def ensure_pool_size(self, concurrency: int):
+        """
+        Grow the connection limit to concurrency + POOL_HEADROOM. Existing
+        clients keep their requests in flight; later get_client calls get a
+        client with the larger pool.
+        """
+        size = concurrency + POOL_HEADROOM
+        with self._lock:
+            if size <= self.pool_size:
+                return
+            self.pool_size = size
+            self._retired.extend(self._clients.values())
+            self._clients.clear()
+
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.values()) + self._retired
+            self._clients.clear()
+            self._retired = []
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            open_clients = len(self._clients)
+        return {'clients': open_clients, 'pool_size': self.pool_size, **_timings.stats()}
+
+
+_manager = AnthropicClientManager()
+atexit.register(_manager.close_all)
+
+
+def get_client(api_key: str, model: str) -> anthropic.Anthropic:
+    """Shared pooled client for this API key and model"""
+    return _manager.get_client(api_key, model)
+
+
+def ensure_pool_size(concurrency: int):
+    """Make sure pooled clients allow this many parallel requests (plus headroom)"""
+    _manager.ensure_pool_size(concurrency)
+
+
+def close_clients():
+    """Close every pooled client (also runs at interpreter exit)"""
+    _manager.close_all()
+
+
+def get_client_stats() -> Dict:
+    return _manager.stats()
+
+
+def format_client_report() -> List[str]:
+    """Human-readable connection reuse and latency lines"""
+    s = _manager.stats()
+    if not s['requests']:
+        return ["Claude HTTP: no requests made"]
+
+    lines = [
+        f"Claude HTTP: {s['requests']} requests, {s['new_connections']} new connections, "
+        f"{s['reused_connections']} reused"
+    ]
+    for name, label in (('connect', 'connect'), ('ttfb', 'first byte'), ('total', 'total')):
+        if name in s:
+            lines.append(f"  {label}: avg {s[name]['avg_ms']}ms, p50 {s[name]['p50_ms']}ms, "
+                         f"p95 {s[name]['p95_ms']}ms")
+    return lines
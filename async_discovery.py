@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Asyncio Discovery Engine
+Runs YouTube search, channel-info and enrichment lookups as asyncio tasks
+behind one global concurrency limit. Blocking lookups go through the
+in-process yt-dlp engine on a bounded executor, so hundreds of channels
+can be in progress without hundreds of OS threads.
+"""
+
+import asyncio
+import concurrent.futures
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from enhanced_channel_extractor import (
+    build_enhanced_channel_data,
+    get_channel_snapshot,
+    get_snapshot_video_urls,
+    get_video_details,
+)
+
+YOUTUBE_CONCURRENCY = 10  # Max in-flight YouTube requests across all tasks
+
+
+class AsyncDiscoveryEngine:
+    """Bounded asyncio front-end for all YouTube traffic in a discovery run"""
+
+    def __init__(self, search_func: Callable[[str, int], List[str]],
+                 channel_info_func: Callable[[str], Optional[Dict]],
+                 concurrency: int = YOUTUBE_CONCURRENCY):
+        self.search_func = search_func
+        self.channel_info_func = channel_info_func
+        self.concurrency = concurrency
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='youtube'
+        )
+        self._semaphore = None  # Bound to the running loop on first use
+        self.stats = {'requests': 0, 'in_flight': 0, 'peak_in_flight': 0}
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run one blocking YouTube lookup under the global limit"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            self.stats['requests'] += 1
+            self.stats['in_flight'] += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.stats['in_flight'])
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+            finally:
+                self.stats['in_flight'] -= 1
+
+    async def search(self, query: str, max_results: int) -> List[str]:
+        return await self.run(self.search_func, query, max_results)
+
+    async def channel_info(self, video_url: str) -> Optional[Dict]:
+        return await self.run(self.channel_info_func, video_url)
+
+    async def enrich(self, channel_info: Dict) -> Tuple[Dict, bool]:
+        """
+        Enhanced data for one channel: one snapshot fetch, then every video
+        lookup as its own gated task. Returns (data, ok); on failure the
+        basic channel info is returned with ok=False.
+        """
+        try:
+            snapshot = await self.run(get_channel_snapshot, channel_info['channel_url'], 10)
+            video_urls = get_snapshot_video_urls(snapshot)
+
+            details = await asyncio.gather(
+                *(self._video_details(position, url) for position, url in enumerate(video_urls))
+            )
+            details = [d for d in details if d]
+
+            return build_enhanced_channel_data(channel_info, snapshot, details), True
+        except Exception as e:
+            print(f"    ⚠️  Enhanced extraction failed for {channel_info.get('channel_name')}: {e}")
+            return channel_info, False
+
+    async def _video_details(self, position: int, video_url: str) -> Optional[Dict]:
+        details = await self.run(get_video_details, video_url)
+        if details:
+            details['position'] = position
+            details['video_url'] = video_url
+        return details
+
+    async def discover(self, queries: List[str], max_results: int,
+                       accept_channel: Callable[[Dict], Tuple[bool, str]]) -> Dict:
+        """
+        Search every query, resolve channel info for every hit and enrich
+        each accepted channel, all concurrently
+
+        Args:
+            queries: Search queries
+            max_results: Videos per query (ytsearchN)
+            accept_channel: (channel_info) -> (keep, reason), called once per
+                new channel before enrichment
+
+        Returns:
+            Dict with per-query video counts, skipped channels, enriched
+            channels (keyed by channel_id) and failed enrichments
+        """
+        results = {
+            'query_counts': {},
+            'skipped': [],
+            'channels': {},
+            'enrich_failed': [],
+        }
+        seen = set()
+
+        async def handle_query(query: str):
+            video_urls = await self.search(query, max_results)
+            results['query_counts'][query] = len(video_urls)
+
+            infos = await asyncio.gather(*(self.channel_info(url) for url in video_urls))
+
+            enrich_tasks = []
+            for info in infos:
+                if not info or info['channel_id'] in seen:
+                    continue
+                seen.add(info['channel_id'])
+
+                keep, reason = accept_channel(info)
+                if not keep:
+                    results['skipped'].append((info, reason))
+                    continue
+                enrich_tasks.append(self.enrich(info))
+
+            for data, ok in await asyncio.gather(*enrich_tasks):
+                results['channels'][data['channel_id']] = data
+                if not ok:
+                    results['enrich_failed'].append(data['channel_id'])
+
+        await asyncio.gather(*(handle_query(q) for q in queries))
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def discover_channels(queries: List[str], max_results: int,
+                      search_func: Callable[[str, int], List[str]],
+                      channel_info_func: Callable[[str], Optional[Dict]],
+                      accept_channel: Callable[[Dict], Tuple[bool, str]],
+                      concurrency: int = YOUTUBE_CONCURRENCY) -> Dict:
+    """Blocking wrapper: run a full async discovery pass and return its results"""
+    engine = AsyncDiscoveryEngine(search_func, channel_info_func, concurrency)
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(engine.discover(queries, max_results, accept_channel))
+    finally:
+        engine.close()
+
+    results['elapsed'] = round(time.perf_counter() - start, 2)
+    results['engine_stats'] = dict(engine.stats)
+    return results
@@ -7,41 +7,40 @@ Fully Automated Workflow:
 """
 
 import subprocess
-import json
-import csv
 import requests
-from typing import List, Dict
+from typing import List, Dict, Optional
 from channel_database import ChannelDatabase
+from ytdlp_engine import extract_info, get_entries, print_latency_report
+from llm_cache import cached_completion, format_cache_report
+from ollama_client import (
+    ANALYSIS_SCHEMA, NO_RESPONSE, format_ollama_report, format_parse_report, generate_structured,
+    get_ollama_client, query_list_schema
+)
+from packed_scoring import PackedScorer, plan_packs
+from query_novelty import QueryNoveltyFilter, normalize_query
+from query_bandit import top_yield_queries
+from scoring_prompts import DEFAULT_PRODUCT_CONTEXT, build_channel_prompt, build_scoring_system_prompt
+from youtube_rate_limiter import ThrottledError
 
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
 DEFAULT_MODEL = "qwen2.5:7b"
+OLLAMA_TEMPERATURE = 0.8
 
-def generate_with_ollama(prompt: str, model: str = DEFAULT_MODEL) -> str:
-    """Generate text using Ollama"""
-    try:
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.8,
-                "top_p": 0.9
-            }
-        }
-        
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=60)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('response', '')
-    except Exception as e:
-        print(f"Error calling Ollama: {e}")
-    
-    return ""
+# YouTube fetches that came back empty this run, reported at the end
+FETCH_FAILURES = {'search_throttled': 0, 'search_failed': 0, 'channel_throttled': 0, 'channel_failed': 0}
+
+def generate_with_ollama(prompt: str, model: str = DEFAULT_MODEL, use_cache: bool = True) -> str:
+    """Generate text using Ollama (identical prompts are answered from the LLM cache)"""
+    return cached_completion('ollama', model, OLLAMA_TEMPERATURE, prompt,
+                             lambda: _call_ollama(prompt, model), use_cache)
+
+def _call_ollama(prompt: str, model: str) -> str:
+    options = {"temperature": OLLAMA_TEMPERATURE, "top_p": 0.9}
+    return get_ollama_client().generate(prompt, model, options, timeout=60)
 
 def generate_search_queries(num_queries: int = 3, model: str = DEFAULT_MODEL, 
-                           product_context: str = None, target_direction: str = None) -> List[str]:
-    """Generate search queries using Ollama with optional custom context"""
+                           product_context: str = None, target_direction: str = None,
+                           seed_queries: Optional[List[str]] = None) -> List[str]:
+    """Generate search queries using Ollama with optional custom context and past high-yield queries"""
     
     # Use default context if not provided
     if not product_context:
@@ -54,13 +53,17 @@ knowledge, and essential information for grid-down scenarios."""
 off-grid living, and emergency preparedness. Target audience: 25-55 year old preppers, 
 survivalists, and self-reliance enthusiasts."""
     
+    seed_text = ""
+    if seed_queries:
+        seed_text = "\n\nPAST QUERIES THAT FOUND THE MOST RELEVANT CHANNELS (write new queries in the same spirit, do not repeat them):\n" + "\n".join(f"- {q}" for q in seed_queries)
+    
     prompt = f"""You are an expert at finding YouTube channels whose AUDIENCES would be interested in buying a product.
 
 PRODUCT WE'RE SELLING:
 {product_context}
 
 TARGET AUDIENCE INTERESTS:
-{target_direction}
+{target_direction}{seed_text}
 
 CRITICAL: Generate YouTube search queries to find CHANNELS and CONTENT that this audience watches.
 DO NOT search for the product itself. Search for the TOPICS and INTERESTS of potential buyers.
@@ -84,8 +87,8 @@ Make queries:
 - Focus on channel topics and content themes
 - Educational, tutorial, or lifestyle content
 
-Return ONLY a JSON array:
-["query 1", "query 2", "query 3"]
+Return ONLY a JSON object:
+{{"queries": ["query 1", "query 2", "query 3"]}}
 
 Generate {num_queries} search queries about AUDIENCE INTERESTS now:"""
 
@@ -93,191 +96,81 @@ Generate {num_queries} search queries about AUDIENCE INTERESTS now:"""
     print(f"   Model: {model}")
     print(f"   ⏳ This takes ~30 seconds...\n")
     
-    response = generate_with_ollama(prompt, model)
+    result = generate_structured(prompt, query_list_schema(num_queries), model, OLLAMA_TEMPERATURE)
     
-    if not response:
-        print("❌ Failed to generate queries")
+    if not result.ok:
+        print(f"❌ Failed to generate queries: {'; '.join(result.errors[:3])}")
         return []
     
-    try:
-        # Extract JSON from response
-        start = response.find('[')
-        end = response.rfind(']') + 1
-        
-        if start >= 0 and end > start:
-            json_str = response[start:end]
-            queries = json.loads(json_str)
-            
-            # Clean and validate
-            valid_queries = []
-            for q in queries:
-                if isinstance(q, str) and len(q) > 3 and len(q) < 100:
-                    q = q.strip().strip('"\'')
-                    if q:
-                        valid_queries.append(q)
-            
-            return valid_queries[:num_queries]
-    except Exception as e:
-        print(f"⚠️ Could not parse queries: {e}")
+    # Clean and validate
+    valid_queries = []
+    for q in result.data['queries']:
+        q = q.strip().strip('"\'')
+        if q:
+            valid_queries.append(q)
     
-    return []
+    return valid_queries[:num_queries]
 
 def search_youtube(query: str, max_results: int = 5) -> List[str]:
     """Search YouTube and return video URLs"""
     print(f"  🔍 Searching: '{query}'...", end=' ')
     
     try:
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--get-id',
-            '--flat-playlist',
-            f'ytsearch{max_results}:{query}'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            video_ids = result.stdout.strip().split('\n')
-            urls = [f'https://www.youtube.com/watch?v={vid_id}' for vid_id in video_ids if vid_id]
-            print(f"✓ {len(urls)} videos")
-            return urls
+        data = extract_info(f'ytsearch{max_results}:{query}', 'search')
+        video_ids = [entry.get('id') for entry in get_entries(data)]
+        urls = [f'https://www.youtube.com/watch?v={vid_id}' for vid_id in video_ids if vid_id]
+        print(f"✓ {len(urls)} videos")
+        return urls
+    except ThrottledError as e:
+        FETCH_FAILURES['search_throttled'] += 1
+        print(f"🚦 Throttled: {e}")
     except Exception as e:
-        print(f"✗ Error")
+        FETCH_FAILURES['search_failed'] += 1
+        print(f"✗ Error: {e}")
     
     return []
 
 def get_channel_info(video_url: str) -> Dict:
     """Get channel info from video"""
     try:
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--dump-json',
-            video_url
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            return {
-                'channel_id': data.get('channel_id', ''),
-                'channel_name': data.get('uploader', ''),
-                'channel_url': data.get('channel_url', ''),
-                'subscriber_count': data.get('channel_follower_count', 0),
-                'description': data.get('description', '')[:1000],
-                'video_title': data.get('title', ''),
-                'video_url': video_url
-            }
-    except:
-        pass
+        data = extract_info(video_url, 'video')
+        return {
+            'channel_id': data.get('channel_id', ''),
+            'channel_name': data.get('uploader', ''),
+            'channel_url': data.get('channel_url', ''),
+            'subscriber_count': data.get('channel_follower_count', 0),
+            'description': data.get('description', '')[:1000],
+            'video_title': data.get('title', ''),
+            'video_url': video_url
+        }
+    except ThrottledError as e:
+        FETCH_FAILURES['channel_throttled'] += 1
+        print(f"🚦 Throttled: {e}")
+    except Exception as e:
+        FETCH_FAILURES['channel_failed'] += 1
+        print(f"✗ Error: {e}")
     
     return None
 
 def analyze_channel_with_ollama(channel_data: Dict, model: str = DEFAULT_MODEL, 
-                               product_context: str = None) -> Dict:
+                               product_context: str = None, use_cache: bool = True) -> Dict:
     """Analyze channel relevance using Ollama with optional custom product context"""
     
-    channel_name = channel_data.get('channel_name', 'Unknown')
-    description = channel_data.get('description', '')[:800]
-    subs = channel_data.get('subscriber_count', 0)
+    # Same rubric as Claude and packed scoring, so scores from every path are comparable
+    prompt = (build_scoring_system_prompt(product_context or DEFAULT_PRODUCT_CONTEXT)
+              + "\n\n" + build_channel_prompt(channel_data))
     
-    # Use default context if not provided
-    if not product_context:
-        product_context = """Hard drives with offline knowledge for grid-down scenarios 
-(medical, survival, technical info). Target audience: Preppers, survivalists, homesteaders."""
-    
-    prompt = f"""Analyze if this YouTube channel's AUDIENCE would be interested in buying this product.
-
-OUR PRODUCT (what we're selling):
-{product_context}
-
-YOUTUBE CHANNEL TO EVALUATE:
-Name: {channel_name}
-Subscribers: {subs:,}
-Description: {description if description else 'No description available'}
-
-CRITICAL EVALUATION CRITERIA:
-
-1. AUDIENCE RESONANCE (0-10):
-   - Would their specific viewers actually BUY this product?
-   - Does their audience demographic match our target buyer?
-   - Would their viewers see clear value in owning this?
-   - Is there a direct problem-solution fit?
-
-2. CONTENT ALIGNMENT (0-10):
-   - Does their content naturally relate to our product's purpose?
-   - Do they create content where this product would be mentioned?
-   - Would featuring this product feel native to their content?
-   - Is the lifestyle/niche an authentic match?
-
-3. ENGAGEMENT POTENTIAL (0-10):
-   Consider channel engagement indicators:
-   - Content quality and production value
-   - Authenticity and trust with audience
-   - History of product mentions or sponsorships
-   - Community interaction level
-   - Likelihood of creating compelling product content
-   - Estimated conversion potential (will viewers actually buy?)
-   - Creator's credibility in recommending products
-   - Audience's trust in creator's recommendations
-
-AVOID HIGH SCORES FOR:
-- Competitors or similar product sellers
-- Generic review/unboxing channels (low conversion)
-- Misaligned demographics (wrong age/interests)
-- Entertainment-only channels (viewers not buyers)
-- Channels with low audience trust
-
-PRIORITIZE HIGH SCORES FOR:
-- Lifestyle match (audience lives this way)
-- Educational content creators (high trust)
-- Community builders (loyal audiences)
-- Niche experts (authority in space)
-- Authentic product users (not just reviewers)
-
-Rate 0-10 (be highly selective):
-- Most channels: 2-5 (not a good fit)
-- Decent channels: 6-7 (possible fit)
-- Great channels: 8-9 (strong fit)
-- Perfect channels: 10 (rare, ideal match)
-
-Respond with ONLY this JSON:
-{{
-  "relevance_score": X,
-  "audience_match_score": X,
-  "engagement_score": X,
-  "overall_score": X,
-  "priority": "low|medium|high",
-  "relevant": true|false,
-  "reason": "Specific reason why their audience would/wouldn't buy this product",
-  "pitch": "Specific pitch angle: how to present this product to THIS creator's unique audience",
-  "engagement_notes": "Expected engagement level and conversion potential"
-}}"""
-
-    response = generate_with_ollama(prompt, model)
+    result = generate_structured(prompt, ANALYSIS_SCHEMA, model, OLLAMA_TEMPERATURE, use_cache)
     
-    if not response:
+    if result.ok:
+        return result.data
+    if NO_RESPONSE in result.errors:
         return {"relevant": False, "reason": "Analysis failed"}
-    
-    try:
-        start = response.find('{')
-        end = response.rfind('}') + 1
-        
-        if start >= 0 and end > start:
-            json_str = response[start:end]
-            analysis = json.loads(json_str)
-            
-            if 'relevant' in analysis:
-                return analysis
-    except:
-        pass
-    
     return {"relevant": False, "reason": "Could not parse analysis"}
 
 def main(product_context: str = None, target_direction: str = None, 
-         num_queries: int = 3, results_per_query: int = 5):
+         num_queries: int = 3, results_per_query: int = 5, force_rescore: bool = False,
+         pack_size: int = 1):
     """
     Main workflow function
     
@@ -286,7 +179,10 @@ def main(product_context: str = None, target_direction: str = None,
         target_direction: Target audience and channel characteristics
         num_queries: Number of search queries to generate (default: 3)
         results_per_query: Number of videos to fetch per query (default: 5)
+        force_rescore: Ignore cached LLM analyses and score every channel again
+        pack_size: Channels scored per Ollama call (1 = one call per channel)
     """
+    FETCH_FAILURES.update(dict.fromkeys(FETCH_FAILURES, 0))
     print("🤖 FULLY AUTOMATED AI WORKFLOW")
     print("=" * 70)
     print("\nThis workflow:")
@@ -314,7 +210,16 @@ def main(product_context: str = None, target_direction: str = None,
         print("   Start it: ollama serve")
         return
     
-    print("✓ Ollama server is running\n")
+    print("✓ Ollama server is running")
+    
+    # Load the model once and keep it resident for the whole run
+    ollama = get_ollama_client()
+    load_seconds = ollama.warmup(DEFAULT_MODEL)
+    if load_seconds is None:
+        print(f"⚠️ Could not warm up {DEFAULT_MODEL}; the first request will pay the load time\n")
+    else:
+        print(f"✓ {DEFAULT_MODEL} loaded in {load_seconds:.1f}s (keep_alive {ollama.keep_alive}, "
+              f"{ollama.num_parallel} parallel requests)\n")
     
     # Step 1: Generate search queries with AI
     print("STEP 1: AI-Generated Search Queries")
@@ -323,26 +228,42 @@ def main(product_context: str = None, target_direction: str = None,
     queries = generate_search_queries(
         num_queries=num_queries,
         product_context=product_context,
-        target_direction=target_direction
+        target_direction=target_direction,
+        seed_queries=top_yield_queries()
     )
     
     if not queries:
         print("❌ Failed to generate queries. Exiting.")
         return
     
+    # Skip rephrasings of queries earlier runs already searched
+    novelty = QueryNoveltyFilter()
+    queries, rejected = novelty.filter(queries)
+    for r in rejected:
+        print(f"   ♻️ Skipping \"{r['query']}\" ≈ \"{r['match']}\" ({r['method']} {r['similarity']:.2f})")
+    novelty.remember(queries, 'automated_workflow')
+    
+    if not queries:
+        print("❌ Every generated query was already searched. Exiting.")
+        return
+    
     print(f"\n✨ AI Generated {len(queries)} search queries:")
     for i, q in enumerate(queries, 1):
         print(f"   {i}. {q}")
     
+    query_yield = {q: {'videos': 0, 'new_channels': 0, 'llm_scored': 0, 'relevant': 0} for q in queries}
+    
     # Step 2: Search YouTube
     print("\n" + "=" * 70)
     print("STEP 2: Searching YouTube")
     print("=" * 70 + "\n")
     
     all_channels = {}
+    source_query = {}  # channel_id -> query that found it first
     
     for query in queries:
         video_urls = search_youtube(query, max_results=results_per_query)
+        query_yield[query]['videos'] += len(video_urls)
         
         for url in video_urls:
             print(f"    📡 Fetching channel...", end=' ')
@@ -353,11 +274,13 @@ def main(product_context: str = None, target_direction: str = None,
                 
                 if channel_id not in all_channels:
                     all_channels[channel_id] = channel_info
+                    source_query[channel_id] = query
                     print(f"✓ {channel_info['channel_name']}")
                 else:
                     print("(duplicate)")
     
     print(f"\n✓ Found {len(all_channels)} unique channels")
+    print_latency_report()
     
     if not all_channels:
         print("❌ No channels found. Try different queries.")
@@ -371,13 +294,17 @@ def main(product_context: str = None, target_direction: str = None,
     db = ChannelDatabase()
     db.connect()
     
-    channel_ids = []
     for channel_id, channel_data in all_channels.items():
         channel_data['category'] = 'ai_discovered'
-        if db.add_channel(channel_data):
-            subs = channel_data['subscriber_count']
-            print(f"  ✓ {channel_data['channel_name']} ({subs:,} subs)")
-            channel_ids.append(channel_id)
+        if db.get_channel(channel_id) is None:
+            query_yield[source_query[channel_id]]['new_channels'] += 1
+    
+    # One transaction for every channel and its contacts
+    saved = db.add_channels_bulk(all_channels.values())
+    channel_ids = [channel_id for channel_id in all_channels if channel_id not in saved['failed_ids']]
+    for channel_id in channel_ids:
+        channel_data = all_channels[channel_id]
+        print(f"  ✓ {channel_data['channel_name']} ({channel_data['subscriber_count']:,} subs)")
     
     db.close()
     
@@ -385,15 +312,35 @@ def main(product_context: str = None, target_direction: str = None,
     print("\n" + "=" * 70)
     print("STEP 4: AI Analysis of Channels")
     print("=" * 70)
-    print(f"\n⏳ Analyzing {len(channel_ids)} channels...")
-    print(f"   (~30 seconds per channel = ~{len(channel_ids) * 30} seconds total)\n")
+    print(f"\n⏳ Analyzing {len(channel_ids)} channels ({ollama.num_parallel} at a time)...")
+    print(f"   (~30 seconds per channel = ~{len(channel_ids) * 30 // ollama.num_parallel} seconds total)\n")
     
     results = []
     
+    packed_analyses = {}
+    if pack_size > 1:
+        # Rubric is processed once per pack instead of once per channel
+        packer = PackedScorer(
+            generate=lambda system, prompt: generate_with_ollama(f"{system}\n\n{prompt}", use_cache=not force_rescore),
+            system_prompt=build_scoring_system_prompt(product_context or DEFAULT_PRODUCT_CONTEXT, packed=True),
+            score_single=lambda channel: analyze_channel_with_ollama(channel, product_context=product_context,
+                                                                    use_cache=not force_rescore),
+            pack_size=pack_size,
+        )
+        for pack_results in ollama.map(packer.score_pack, plan_packs(list(all_channels.values()), pack_size)):
+            packed_analyses.update(pack_results)
+        print(f"   {packer.summary()}\n")
+    
+    pending = [channel for channel_id, channel in all_channels.items() if channel_id not in packed_analyses]
+    single_analyses = ollama.map(
+        lambda channel: analyze_channel_with_ollama(channel, product_context=product_context,
+                                                    use_cache=not force_rescore),
+        pending,
+    )
+    analyses = {**packed_analyses, **{c['channel_id']: a for c, a in zip(pending, single_analyses)}}
+    
     for i, (channel_id, channel_data) in enumerate(all_channels.items(), 1):
-        print(f"[{i}/{len(all_channels)}] {channel_data['channel_name']}...", end=' ')
-        
-        analysis = analyze_channel_with_ollama(channel_data, product_context=product_context)
+        analysis = analyses[channel_id]
         
         result = {
             'channel_id': channel_id,
@@ -407,7 +354,22 @@ def main(product_context: str = None, target_direction: str = None,
         
         score = analysis.get('overall_score', 0)
         relevant = "✓" if analysis.get('relevant', False) else "✗"
-        print(f"{relevant} Score: {score}/10")
+        print(f"[{i}/{len(all_channels)}] {channel_data['channel_name']}... {relevant} Score: {score}/10")
+        
+        stats = query_yield[source_query[channel_id]]
+        stats['llm_scored'] += 1
+        stats['relevant'] += 1 if analysis.get('relevant', False) else 0
+    
+    # Per-query yield feeds top_yield_queries() seeding on the next run
+    db = ChannelDatabase()
+    db.connect()
+    db.create_query_yield_columns()
+    for query, stats in query_yield.items():
+        # No farm filter in this workflow: every unique channel goes on to scoring
+        db.record_query_yield(normalize_query(query), 1, stats['videos'], stats['new_channels'], stats['llm_scored'],
+                              stats['llm_scored'], stats['relevant'], results_per_query,
+                              source='automated_workflow')
+    db.close()
     
     # Step 5: Generate Report
     print("\n" + "=" * 70)
@@ -466,6 +428,16 @@ def main(product_context: str = None, target_direction: str = None,
     print(f"   Channels Found: {len(results)}")
     print(f"   ✅ Relevant: {len(relevant)}")
     print(f"   ❌ Not Relevant: {len(not_relevant)}")
+    print(f"   🗃️ {format_cache_report()}")
+    print(f"   🧩 {format_parse_report()}")
+    print(f"   🚦 YouTube fetches lost: {FETCH_FAILURES['search_throttled']} searches throttled, "
+          f"{FETCH_FAILURES['search_failed']} failed; {FETCH_FAILURES['channel_throttled']} channel "
+          f"lookups throttled, {FETCH_FAILURES['channel_failed']} failed")
+    for line in novelty.summary_lines(results_per_query):
+        print(f"   ♻️ {line.strip()}")
+    for line in format_ollama_report():
+        print(f"   ⚡ {line}")
+    ollama.release(DEFAULT_MODEL)
     
     if relevant:
         print(f"\n🎯 RELEVANT CHANNELS (Recommended for Outreach):\n")
@@ -506,5 +478,7 @@ def main(product_context: str = None, target_direction: str = None,
     print(f"\n✅ Fully automated workflow complete!")
 
 if __name__ == "__main__":
-    main()
+    import sys
+    pack_size = int(sys.argv[sys.argv.index('--pack') + 1]) if '--pack' in sys.argv else 1
+    main(force_rescore='--rescore' in sys.argv, pack_size=pack_size)
 
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Local Stub of the Message Batches Endpoints
+Just enough of POST /v1/messages/batches, GET /v1/messages/batches/{id} and
+its /results JSONL for exercising batch_scoring.py offline: batches end
+after a few polls and every request gets a canned analysis (every
+ERROR_EVERY-th one errors, to exercise the retry path).
+
+Usage:
+    python batch_api_stub.py [port]
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=stub python batch_scoring.py run
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+DEFAULT_PORT = 8765
+POLLS_UNTIL_ENDED = 2  # Retrieves that report in_progress before a batch ends
+ERROR_EVERY = 10  # Every Nth request in a batch comes back errored (0 disables)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def canned_analysis(prompt: str) -> Dict:
+    """Deterministic analysis derived from the prompt text"""
+    score = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16) % 11
+    return {
+        "relevance_score": score,
+        "audience_match_score": score,
+        "engagement_score": score,
+        "overall_score": score,
+        "priority": "high" if score >= 8 else "medium" if score >= 6 else "low",
+        "relevant": score >= 7,
+        "reason": "Stub analysis",
+        "pitch": "",
+        "engagement_notes": "",
+    }
+
+
+class BatchStubState:
+    def __init__(self):
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.counter = 0
+
+
+class BatchStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state: BatchStubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+        self.send_response(status)
+        self.send_header('content-type', content_type)
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data: Dict, status: int = 200):
+        self._send(status, json.dumps(data).encode('utf-8'))
+
+    def _batch_json(self, batch: Dict) -> Dict:
+        total = len(batch['requests'])
+        ended = batch['status'] == 'ended'
+        errored = len(batch['errored']) if ended else 0
+        host = self.headers.get('host')
+        return {
+            "id": batch['id'],
+            "type": "message_batch",
+            "processing_status": batch['status'],
+            "request_counts": {
+                "processing": 0 if ended else total,
+                "succeeded": total - errored if ended else 0,
+                "errored": errored,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": batch['created_at'],
+            "expires_at": batch['expires_at'],
+            "ended_at": batch['ended_at'],
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"http://{host}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/v1/messages/batches':
+            return self._send_json({"type": "error", "error": {"type": "not_found_error"}}, 404)
+
+        payload = json.loads(self.rfile.read(int(self.headers.get('content-length', 0))))
+        with self.state.lock:
+            self.state.counter += 1
+            batch_id = f"msgbatch_stub_{self.state.counter:04d}"
+            requests_ = payload.get('requests', [])
+            batch = {
+                'id': batch_id,
+                'requests': requests_,
+                'errored': {r['custom_id'] for i, r in enumerate(requests_, 1)
+                            if ERROR_EVERY and i % ERROR_EVERY == 0},
+                'status': 'in_progress',
+                'polls': 0,
+                'created_at': _now(),
+                'expires_at': (datetime.now(timezone.utc) + timedelta(days=1)).isoformat().replace('+00:00', 'Z'),
+                'ended_at': None,
+            }
+            self.state.batches[batch_id] = batch
+        self._send_json(self._batch_json(batch))
+
+    def do_GET(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if len(parts) < 4 or parts[:3] != ['v1', 'messages', 'batches']:
+            return self._send_json({"type": "error", "error": {"type": "not_found_error"}}, 404)
+
+        with self.state.lock:
+            batch = self.state.batches.get(parts[3])
+            if batch is None:
+                return self._send_json({"type": "error", "error": {"type": "not_found_error"}}, 404)
+
+            if len(parts) == 4:
+                batch['polls'] += 1
+                if batch['status'] == 'in_progress' and batch['polls'] > POLLS_UNTIL_ENDED:
+                    batch['status'] = 'ended'
+                    batch['ended_at'] = _now()
+                return self._send_json(self._batch_json(batch))
+
+        lines = []
+        for request in batch['requests']:
+            custom_id = request['custom_id']
+            if custom_id in batch['errored']:
+                result = {"type": "errored",
+                          "error": {"type": "error", "error": {"type": "overloaded_error", "message": "stub"}}}
+            else:
+                prompt = request['params']['messages'][-1]['content']
+                result = {"type": "succeeded", "message": {
+                    "id": f"msg_{custom_id}", "type": "message", "role": "assistant",
+                    "model": request['params']['model'],
+                    "content": [{"type": "text", "text": json.dumps(canned_analysis(str(prompt)))}],
+                    "stop_reason": "end_turn", "stop_sequence": None,
+                    "usage": {"input_tokens": 100, "output_tokens": 60},
+                }}
+            lines.append(json.dumps({"custom_id": custom_id, "result": result}))
+        self._send(200, ('\n'.join(lines) + '\n').encode('utf-8'), 'application/binary')
+
+
+def start_stub_server(port: int = 0) -> ThreadingHTTPServer:
+    """Serve the stub on a background thread (port 0 picks a free port)"""
+    handler = type('Handler', (BatchStubHandler,), {'state': BatchStubState()})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import sys
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    server = start_stub_server(port)
+    print(f"🧪 Message Batches stub on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Bulk Channel Scoring via the Anthropic Message Batches API
+Submits every unscored channel in youtube_channels.db as one Message Batch
+(same cached rubric prefix and channel block as live scoring), polls until
+it ends, and writes the parsed analyses back in one transaction. Submitted
+batch IDs are stored in the database, so a restarted run picks up where it
+left off instead of paying for the same channels twice.
+
+Usage:
+    python batch_scoring.py run [limit]      # resume open batches, then submit + collect the rest
+    python batch_scoring.py submit [limit]   # submit pending channels and exit
+    (add --ranked to run/submit to order by the learned ranker and skip predicted low scorers)
+    python batch_scoring.py resume           # wait for and collect every open batch
+    python batch_scoring.py status
+    python batch_scoring.py collect <batch_id>
+
+Set PRODUCT_CONTEXT_FILE to a text file to score against a different product.
+ANTHROPIC_BASE_URL points the client at another endpoint (e.g. batch_api_stub.py).
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from anthropic_clients import get_client
+from channel_database import ChannelDatabase
+from relevance_ranker import RelevanceRanker, SKIP_SCORE
+from scoring_prompts import (
+    DEFAULT_PRODUCT_CONTEXT,
+    build_channel_prompt,
+    build_scoring_system_prompt,
+    parse_analysis_response,
+)
+
+ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY', '')
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+CLAUDE_TEMPERATURE = 0.8
+MAX_TOKENS = 2048
+
+MAX_BATCH_REQUESTS = 100000  # API limit per batch
+POLL_INTERVAL = 60  # Seconds between status checks
+
+
+def load_product_context() -> str:
+    path = os.environ.get('PRODUCT_CONTEXT_FILE')
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return DEFAULT_PRODUCT_CONTEXT
+
+
+def build_batch_requests(channels: List[Dict], product_context: str,
+                         model: str = DEFAULT_MODEL) -> Tuple[List[Dict], Dict[str, str]]:
+    """
+    One batch request per channel
+
+    custom_id must match ^[a-zA-Z0-9_-]{1,64}$, which channel IDs like
+    '@handle' don't, so requests get positional IDs and the returned map
+    translates them back.
+    """
+    system = [{
+        "type": "text",
+        "text": build_scoring_system_prompt(product_context),
+        "cache_control": {"type": "ephemeral"},
+    }]
+
+    requests_, request_map = [], {}
+    for i, channel in enumerate(channels):
+        custom_id = f"ch-{i}"
+        request_map[custom_id] = channel['channel_id']
+        requests_.append({
+            "custom_id": custom_id,
+            "params": {
+                "model": model,
+                "max_tokens": MAX_TOKENS,
+                "temperature": CLAUDE_TEMPERATURE,
+                "system": system,
+                "messages": [{"role": "user", "content": build_channel_prompt(channel)}],
+            },
+        })
+    return requests_, request_map
+
+
+def submit_pending(db: ChannelDatabase, product_context: str, model: str = DEFAULT_MODEL,
+                   limit: Optional[int] = None, ranker: Optional[RelevanceRanker] = None,
+                   skip_below: float = SKIP_SCORE) -> List[str]:
+    """
+    Submit every unscored channel not already in an open batch; returns new batch IDs
+
+    With a ranker, channels are submitted best-predicted first and those
+    predicted below skip_below are left unscored (limit then applies after
+    ranking).
+    """
+    in_flight = {
+        channel_id
+        for batch in db.get_scoring_batches(open_only=True)
+        for channel_id in batch['request_map'].values()
+    }
+    channels = [c for c in db.get_unscored_channels(None if ranker else limit)
+                if c['channel_id'] not in in_flight]
+
+    if ranker and channels:
+        ranked = ranker.rank(channels)
+        channels = [channel for channel, score in ranked if score >= skip_below][:limit]
+        print(f"📈 Ranker kept {len(channels):,} of {len(ranked):,} pending channels "
+              f"({len(ranked) - len(channels):,} predicted below {skip_below} or over the limit)")
+
+    if not channels:
+        print("✓ No pending channels to submit")
+        return []
+
+    client = get_client(ANTHROPIC_API_KEY, model)
+    batch_ids = []
+    for start in range(0, len(channels), MAX_BATCH_REQUESTS):
+        chunk = channels[start:start + MAX_BATCH_REQUESTS]
+        requests_, request_map = build_batch_requests(chunk, product_context, model)
+
+        batch = client.messages.batches.create(requests=requests_)
+        db.add_scoring_batch(batch.id, model, product_context, request_map)
+        batch_ids.append(batch.id)
+        print(f"📤 Submitted batch {batch.id} ({len(chunk):,} channels)")
+
+    return batch_ids
+
+
+def wait_for_batch(batch_id: str, model: str = DEFAULT_MODEL, poll_interval: float = POLL_INTERVAL):
+    """Poll until the batch has ended; returns the final batch object"""
+    client = get_client(ANTHROPIC_API_KEY, model)
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"  ⏳ {batch_id}: {batch.processing_status} | {counts.succeeded} succeeded, "
+              f"{counts.errored} errored, {counts.processing} processing")
+
+        if batch.processing_status == 'ended':
+            return batch
+        time.sleep(poll_interval)
+
+
+def collect_results(db: ChannelDatabase, batch_id: str, model: str = DEFAULT_MODEL,
+                    request_map: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Parse an ended batch's results and store them in one transaction
+
+    Errored, expired and unparseable requests are left unscored so the next
+    submit picks them up again. Results whose custom_id isn't in request_map
+    are skipped and reported rather than stored under a made-up channel_id.
+    """
+    if request_map is None:
+        tracked = {b['batch_id']: b for b in db.get_scoring_batches()}
+        request_map = tracked.get(batch_id, {}).get('request_map', {})
+
+    client = get_client(ANTHROPIC_API_KEY, model)
+    analyses = []
+    summary = {'succeeded': 0, 'unparseable': 0, 'unmapped': 0, 'errored': 0, 'expired': 0, 'canceled': 0}
+
+    for entry in client.messages.batches.results(batch_id):
+        result_type = entry.result.type
+        if result_type != 'succeeded':
+            summary[result_type] = summary.get(result_type, 0) + 1
+            continue
+
+        channel_id = request_map.get(entry.custom_id)
+        if channel_id is None:
+            summary['unmapped'] += 1
+            print(f"⚠️ Batch {batch_id}: no channel recorded for request {entry.custom_id}, result skipped")
+            continue
+        text = entry.result.message.content[0].text if entry.result.message.content else ''
+        analysis = parse_analysis_response(text)
+        if analysis is None:
+            summary['unparseable'] += 1
+            continue
+
+        summary['succeeded'] += 1
+        analyses.append({'channel_id': channel_id, 'analysis': analysis})
+
+    written = db.save_analyses(analyses, model, source='batch')
+    db.update_scoring_batch(batch_id, 'collected', written)
+    summary['written'] = written
+
+    print(f"✓ Batch {batch_id}: {written:,} analyses written | {summary['unparseable']} unparseable, "
+          f"{summary['unmapped']} unmapped, {summary['errored']} errored, {summary['expired']} expired")
+    return summary
+
+
+def resume_open_batches(db: ChannelDatabase, poll_interval: float = POLL_INTERVAL) -> List[Dict]:
+    """Wait for and collect every batch submitted but not yet written back"""
+    summaries = []
+    for batch in db.get_scoring_batches(open_only=True):
+        print(f"🔁 Resuming batch {batch['batch_id']} ({batch['request_count']:,} channels)")
+        wait_for_batch(batch['batch_id'], batch['model'], poll_interval)
+        db.update_scoring_batch(batch['batch_id'], 'ended')
+        summaries.append(collect_results(db, batch['batch_id'], batch['model'], batch['request_map']))
+    return summaries
+
+
+def run(limit: Optional[int] = None, model: str = DEFAULT_MODEL,
+        poll_interval: float = POLL_INTERVAL, ranker: Optional[RelevanceRanker] = None) -> List[Dict]:
+    """Resume anything open, then score everything still pending"""
+    db = ChannelDatabase()
+    db.connect()
+    db.create_scoring_tables()
+
+    try:
+        summaries = resume_open_batches(db, poll_interval)
+        product_context = load_product_context()
+        for batch_id in submit_pending(db, product_context, model, limit, ranker):
+            wait_for_batch(batch_id, model, poll_interval)
+            db.update_scoring_batch(batch_id, 'ended')
+            summaries.append(collect_results(db, batch_id, model))
+        return summaries
+    finally:
+        db.close()
+
+
+def print_status(db: ChannelDatabase):
+    batches = db.get_scoring_batches()
+    print(f"📊 {len(db.get_unscored_channels()):,} channels pending, {len(batches)} batches tracked")
+    for batch in batches:
+        print(f"  {batch['batch_id']}: {batch['status']} | {batch['request_count']:,} requests, "
+              f"{batch['results_written']:,} written | submitted {batch['created_date'][:16]}")
+
+
+def main():
+    print("📦 Batch Channel Scoring (Message Batches API)")
+    print("=" * 60)
+
+    args = [a for a in sys.argv[1:] if a != '--ranked']
+    command = args[0] if args else 'run'
+    arg = args[1] if len(args) > 1 else None
+
+    if command in ('run', 'submit', 'resume') and not ANTHROPIC_API_KEY:
+        print("❌ ANTHROPIC_API_KEY is not set")
+        return
+
+    ranker = None
+    if '--ranked' in sys.argv:
+        ranker = RelevanceRanker.load()
+        if ranker is None:
+            print("❌ No ranker weights; run `python relevance_ranker.py train` first")
+            return
+
+    if command == 'run':
+        run(limit=int(arg) if arg else None, ranker=ranker)
+        return
+
+    db = ChannelDatabase()
+    db.connect()
+    db.create_scoring_tables()
+    try:
+        if command == 'submit':
+            submit_pending(db, load_product_context(), limit=int(arg) if arg else None, ranker=ranker)
+        elif command == 'resume':
+            resume_open_batches(db)
+        elif command == 'collect' and arg:
+            collect_results(db, arg)
+        elif command == 'status':
+            print_status(db)
+        else:
+            print(__doc__)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Cascaded Channel Scoring
+A cheap tier (local Ollama model or a Haiku-class Claude model) scores every
+channel; only channels whose cheap score falls inside an uncertainty band,
+or whose cheap answer failed, are escalated to the large model. A small
+random sample outside the band is also escalated so agreement can be
+measured where the cheap tier decides alone.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from claude_scoring import estimate_tokens
+
+CASCADE_BAND = (4, 7)  # Cheap overall_score range (inclusive) that gets a second opinion
+AUDIT_RATE = 0.05  # Share of confident cheap decisions also sent to the large model
+OUTPUT_TOKENS_ESTIMATE = 250
+
+# USD per million (input, output) tokens, for cost estimates only
+MODEL_PRICES = {
+    'claude-sonnet-4-20250514': (3.00, 15.00),
+    'claude-3-5-haiku-20241022': (0.80, 4.00),
+}
+
+
+def estimate_cost(model: str, prompt_text: str) -> float:
+    """Rough USD cost of one scoring call (local models are free)"""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (estimate_tokens(prompt_text) * input_price + OUTPUT_TOKENS_ESTIMATE * output_price) / 1_000_000
+
+
+def overall_score(analysis: Dict) -> Optional[float]:
+    """The analysis' overall_score as a number, or None if missing or not numeric"""
+    try:
+        return float(analysis['overall_score'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.cost = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'avg_seconds': round(self.seconds / self.calls, 2) if self.calls else 0,
+            'est_cost_usd': round(self.cost, 4),
+        }
+
+
+class CascadeScorer:
+    """
+    Two-tier scorer
+
+    Args:
+        cheap_score / strong_score: (channel) -> analysis dict
+        cheap_model / strong_model: Names used in reports, cost estimates and
+            the stored analysis ('scored_by')
+        prompt_text: (channel) -> full prompt text, for cost estimates
+        band: (low, high) cheap overall_score range that gets escalated
+    """
+
+    def __init__(self, cheap_score: Callable[[Dict], Dict], strong_score: Callable[[Dict], Dict],
+                 cheap_model: str, strong_model: str,
+                 prompt_text: Optional[Callable[[Dict], str]] = None,
+                 band: Tuple[float, float] = CASCADE_BAND, audit_rate: float = AUDIT_RATE):
+        self.cheap_score = cheap_score
+        self.strong_score = strong_score
+        self.cheap_model = cheap_model
+        self.strong_model = strong_model
+        self.prompt_text = prompt_text or (lambda channel: '')
+        self.band = band
+        self.audit_rate = audit_rate
+
+        self._lock = threading.Lock()
+        self.tiers = {'cheap': TierStats(), 'strong': TierStats()}
+        self.counts = {'channels': 0, 'decided_cheap': 0, 'escalated_band': 0,
+                       'escalated_failed': 0, 'audited': 0}
+        self.pairs = []  # (cheap_analysis, strong_analysis) wherever both tiers ran
+
+    def _run_tier(self, tier: str, channel: Dict) -> Dict:
+        scorer = self.cheap_score if tier == 'cheap' else self.strong_score
+        model = self.cheap_model if tier == 'cheap' else self.strong_model
+
+        start = time.perf_counter()
+        analysis = scorer(channel)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            stats = self.tiers[tier]
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.cost += estimate_cost(model, self.prompt_text(channel))
+            if overall_score(analysis) is None:
+                stats.failures += 1
+        return analysis
+
+    def score(self, channel: Dict) -> Dict:
+        """Cheap tier first; escalate borderline, failed and audit-sampled channels"""
+        return self.escalate(channel, self._run_tier('cheap', channel))
+
+    def record_cheap(self, channel: Dict, analysis: Dict, seconds: float):
+        """
+        Count a cheap answer obtained elsewhere (e.g. one channel of a packed
+        cheap call, with its share of the call's time). Cost is estimated as
+        if the channel had been scored alone, so packed runs overstate it.
+        """
+        with self._lock:
+            stats = self.tiers['cheap']
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.cost += estimate_cost(self.cheap_model, self.prompt_text(channel))
+            if overall_score(analysis) is None:
+                stats.failures += 1
+
+    def escalate(self, channel: Dict, cheap: Dict) -> Dict:
+        """Final analysis for a channel given its cheap-tier answer"""
+        # Cheap answers are only checked for 'relevant'; a non-numeric score counts as a failure
+        score = overall_score(cheap)
+
+        if score is None:
+            reason = 'escalated_failed'
+        elif self.band[0] <= score <= self.band[1]:
+            reason = 'escalated_band'
+        elif random.random() < self.audit_rate:
+            reason = 'audited'
+        else:
+            with self._lock:
+                self.counts['channels'] += 1
+                self.counts['decided_cheap'] += 1
+            return {**cheap, 'overall_score': score, 'scored_by': self.cheap_model}
+
+        strong = self._run_tier('strong', channel)
+        with self._lock:
+            self.counts['channels'] += 1
+            self.counts[reason] += 1
+            if score is not None and overall_score(strong) is not None:
+                self.pairs.append((cheap, strong))
+
+        if overall_score(strong) is None and score is not None:
+            # Large model failed; keep the cheap answer
+            return {**cheap, 'overall_score': score, 'scored_by': self.cheap_model}
+        return {**strong, 'scored_by': self.strong_model, 'cheap_score': score}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pairs = list(self.pairs)
+            counts = dict(self.counts)
+            tiers = {name: stats.as_dict() for name, stats in self.tiers.items()}
+            strong_avg_cost = self.tiers['strong'].cost / self.tiers['strong'].calls \
+                if self.tiers['strong'].calls else 0.0
+
+        agreement = None
+        if pairs:
+            same = sum(1 for c, s in pairs if bool(c.get('relevant')) == bool(s.get('relevant')))
+            diffs = [abs(overall_score(c) - overall_score(s)) for c, s in pairs]
+            agreement = {
+                'pairs': len(pairs),
+                'same_decision': round(same / len(pairs), 3),
+                'mean_abs_score_diff': round(sum(diffs) / len(diffs), 2),
+                'within_1_point': round(sum(1 for d in diffs if d <= 1) / len(diffs), 3),
+            }
+
+        escalated = counts['escalated_band'] + counts['escalated_failed'] + counts['audited']
+        total_cost = tiers['cheap']['est_cost_usd'] + tiers['strong']['est_cost_usd']
+        return {
+            **counts,
+            'escalation_rate': round(escalated / counts['channels'], 3) if counts['channels'] else 0,
+            'band': self.band,
+            'tiers': tiers,
+            'agreement': agreement,
+            'est_cost_usd': round(total_cost, 4),
+            'est_cost_all_strong_usd': round(strong_avg_cost * counts['channels'], 4),
+        }
+
+    def summary_lines(self):
+        s = self.stats()
+        cheap, strong = s['tiers']['cheap'], s['tiers']['strong']
+        lines = [
+            f"Cascade {self.cheap_model} → {self.strong_model} (band {s['band'][0]}-{s['band'][1]}): "
+            f"{s['decided_cheap']} decided by cheap tier, {s['escalated_band']} borderline + "
+            f"{s['escalated_failed']} failed escalated, {s['audited']} audited "
+            f"({s['escalation_rate']:.0%} reached the large model)",
+            f"  cheap: {cheap['calls']} calls, avg {cheap['avg_seconds']}s | "
+            f"large: {strong['calls']} calls, avg {strong['avg_seconds']}s | "
+            f"est. cost ${s['est_cost_usd']:.4f} vs ${s['est_cost_all_strong_usd']:.4f} all-large",
+        ]
+        if s['agreement']:
+            a = s['agreement']
+            lines.append(
+                f"  agreement on {a['pairs']} double-scored channels: {a['same_decision']:.0%} same decision, "
+                f"mean |Δscore| {a['mean_abs_score_diff']}, {a['within_1_point']:.0%} within 1 point"
+            )
+        return lines
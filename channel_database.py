@@ -6,28 +6,151 @@ Stores channel information in SQLite for easy access and querying
 
 import sqlite3
 import json
+import re
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+
+from db_connections import ConnectionManager
 
 DATABASE_FILE = "youtube_channels.db"
 
+BULK_CHUNK_SIZE = 500  # Channels per transaction in add_channels_bulk
+
+# Channel columns written from channel dicts, with the value used when a new row omits them.
+# SQLite checks NOT NULL on the INSERT row before resolving the conflict, so channel_name and
+# channel_url need a placeholder too, or a partial update of a known channel would fail.
+CHANNEL_COLUMNS = [
+    ('channel_id', None), ('channel_name', ''), ('channel_url', ''),
+    ('subscriber_count', 0), ('view_count', 0), ('category', 'Unknown'), ('notes', ''),
+    # Enhanced metrics
+    ('avg_views_per_video', None), ('median_views', None), ('engagement_rate', None),
+    ('view_rate', None), ('total_video_count', None), ('avg_video_length', None),
+    ('upload_frequency', None), ('videos_last_30_days', None), ('last_upload_date', None),
+    ('consistency_score', None), ('growth_trend', None), ('recent_viral_count', None),
+    ('channel_description', None), ('channel_country', None), ('channel_join_date', None),
+    ('business_email', None), ('website_url', None), ('instagram_handle', None),
+    ('twitter_handle', None), ('has_affiliate_store', 0), ('has_patreon', 0),
+]
+
+
+def _build_channel_upsert_sql() -> str:
+    """
+    INSERT for new channels; for known ones only supplied (non-null) fields
+    are updated, and the WHERE clause skips the write when none of them
+    changed (added_date and unsupplied columns are never touched)
+    """
+    names = [name for name, _ in CHANNEL_COLUMNS]
+    values = [f':{name}' if default is None else f'COALESCE(:{name}, {default!r})'
+              for name, default in CHANNEL_COLUMNS]
+    updated = names[1:]
+    return f'''
+    INSERT INTO channels ({', '.join(names)}, added_date, last_updated)
+    VALUES ({', '.join(values)}, :now, :now)
+    ON CONFLICT(channel_id) DO UPDATE SET
+        {', '.join(f'{name} = COALESCE(:{name}, {name})' for name in updated)},
+        last_updated = :now
+    WHERE {' OR '.join(f'(:{name} IS NOT NULL AND :{name} IS NOT {name})' for name in updated)}
+'''
+
+
+CHANNEL_UPSERT_SQL = _build_channel_upsert_sql()
+
+CONTACT_INSERT_SQL = '''
+    INSERT OR IGNORE INTO contacts 
+    (channel_id, contact_type, contact_value, added_date)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Channel field -> contacts.contact_type
+CONTACT_FIELDS = [
+    ('business_email', 'email'),
+    ('instagram_handle', 'instagram'),
+    ('twitter_handle', 'twitter'),
+    ('website_url', 'website'),
+]
+
+# Secondary indexes managed by create_indexes(): (name, table, columns).
+# contacts(channel_id, contact_type) is already covered by the table's
+# UNIQUE(channel_id, contact_type, contact_value) index, so it isn't duplicated here.
+INDEXES = [
+    ('idx_channels_subscriber_count', 'channels', 'subscriber_count'),
+    ('idx_channels_category', 'channels', 'category, subscriber_count'),
+    ('idx_videos_channel_id', 'videos', 'channel_id'),
+]
+
+# Queries run per page view / per channel; check_query_plans() verifies each uses an index
+HOT_QUERIES = {
+    'get_all_channels': ('SELECT * FROM channels ORDER BY subscriber_count DESC', ()),
+    'get_all_channels(category)': ('SELECT * FROM channels WHERE category = ? ORDER BY subscriber_count DESC',
+                                   ('prepper',)),
+    'get_channels_by_subscriber_range': ('SELECT * FROM channels WHERE subscriber_count BETWEEN ? AND ? '
+                                         'ORDER BY subscriber_count DESC', (10000, 500000)),
+    'get_contacts': ('SELECT * FROM contacts WHERE channel_id = ?', ('UC0',)),
+    'videos by channel': ('SELECT * FROM videos WHERE channel_id = ?', ('UC0',)),
+    'get_unscored_channels': ('SELECT c.* FROM channels c LEFT JOIN channel_analyses a ON a.channel_id = c.channel_id '
+                              'WHERE a.channel_id IS NULL ORDER BY c.subscriber_count DESC', ()),
+    'get_stats(target range)': ('SELECT COUNT(*) FROM channels WHERE subscriber_count BETWEEN 10000 AND 500000', ()),
+}
+
+# Full-text search over channels (FTS5, external content = the channels table)
+SEARCH_COLUMNS = ['channel_name', 'channel_description', 'notes']
+SEARCH_WEIGHTS = (10.0, 1.0, 3.0)  # bm25() column weights: a name match outranks a description match
+SEARCH_LIMIT = 50
+
+# Per-query downstream yield, accumulated over every run of the query
+QUERY_YIELD_COLUMNS = [
+    ('searches', 'INTEGER DEFAULT 0'),
+    ('videos_fetched', 'INTEGER DEFAULT 0'),
+    ('new_channels', 'INTEGER DEFAULT 0'),
+    ('passed_farm_filter', 'INTEGER DEFAULT 0'),
+    ('llm_scored', 'INTEGER DEFAULT 0'),
+    ('relevant_channels', 'INTEGER DEFAULT 0'),
+    ('max_depth', 'INTEGER DEFAULT 0'),
+    ('last_yield_date', 'TEXT'),
+]
+
 class ChannelDatabase:
-    def __init__(self, db_file: str = DATABASE_FILE):
+    """
+    Channel store that can be shared across threads: each thread gets its own
+    WAL-mode connection and cursor (see db_connections.ConnectionManager)
+    """
+    
+    def __init__(self, db_file: str = DATABASE_FILE, pragmas: Optional[Dict] = None):
         self.db_file = db_file
-        self.conn = None
-        self.cursor = None
+        self.connections = ConnectionManager(db_file, pragmas)
+        self._local = threading.local()
+        self._connected = False
+        
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """The calling thread's connection (opened on first use once connect() was called)"""
+        if not self._connected:
+            return None
+        return self.connections.get()
+        
+    @property
+    def cursor(self) -> Optional[sqlite3.Cursor]:
+        """The calling thread's cursor, so threads never share fetch state"""
+        conn = self.conn
+        if conn is None:
+            return None
+        if getattr(self._local, 'conn', None) is not conn:
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()  # Rows come back as sqlite3.Row (dict-like)
+        return self._local.cursor
         
     def connect(self):
         """Connect to the database"""
-        self.conn = sqlite3.connect(self.db_file)
-        self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-        self.cursor = self.conn.cursor()
+        self._connected = True
+        self.connections.get()
         
     def close(self):
-        """Close the database connection"""
-        if self.conn:
-            self.conn.commit()
-            self.conn.close()
+        """Close every thread's connection"""
+        if self._connected:
+            self._connected = False
+            self.connections.close_all()
             
     def migrate_schema(self):
         """Add new columns to existing database"""
@@ -168,78 +291,276 @@ class ChannelDatabase:
             )
         ''')
         
+        self.create_scoring_tables()
+        self.create_embedding_tables()
+        self.create_query_yield_columns()
+        self.create_indexes()
+        self.create_search_index()
+        
         self.conn.commit()
         print("✓ Database tables created")
+    
+    def create_indexes(self):
+        """Create the secondary indexes in INDEXES (safe on existing databases)"""
+        for name, table, columns in INDEXES:
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+        self.conn.commit()
+        
+    def drop_indexes(self):
+        """Drop the managed secondary indexes (for benchmarking the unindexed schema)"""
+        for name, _, _ in INDEXES:
+            self.cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        self.conn.commit()
+        
+    def explain_query_plan(self, sql: str, params: tuple = ()) -> List[str]:
+        """SQLite's plan steps for a query (e.g. 'SEARCH contacts USING INDEX ...')"""
+        # EXPLAIN isn't re-prepared after schema changes; keying on schema_version avoids stale cached plans
+        schema_version = self.cursor.execute('PRAGMA schema_version').fetchone()[0]
+        self.cursor.execute(f'EXPLAIN QUERY PLAN {sql} -- schema {schema_version}', params)
+        return [row[3] for row in self.cursor.fetchall()]
+        
+    def check_query_plans(self) -> Dict[str, Dict]:
+        """
+        For each of HOT_QUERIES: {'uses_index', 'plan'}. A query fails if any
+        step is a full table scan or needs a temp B-tree to sort.
+        """
+        report = {}
+        for name, (sql, params) in HOT_QUERIES.items():
+            plan = self.explain_query_plan(sql, params)
+            full_scan = any(step.startswith('SCAN') and 'USING' not in step for step in plan)
+            temp_sort = any('TEMP B-TREE' in step for step in plan)
+            report[name] = {'uses_index': not (full_scan or temp_sort), 'plan': plan}
+        return report
+    
+    def create_search_index(self) -> bool:
+        """
+        Create the channels_fts index and the triggers that keep it in sync
+        with channels (safe on existing databases; existing rows are indexed
+        once). Returns False if this SQLite build lacks FTS5.
+        """
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_columns = ', '.join(f'new.{c}' for c in SEARCH_COLUMNS)
+        old_columns = ', '.join(f'old.{c}' for c in SEARCH_COLUMNS)
+        exists = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'channels_fts'").fetchone()
+        try:
+            self.cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS channels_fts USING fts5(
+                    {columns},
+                    content='channels', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Full-text search unavailable ({e}); search_channels will use LIKE")
+            return False
+        
+        # External-content FTS needs the old values to remove a row from the index
+        self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS channels_fts_insert AFTER INSERT ON channels BEGIN
+                INSERT INTO channels_fts (rowid, {columns}) VALUES (new.id, {new_columns});
+            END
+        ''')
+        self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS channels_fts_delete AFTER DELETE ON channels BEGIN
+                INSERT INTO channels_fts (channels_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+            END
+        ''')
+        self.cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS channels_fts_update AFTER UPDATE OF {columns} ON channels BEGIN
+                INSERT INTO channels_fts (channels_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+                INSERT INTO channels_fts (rowid, {columns}) VALUES (new.id, {new_columns});
+            END
+        ''')
+        
+        if not exists:
+            self.cursor.execute("INSERT INTO channels_fts (channels_fts) VALUES ('rebuild')")
+        self.conn.commit()
+        return True
+        
+    def create_scoring_tables(self):
+        """Create the LLM analysis and batch-tracking tables (safe on existing databases)"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS channel_analyses (
+                channel_id TEXT PRIMARY KEY,
+                model TEXT,
+                overall_score REAL,
+                relevant INTEGER,
+                priority TEXT,
+                analysis_json TEXT,
+                source TEXT,
+                analyzed_date TEXT,
+                FOREIGN KEY (channel_id) REFERENCES channels (channel_id)
+            )
+        ''')
+        
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scoring_batches (
+                batch_id TEXT PRIMARY KEY,
+                model TEXT,
+                product_context TEXT,
+                status TEXT,
+                request_count INTEGER,
+                request_map TEXT,
+                results_written INTEGER DEFAULT 0,
+                created_date TEXT,
+                ended_date TEXT
+            )
+        ''')
+        
+        self.conn.commit()
+        
+    def create_query_yield_columns(self):
+        """Add the yield columns to search_terms (safe on existing databases)"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_terms (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                search_term TEXT UNIQUE NOT NULL,
+                used_date TEXT,
+                results_count INTEGER DEFAULT 0,
+                source TEXT
+            )
+        ''')
+        self.cursor.execute("PRAGMA table_info(search_terms)")
+        existing_columns = {row[1] for row in self.cursor.fetchall()}
+        for col_name, col_type in QUERY_YIELD_COLUMNS:
+            if col_name not in existing_columns:
+                self.cursor.execute(f'ALTER TABLE search_terms ADD COLUMN {col_name} {col_type}')
+        self.conn.commit()
+        
+    def create_embedding_tables(self):
+        """Create the per-channel and per-query embedding caches (safe on existing databases)"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS channel_embeddings (
+                channel_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                created_date TEXT,
+                PRIMARY KEY (channel_id, model)
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                query TEXT NOT NULL,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                created_date TEXT,
+                PRIMARY KEY (query, model)
+            )
+        ''')
+        self.conn.commit()
+        
+    def _channel_row(self, channel_data: Dict, now: str) -> Dict:
+        """Named parameters for CHANNEL_UPSERT_SQL (None = not supplied)"""
+        row = {name: channel_data.get(name) for name, _ in CHANNEL_COLUMNS}
+        row['now'] = now
+        return row
+        
+    def _contact_rows(self, channel_data: Dict, now: str) -> List[tuple]:
+        """Contacts found during extraction plus any extra (type, value) pairs under 'contacts'"""
+        pairs = [(contact_type, channel_data[field]) for field, contact_type in CONTACT_FIELDS
+                 if channel_data.get(field)]
+        pairs += channel_data.get('contacts') or []
+        return [(channel_data['channel_id'], contact_type, value, now) for contact_type, value in pairs]
         
     def add_channel(self, channel_data: Dict) -> bool:
-        """Add or update a channel in the database with enhanced metrics"""
+        """Add a channel, or update the fields supplied for a known one (one commit)"""
         try:
-            self.cursor.execute('''
-                INSERT OR REPLACE INTO channels 
-                (channel_id, channel_name, channel_url, subscriber_count, 
-                 view_count, added_date, last_updated, category, notes,
-                 avg_views_per_video, median_views, engagement_rate, view_rate,
-                 total_video_count, avg_video_length, upload_frequency, 
-                 videos_last_30_days, last_upload_date, consistency_score,
-                 growth_trend, recent_viral_count, channel_description,
-                 channel_country, channel_join_date, business_email,
-                 website_url, instagram_handle, twitter_handle,
-                 has_affiliate_store, has_patreon)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?,
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                channel_data.get('channel_id'),
-                channel_data.get('channel_name'),
-                channel_data.get('channel_url'),
-                channel_data.get('subscriber_count', 0),
-                channel_data.get('view_count', 0),
-                datetime.now().isoformat(),
-                datetime.now().isoformat(),
-                channel_data.get('category', 'Unknown'),
-                channel_data.get('notes', ''),
-                # Enhanced metrics
-                channel_data.get('avg_views_per_video'),
-                channel_data.get('median_views'),
-                channel_data.get('engagement_rate'),
-                channel_data.get('view_rate'),
-                channel_data.get('total_video_count'),
-                channel_data.get('avg_video_length'),
-                channel_data.get('upload_frequency'),
-                channel_data.get('videos_last_30_days'),
-                channel_data.get('last_upload_date'),
-                channel_data.get('consistency_score'),
-                channel_data.get('growth_trend'),
-                channel_data.get('recent_viral_count'),
-                channel_data.get('channel_description'),
-                channel_data.get('channel_country'),
-                channel_data.get('channel_join_date'),
-                channel_data.get('business_email'),
-                channel_data.get('website_url'),
-                channel_data.get('instagram_handle'),
-                channel_data.get('twitter_handle'),
-                channel_data.get('has_affiliate_store', 0),
-                channel_data.get('has_patreon', 0)
-            ))
+            now = datetime.now().isoformat()
+            self.cursor.execute(CHANNEL_UPSERT_SQL, self._channel_row(channel_data, now))
             
             # Also add contact info if present
-            if channel_data.get('business_email'):
-                self.add_contact(channel_data['channel_id'], 'email', channel_data['business_email'])
-            if channel_data.get('instagram_handle'):
-                self.add_contact(channel_data['channel_id'], 'instagram', channel_data['instagram_handle'])
-            if channel_data.get('twitter_handle'):
-                self.add_contact(channel_data['channel_id'], 'twitter', channel_data['twitter_handle'])
-            if channel_data.get('website_url'):
-                self.add_contact(channel_data['channel_id'], 'website', channel_data['website_url'])
+            self.cursor.executemany(CONTACT_INSERT_SQL, self._contact_rows(channel_data, now))
             
             self.conn.commit()
             return True
         except Exception as e:
+            self.conn.rollback()
             print(f"Error adding channel: {e}")
             import traceback
             traceback.print_exc()
             return False
             
+    def add_channels_bulk(self, channels: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE,
+                          verbose: bool = True) -> Dict:
+        """
+        Upsert many channels (and their contacts) with executemany,
+        committing once per chunk instead of once per row. Known channels
+        only get their supplied fields updated, and unchanged ones aren't
+        written at all. A chunk that fails is rolled back and retried row by
+        row so one bad channel doesn't drop the rest. Repeats of a channel_id
+        within a chunk are merged first (later non-None fields win), as
+        one-by-one upserts would have left them.
+        
+        Returns {'saved', 'inserted', 'updated', 'skipped', 'duplicates', 'failed',
+        'failed_ids', 'contacts', 'seconds', 'rows_per_sec'}.
+        """
+        started = time.perf_counter()
+        result = {'saved': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0,
+                  'failed': 0, 'failed_ids': [], 'contacts': 0}
+        
+        def dedupe(chunk: List[Dict]) -> List[Dict]:
+            merged = {}
+            for channel in chunk:
+                channel_id = channel.get('channel_id')
+                if channel_id in merged:
+                    result['duplicates'] += 1
+                    merged[channel_id] = {**merged[channel_id],
+                                          **{k: v for k, v in channel.items() if v is not None}}
+                else:
+                    merged[channel_id] = channel
+            return list(merged.values())
+        
+        def write(chunk: List[Dict]):
+            now = datetime.now().isoformat()
+            contacts = [row for channel in chunk for row in self._contact_rows(channel, now)]
+            try:
+                ids = [c.get('channel_id') for c in chunk]  # Unique: chunks are deduped
+                self.cursor.execute(f'SELECT COUNT(*) FROM channels WHERE channel_id IN ({",".join("?" * len(ids))})', ids)
+                inserted = len(ids) - self.cursor.fetchone()[0]
+                
+                self.cursor.executemany(CHANNEL_UPSERT_SQL, [self._channel_row(c, now) for c in chunk])
+                changed = self.cursor.rowcount  # Inserts + updates; skipped upserts change nothing
+                self.cursor.executemany(CONTACT_INSERT_SQL, contacts)
+                self.conn.commit()
+                result['saved'] += len(chunk)
+                result['inserted'] += inserted
+                result['updated'] += changed - inserted
+                result['skipped'] += len(chunk) - changed
+                result['contacts'] += len(contacts)
+            except Exception as e:
+                self.conn.rollback()
+                if len(chunk) == 1:
+                    print(f"Error adding channel {chunk[0].get('channel_id')}: {e}")
+                    result['failed'] += 1
+                    result['failed_ids'].append(chunk[0].get('channel_id'))
+                    return
+                for channel in chunk:
+                    write([channel])
+        
+        chunk = []
+        for channel in channels:
+            chunk.append(channel)
+            if len(chunk) >= chunk_size:
+                write(dedupe(chunk))
+                chunk = []
+        if chunk:
+            write(dedupe(chunk))
+        
+        elapsed = time.perf_counter() - started
+        result['seconds'] = round(elapsed, 3)
+        result['rows_per_sec'] = round(result['saved'] / elapsed) if elapsed else 0
+        if verbose and (result['saved'] or result['failed']):
+            print(f"✓ Saved {result['saved']:,} channels ({result['inserted']:,} new, {result['updated']:,} updated, "
+                  f"{result['skipped']:,} unchanged; {result['contacts']:,} contacts"
+                  + (f"; {result['duplicates']:,} repeats merged" if result['duplicates'] else '') + ") in "
+                  f"{result['seconds']:.2f}s = {result['rows_per_sec']:,} rows/sec"
+                  + (f", {result['failed']} failed" if result['failed'] else ''))
+        return result
+        
     def add_contact(self, channel_id: str, contact_type: str, contact_value: str) -> bool:
         """Add a contact for a channel"""
         try:
@@ -294,13 +615,37 @@ class ChannelDatabase:
         self.cursor.execute('SELECT * FROM contacts WHERE channel_id = ?', (channel_id,))
         return [dict(row) for row in self.cursor.fetchall()]
         
-    def search_channels(self, query: str) -> List[Dict]:
-        """Search channels by name"""
-        self.cursor.execute('''
-            SELECT * FROM channels 
-            WHERE channel_name LIKE ? 
-            ORDER BY subscriber_count DESC
-        ''', (f'%{query}%',))
+    def search_channels(self, query: str, limit: int = SEARCH_LIMIT, offset: int = 0) -> List[Dict]:
+        """
+        Search channel names, descriptions and notes, best match first (BM25).
+        Every word is a prefix match ("homestead" finds "homesteading"), and
+        each row carries 'rank' (lower is better) and a description 'snippet'.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+        try:
+            # Let FTS5 sort by its rank column, then join only the page of rows being returned
+            self.cursor.execute(f'''
+                SELECT c.*, f.rank, f.snippet FROM (
+                    SELECT rowid, rank, snippet(channels_fts, 1, '', '', '…', 16) AS snippet
+                    FROM channels_fts
+                    WHERE channels_fts MATCH ? AND rank MATCH 'bm25({weights})'
+                    ORDER BY rank
+                    LIMIT ? OFFSET ?
+                ) f
+                JOIN channels c ON c.id = f.rowid
+                ORDER BY f.rank
+            ''', (match, limit, offset))
+        except sqlite3.OperationalError:
+            # No FTS5 index (old SQLite build): unranked scan, most subscribers first
+            self.cursor.execute('''
+                SELECT * FROM channels 
+                WHERE channel_name LIKE ? OR channel_description LIKE ?
+                ORDER BY subscriber_count DESC
+                LIMIT ? OFFSET ?
+            ''', (f'%{query}%', f'%{query}%', limit, offset))
         return [dict(row) for row in self.cursor.fetchall()]
         
     def get_channels_by_subscriber_range(self, min_subs: int, max_subs: int) -> List[Dict]:
@@ -312,6 +657,169 @@ class ChannelDatabase:
         ''', (min_subs, max_subs))
         return [dict(row) for row in self.cursor.fetchall()]
         
+    def get_unscored_channels(self, limit: Optional[int] = None) -> List[Dict]:
+        """Channels with no stored LLM analysis yet"""
+        sql = '''
+            SELECT c.* FROM channels c
+            LEFT JOIN channel_analyses a ON a.channel_id = c.channel_id
+            WHERE a.channel_id IS NULL
+            ORDER BY c.subscriber_count DESC
+        '''
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        self.cursor.execute(sql)
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def save_analyses(self, analyses: List[Dict], model: str, source: str) -> int:
+        """
+        Store LLM analyses in one transaction
+        
+        Args:
+            analyses: Dicts with channel_id and analysis (the parsed JSON)
+            model: Model that produced them
+            source: 'live', 'batch', ...
+        
+        Returns:
+            Number of rows written
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (
+                item['channel_id'],
+                model,
+                item['analysis'].get('overall_score'),
+                1 if item['analysis'].get('relevant') else 0,
+                item['analysis'].get('priority'),
+                json.dumps(item['analysis'], ensure_ascii=False),
+                source,
+                now,
+            )
+            for item in analyses
+        ]
+        try:
+            self.cursor.executemany('''
+                INSERT OR REPLACE INTO channel_analyses
+                (channel_id, model, overall_score, relevant, priority, analysis_json, source, analyzed_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+            return len(rows)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error saving analyses: {e}")
+            return 0
+    
+    def get_analysis(self, channel_id: str) -> Optional[Dict]:
+        """Stored LLM analysis for a channel"""
+        self.cursor.execute('SELECT analysis_json FROM channel_analyses WHERE channel_id = ?', (channel_id,))
+        row = self.cursor.fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def get_analyzed_channels(self) -> List[Dict]:
+        """Channels with a stored LLM verdict (overall_score, relevant) alongside the channel row"""
+        self.cursor.execute('''
+            SELECT c.*, a.overall_score, a.relevant, a.model AS analysis_model
+            FROM channels c
+            JOIN channel_analyses a ON a.channel_id = c.channel_id
+            WHERE a.overall_score IS NOT NULL
+        ''')
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def get_channel_embeddings(self, model: str, channel_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Cached embeddings for a model: {channel_id: {'text_hash', 'dim', 'embedding' (bytes)}}"""
+        sql = 'SELECT channel_id, text_hash, dim, embedding FROM channel_embeddings WHERE model = ?'
+        if channel_ids is None:
+            self.cursor.execute(sql, (model,))
+            rows = self.cursor.fetchall()
+        else:
+            rows = []
+            ids = list(channel_ids)
+            for start in range(0, len(ids), 500):  # Stay under SQLite's bound-parameter limit
+                chunk = ids[start:start + 500]
+                self.cursor.execute(sql + f' AND channel_id IN ({",".join("?" * len(chunk))})', (model, *chunk))
+                rows.extend(self.cursor.fetchall())
+        return {row[0]: {'text_hash': row[1], 'dim': row[2], 'embedding': row[3]} for row in rows}
+    
+    def save_channel_embeddings(self, model: str, embeddings: List[Dict]) -> int:
+        """Store embeddings (dicts with channel_id, text_hash, dim, embedding bytes) in one transaction"""
+        now = datetime.now().isoformat()
+        rows = [(e['channel_id'], model, e['text_hash'], e['dim'], e['embedding'], now) for e in embeddings]
+        try:
+            self.cursor.executemany('''
+                INSERT OR REPLACE INTO channel_embeddings
+                (channel_id, model, text_hash, dim, embedding, created_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+            return len(rows)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error saving embeddings: {e}")
+            return 0
+    
+    def get_query_embeddings(self, model: str, queries: List[str]) -> Dict[str, bytes]:
+        """Cached query embeddings for a model: {query: embedding bytes}"""
+        found = {}
+        queries = list(queries)
+        for start in range(0, len(queries), 500):
+            chunk = queries[start:start + 500]
+            self.cursor.execute(f'''
+                SELECT query, embedding FROM query_embeddings
+                WHERE model = ? AND query IN ({",".join("?" * len(chunk))})
+            ''', (model, *chunk))
+            found.update({row[0]: row[1] for row in self.cursor.fetchall()})
+        return found
+    
+    def save_query_embeddings(self, model: str, embeddings: Dict[str, bytes], dim: int) -> int:
+        """Store query embeddings ({query: float32 bytes}) in one transaction"""
+        now = datetime.now().isoformat()
+        rows = [(query, model, dim, embedding, now) for query, embedding in embeddings.items()]
+        try:
+            self.cursor.executemany('''
+                INSERT OR REPLACE INTO query_embeddings (query, model, dim, embedding, created_date)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.commit()
+            return len(rows)
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error saving query embeddings: {e}")
+            return 0
+    
+    def add_scoring_batch(self, batch_id: str, model: str, product_context: str,
+                          request_map: Dict[str, str]):
+        """Record a submitted Message Batch so it can be resumed after a restart"""
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO scoring_batches
+            (batch_id, model, product_context, status, request_count, request_map, created_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (batch_id, model, product_context, 'in_progress', len(request_map),
+              json.dumps(request_map), datetime.now().isoformat()))
+        self.conn.commit()
+    
+    def update_scoring_batch(self, batch_id: str, status: str, results_written: Optional[int] = None):
+        """Update a batch's status (and results count once collected)"""
+        ended = datetime.now().isoformat() if status in ('ended', 'collected') else None
+        self.cursor.execute('''
+            UPDATE scoring_batches
+            SET status = ?,
+                results_written = COALESCE(?, results_written),
+                ended_date = COALESCE(ended_date, ?)
+            WHERE batch_id = ?
+        ''', (status, results_written, ended, batch_id))
+        self.conn.commit()
+    
+    def get_scoring_batches(self, open_only: bool = False) -> List[Dict]:
+        """Tracked batches, newest first; open_only skips ones already collected"""
+        sql = 'SELECT * FROM scoring_batches'
+        if open_only:
+            sql += " WHERE status != 'collected'"
+        self.cursor.execute(sql + ' ORDER BY created_date DESC')
+        batches = [dict(row) for row in self.cursor.fetchall()]
+        for batch in batches:
+            batch['request_map'] = json.loads(batch['request_map'] or '{}')
+        return batches
+        
     def add_search_term(self, term: str, source: str = 'manual') -> bool:
         """Add a search term to the database"""
         try:
@@ -332,6 +840,49 @@ class ChannelDatabase:
         ''', (count, term))
         self.conn.commit()
         
+    def record_query_yield(self, term: str, searches: int = 0, videos: int = 0, new_channels: int = 0,
+                           passed_farm_filter: int = 0, llm_scored: int = 0, relevant: int = 0,
+                           depth: int = 0, source: str = 'pipeline'):
+        """Add one run's yield to a search term's running totals (creates the term if needed)"""
+        try:
+            now = datetime.now().isoformat()
+            self.cursor.execute('''
+                INSERT OR IGNORE INTO search_terms (search_term, used_date, source) VALUES (?, ?, ?)
+            ''', (term, now, source))
+            self.cursor.execute('''
+                UPDATE search_terms
+                SET searches = COALESCE(searches, 0) + ?,
+                    videos_fetched = COALESCE(videos_fetched, 0) + ?,
+                    results_count = COALESCE(results_count, 0) + ?,
+                    new_channels = COALESCE(new_channels, 0) + ?,
+                    passed_farm_filter = COALESCE(passed_farm_filter, 0) + ?,
+                    llm_scored = COALESCE(llm_scored, 0) + ?,
+                    relevant_channels = COALESCE(relevant_channels, 0) + ?,
+                    max_depth = MAX(COALESCE(max_depth, 0), ?),
+                    last_yield_date = ?
+                WHERE search_term = ?
+            ''', (searches, videos, videos, new_channels, passed_farm_filter, llm_scored, relevant,
+                  depth, now, term))
+            self.conn.commit()
+        except Exception as e:
+            print(f"Error recording query yield: {e}")
+    
+    def get_query_yields(self) -> Dict[str, Dict]:
+        """Yield totals for every search term that has been run at least once"""
+        self.cursor.execute('SELECT * FROM search_terms WHERE COALESCE(searches, 0) > 0')
+        return {row['search_term']: dict(row) for row in self.cursor.fetchall()}
+    
+    def get_top_yield_queries(self, limit: int = 10) -> List[Dict]:
+        """Search terms that found the most relevant (then usable) channels per search"""
+        self.cursor.execute('''
+            SELECT * FROM search_terms
+            WHERE COALESCE(searches, 0) > 0 AND COALESCE(passed_farm_filter, 0) > 0
+            ORDER BY relevant_channels * 1.0 / searches DESC,
+                     passed_farm_filter * 1.0 / searches DESC
+            LIMIT ?
+        ''', (limit,))
+        return [dict(row) for row in self.cursor.fetchall()]
+    
     def get_all_search_terms(self) -> List[Dict]:
         """Get all search terms"""
         self.cursor.execute('SELECT * FROM search_terms ORDER BY used_date DESC')
@@ -388,6 +939,12 @@ class ChannelDatabase:
         return stats
 
 
+def fts_query(text: str) -> str:
+    """User search text -> FTS5 MATCH expression: every word quoted and prefix-matched (AND)"""
+    words = re.findall(r'\w+', text.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
 def import_existing_data(db: ChannelDatabase):
     """Import data from existing CSV files"""
     import csv
@@ -396,7 +953,7 @@ def import_existing_data(db: ChannelDatabase):
     try:
         with open('creator_contacts.csv', 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
-            count = 0
+            channels = []
             for row in reader:
                 channel_data = {
                     'channel_id': row['Channel URL'].split('/')[-1],
@@ -404,26 +961,19 @@ def import_existing_data(db: ChannelDatabase):
                     'channel_url': row['Channel URL'],
                     'subscriber_count': int(row['Subscribers']) if row['Subscribers'].isdigit() else 0,
                     'category': 'prepper' if any(kw in row['Channel Name'].lower() 
-                                for kw in ['prepper', 'survival', 'bug out']) else 'other'
+                                for kw in ['prepper', 'survival', 'bug out']) else 'other',
+                    'contacts': [],
                 }
                 
-                if db.add_channel(channel_data):
-                    count += 1
-                    
-                    # Add contacts
-                    channel_id = channel_data['channel_id']
-                    if row.get('Email'):
-                        for email in row['Email'].split(';'):
-                            db.add_contact(channel_id, 'email', email.strip())
-                    if row.get('Instagram'):
-                        for ig in row['Instagram'].split(';'):
-                            db.add_contact(channel_id, 'instagram', ig.strip())
-                    if row.get('Twitter'):
-                        for tw in row['Twitter'].split(';'):
-                            db.add_contact(channel_id, 'twitter', tw.strip())
-                    if row.get('Facebook'):
-                        for fb in row['Facebook'].split(';'):
-                            db.add_contact(channel_id, 'facebook', fb.strip())
+                # Add contacts
+                for column, contact_type in [('Email', 'email'), ('Instagram', 'instagram'),
+                                             ('Twitter', 'twitter'), ('Facebook', 'facebook')]:
+                    if row.get(column):
+                        channel_data['contacts'] += [(contact_type, value.strip())
+                                                     for value in row[column].split(';')]
+                channels.append(channel_data)
+            
+            count = db.add_channels_bulk(channels)['saved']
                             
         print(f"✓ Imported {count} channels from creator_contacts.csv")
     except FileNotFoundError:
@@ -433,19 +983,19 @@ def import_existing_data(db: ChannelDatabase):
     try:
         with open('discovered_channels.csv', 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
-            count = 0
-            for row in reader:
-                channel_data = {
+            channels, rows = [], list(reader)
+            for row in rows:
+                channels.append({
                     'channel_id': row['Channel URL'].split('/')[-1],
                     'channel_name': row['Channel Name'],
                     'channel_url': row['Channel URL'],
                     'subscriber_count': int(row['Subscribers']) if row['Subscribers'].isdigit() else 0,
                     'category': 'discovered'
-                }
-                
-                if db.add_channel(channel_data):
-                    count += 1
-                    
+                })
+            
+            count = db.add_channels_bulk(channels)['saved']
+            
+            for row, channel_data in zip(rows, channels):
                 # Add sample video
                 if row.get('Sample Video URL'):
                     video_data = {
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Rate-Limit-Aware Claude Requests
+Reads Anthropic's rate-limit response headers to pace concurrent scoring
+requests, and retries 429 (rate limited) / 529 (overloaded) responses with
+exponential backoff + jitter, honouring retry-after. Also tallies token
+usage, including prompt-cache reads and writes.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import anthropic
+
+SCORING_CONCURRENCY = 4  # Parallel Claude scoring requests
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # Seconds
+BACKOFF_CAP = 60.0
+REQUEST_RESERVE = 1  # Keep this many requests in hand before pausing
+RETRYABLE_STATUS = {429, 529}
+
+# Prompt caching: prefixes shorter than this aren't cached (Sonnet/Opus minimum);
+# cache reads/writes are billed relative to the base input-token price
+PROMPT_CACHE_MIN_TOKENS = 1024
+CACHE_READ_PRICE = 0.1
+CACHE_WRITE_PRICE = 1.25
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """RFC 3339 reset timestamp -> epoch seconds"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class ClaudeRateLimitState:
+    """Shared view of the account's remaining request/token budget"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests_remaining = None
+        self.requests_reset = None
+        self.tokens_remaining = None
+        self.tokens_reset = None
+        self.blocked_until = 0.0
+        self.counters = {
+            'requests': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'overloaded': 0,
+            'paced_waits': 0,
+            'wait_seconds': 0.0,
+        }
+
+    def update_from_headers(self, headers):
+        """Record the budget reported on a response (requests + tokens per minute)"""
+        with self._lock:
+            self.requests_remaining = _parse_int(headers.get('anthropic-ratelimit-requests-remaining'))
+            self.requests_reset = _parse_reset(headers.get('anthropic-ratelimit-requests-reset'))
+
+            tokens = headers.get('anthropic-ratelimit-input-tokens-remaining') \
+                or headers.get('anthropic-ratelimit-tokens-remaining')
+            reset = headers.get('anthropic-ratelimit-input-tokens-reset') \
+                or headers.get('anthropic-ratelimit-tokens-reset')
+            self.tokens_remaining = _parse_int(tokens)
+            self.tokens_reset = _parse_reset(reset)
+
+    def block_for(self, seconds: float):
+        """Pause every caller (e.g. on retry-after)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+
+    def wait_for_budget(self, estimated_tokens: int) -> float:
+        """Sleep until this request fits the remaining budget; returns seconds waited"""
+        with self._lock:
+            now = time.time()
+            wait_until = self.blocked_until
+
+            if (self.requests_remaining is not None and self.requests_reset
+                    and self.requests_remaining <= REQUEST_RESERVE):
+                wait_until = max(wait_until, self.requests_reset)
+                self.requests_remaining = None  # Re-read from the next response
+
+            if (self.tokens_remaining is not None and self.tokens_reset
+                    and self.tokens_remaining < estimated_tokens):
+                wait_until = max(wait_until, self.tokens_reset)
+                self.tokens_remaining = None
+
+            wait = max(0.0, wait_until - now)
+            if wait:
+                self.blocked_until = wait_until  # Concurrent callers wait too
+                self.counters['paced_waits'] += 1
+                self.counters['wait_seconds'] += wait
+            self.counters['requests'] += 1
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'requests_remaining': self.requests_remaining,
+                'tokens_remaining': self.tokens_remaining,
+                **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.counters.items()},
+            }
+
+
+class TokenUsage:
+    """Input/output token totals, split into uncached, cache-write and cache-read input"""
+
+    FIELDS = ('input_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens', 'output_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {field: 0 for field in self.FIELDS}
+        self.totals['responses'] = 0
+
+    def record(self, usage):
+        if usage is None:
+            return
+        with self._lock:
+            for field in self.FIELDS:
+                self.totals[field] += getattr(usage, field, None) or 0
+            self.totals['responses'] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.totals)
+
+
+_state = ClaudeRateLimitState()
+_usage = TokenUsage()
+
+
+def get_rate_limit_state() -> ClaudeRateLimitState:
+    return _state
+
+
+def get_token_usage(since: Optional[Dict] = None) -> Dict:
+    """Token totals, optionally as the difference from an earlier snapshot"""
+    totals = _usage.snapshot()
+    if since:
+        totals = {k: v - since.get(k, 0) for k, v in totals.items()}
+    return totals
+
+
+def _retry_delay(error: anthropic.APIStatusError, attempt: int) -> float:
+    retry_after = error.response.headers.get('retry-after') if error.response is not None else None
+    try:
+        if retry_after is not None:
+            return float(retry_after) + random.uniform(0, 1)
+    except ValueError:
+        pass
+    return min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+def create_message(client: anthropic.Anthropic, **kwargs):
+    """
+    messages.create with header-driven pacing and 429/529 retries
+
+    The client should be built with max_retries=0 so retries aren't
+    stacked on top of the SDK's own.
+    """
+    prompt_text = ''.join(
+        m['content'] if isinstance(m['content'], str) else str(m['content'])
+        for m in kwargs.get('messages', [])
+    ) + str(kwargs.get('system', ''))
+    estimated = estimate_tokens(prompt_text)
+
+    for attempt in range(MAX_RETRIES + 1):
+        _state.wait_for_budget(estimated)
+        try:
+            raw = client.messages.with_raw_response.create(**kwargs)
+        except anthropic.APIStatusError as e:
+            if e.status_code not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+                raise
+
+            _state.count('rate_limited' if e.status_code == 429 else 'overloaded')
+            _state.count('retries')
+            if e.response is not None:
+                _state.update_from_headers(e.response.headers)
+
+            delay = _retry_delay(e, attempt)
+            if e.status_code == 429:
+                _state.block_for(delay)  # Everyone backs off, not just this caller
+            print(f"Claude API {e.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})")
+            time.sleep(delay)
+            continue
+
+        _state.update_from_headers(raw.headers)
+        message = raw.parse()
+        _usage.record(getattr(message, 'usage', None))
+        return message
+
+
+def format_rate_limit_report() -> str:
+    s = _state.stats()
+    return (f"Claude: {s['requests']} requests, {s['retries']} retries "
+            f"({s['rate_limited']} rate-limited, {s['overloaded']} overloaded), "
+            f"{s['paced_waits']} paced waits ({s['wait_seconds']}s)")
+
+
+def format_token_report(since: Optional[Dict] = None) -> str:
+    """Cached vs uncached input tokens and the resulting input-cost saving"""
+    u = get_token_usage(since)
+    uncached = u['input_tokens']
+    written = u['cache_creation_input_tokens']
+    read = u['cache_read_input_tokens']
+    total_input = uncached + written + read
+    if not total_input:
+        return "Claude tokens: none used"
+
+    billed = uncached + written * CACHE_WRITE_PRICE + read * CACHE_READ_PRICE
+    return (f"Claude tokens: {total_input:,} input ({read:,} cache read, {written:,} cache write, "
+            f"{uncached:,} uncached; {read / total_input:.0%} cached), {u['output_tokens']:,} output | "
+            f"input cost {1 - billed / total_input:.0%} lower than without caching")
@@ -10,18 +10,43 @@ import subprocess
 import requests
 import os
 import sys
-from typing import List, Dict, Generator
-from channel_database import ChannelDatabase
-import anthropic
-from enhanced_channel_extractor import get_enhanced_channel_data, analyze_title_patterns
-import concurrent.futures
-from functools import partial
+import time
+from typing import List, Dict, Generator, Optional
+from channel_database import ChannelDatabase, SEARCH_LIMIT
+from enhanced_channel_extractor import analyze_title_patterns
+from ytdlp_engine import extract_info, get_entries, get_engine_stats, format_latency_report
+from async_discovery import AsyncDiscoveryEngine, YOUTUBE_CONCURRENCY
+from streaming_pipeline import StreamingDiscoveryPipeline, iter_pipeline_events
+from claude_scoring import (
+    create_message, format_rate_limit_report, format_token_report, get_token_usage,
+    estimate_tokens, SCORING_CONCURRENCY, PROMPT_CACHE_MIN_TOKENS
+)
+from anthropic_clients import get_client, get_client_stats, format_client_report, ensure_pool_size
+from llm_cache import cached_completion, discard_completion, format_cache_report
+from scoring_prompts import build_scoring_system_prompt, build_channel_prompt, parse_analysis_response
+from packed_scoring import PackedScorer
+from cascade_scoring import CascadeScorer, CASCADE_BAND
+from semantic_prefilter import SemanticPrefilter, SIMILARITY_THRESHOLD
+from relevance_ranker import RelevanceRanker, SKIP_SCORE, WEIGHTS_FILE as RANKER_WEIGHTS_FILE
+from query_novelty import QueryNoveltyFilter
+from query_bandit import QueryBandit, load_query_history, top_yield_queries
+from ollama_client import (
+    ANALYSIS_SCHEMA, generate_structured, format_parse_report, get_parse_stats,
+    get_ollama_client, format_ollama_report
+)
+from ollama_channel_analyzer import (
+    check_ollama_available,
+    DEFAULT_MODEL as OLLAMA_SCORING_MODEL,
+    OLLAMA_TEMPERATURE,
+)
 
 app = Flask(__name__)
 
 # Claude API Configuration
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY', '')
 DEFAULT_MODEL = "claude-sonnet-4-20250514"
+CHEAP_CLAUDE_MODEL = "claude-3-5-haiku-20241022"  # First-pass tier for cascaded scoring
+CLAUDE_TEMPERATURE = 0.8
 
 # Session State - Track what we've already processed
 SESSION_STATE = {
@@ -30,26 +55,44 @@ SESSION_STATE = {
     'analyzed_channels': set()  # Channel IDs we've already analyzed
 }
 
+# Shared by the /search_channels request threads (each thread gets its own connection)
+SEARCH_DB: Optional[ChannelDatabase] = None
+
 # Import workflow functions
 sys.path.insert(0, os.path.dirname(__file__))
 
-def generate_with_claude(prompt: str, model: str = DEFAULT_MODEL) -> str:
-    """Generate text using Claude API"""
+def generate_with_claude(prompt: str, model: str = DEFAULT_MODEL, use_cache: bool = True,
+                         system: Optional[str] = None) -> str:
+    """
+    Generate text using Claude API (identical prompts are answered from the LLM cache)
+
+    A system prompt is sent with cache_control so Anthropic caches it as a
+    prefix across calls that share it.
+    """
+    extra = {'system': system} if system else None
+    return cached_completion('anthropic', model, CLAUDE_TEMPERATURE, prompt,
+                             lambda: _call_claude(prompt, model, system), use_cache, extra)
+
+def _call_claude(prompt: str, model: str, system: Optional[str] = None) -> str:
     try:
-        # Create client with explicit configuration
-        client = anthropic.Anthropic(
-            api_key=ANTHROPIC_API_KEY,
-            max_retries=2,
-            timeout=60.0
-        )
+        # Shared pooled client (keep-alive connections; retries handled by create_message)
+        client = get_client(ANTHROPIC_API_KEY, model)
         
-        message = client.messages.create(
+        kwargs = {}
+        if system:
+            kwargs['system'] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        
+        message = create_message(
+            client,
             model=model,
             max_tokens=2048,
-            temperature=0.8,
+            temperature=CLAUDE_TEMPERATURE,
             messages=[
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            **kwargs
         )
         
         return message.content[0].text
@@ -60,14 +103,17 @@ def generate_with_claude(prompt: str, model: str = DEFAULT_MODEL) -> str:
     
     return ""
 
-def generate_search_queries(product_context: str, target_direction: str, num_queries: int, model: str = DEFAULT_MODEL) -> List[str]:
-    """Generate search queries using Claude with custom context"""
+def generate_search_queries(product_context: str, target_direction: str, num_queries: int, model: str = DEFAULT_MODEL,
+                            seed_queries: Optional[List[str]] = None) -> List[str]:
+    """Generate search queries using Claude with custom context (seeded with past high-yield queries)"""
     
     # Get list of already-used queries
     used_queries_list = list(SESSION_STATE['used_queries'])
     used_queries_text = ""
     if used_queries_list:
         used_queries_text = f"\n\nQUERIES ALREADY USED (DO NOT REPEAT THESE):\n" + "\n".join(f"- {q}" for q in used_queries_list[:20])
+    if seed_queries:
+        used_queries_text += f"\n\nPAST QUERIES THAT FOUND THE MOST RELEVANT CHANNELS (write new queries in the same spirit, do not repeat them):\n" + "\n".join(f"- {q}" for q in seed_queries)
     
     prompt = f"""You are an expert at finding YouTube channels whose AUDIENCES would be interested in buying a product.
 
@@ -137,47 +183,33 @@ Generate {num_queries} NEW search queries about AUDIENCE INTERESTS now:"""
 def search_youtube(query: str, max_results: int = 5) -> List[str]:
     """Search YouTube and return video URLs"""
     try:
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--get-id',
-            '--flat-playlist',
-            f'ytsearch{max_results}:{query}'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            video_ids = result.stdout.strip().split('\n')
-            return [f'https://www.youtube.com/watch?v={vid_id}' for vid_id in video_ids if vid_id]
-    except:
-        pass
+        data = extract_info(f'ytsearch{max_results}:{query}', 'search')
+        video_ids = [entry.get('id') for entry in get_entries(data)]
+        return [f'https://www.youtube.com/watch?v={vid_id}' for vid_id in video_ids if vid_id]
+    except Exception as e:
+        print(f"Error searching YouTube for '{query}': {e}")
     
     return []
 
 def get_channel_info(video_url: str) -> Dict:
     """Get channel info from video"""
     try:
-        cmd = ['yt-dlp', '--skip-download', '--dump-json', video_url]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        data = extract_info(video_url, 'video')
         
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            
-            # Get subscriber count, ensure it's an integer (not None)
-            sub_count = data.get('channel_follower_count')
-            if sub_count is None:
-                sub_count = 0
-            
-            return {
-                'channel_id': data.get('channel_id', ''),
-                'channel_name': data.get('uploader', 'Unknown Channel'),
-                'channel_url': data.get('channel_url', ''),
-                'subscriber_count': int(sub_count),
-                'description': data.get('description', '')[:1000],
-                'video_title': data.get('title', ''),
-                'video_url': video_url
-            }
+        # Get subscriber count, ensure it's an integer (not None)
+        sub_count = data.get('channel_follower_count')
+        if sub_count is None:
+            sub_count = 0
+        
+        return {
+            'channel_id': data.get('channel_id', ''),
+            'channel_name': data.get('uploader', 'Unknown Channel'),
+            'channel_url': data.get('channel_url', ''),
+            'subscriber_count': int(sub_count),
+            'description': data.get('description', '')[:1000],
+            'video_title': data.get('title', ''),
+            'video_url': video_url
+        }
     except Exception as e:
         print(f"Error getting channel info: {e}")
     
@@ -205,7 +237,7 @@ def quick_filter_channel(channel_data: Dict, product_context: str) -> tuple[bool
     # 3. Wrong language indicators (if description is very short or non-English heavy)
     if description and len(description) > 100:
         # Simple heuristic: if description has lots of non-ASCII, might be foreign
-        non_ascii_ratio = sum(1 for c in description[:500] if ord(c) > 127) / min(len(description[:500]), 1)
+        non_ascii_ratio = sum(1 for c in description[:500] if ord(c) > 127) / max(len(description[:500]), 1)
         if non_ascii_ratio > 0.3:
             return False, "Likely non-English content"
     
@@ -309,153 +341,68 @@ def is_ai_content_farm(channel_data: Dict) -> tuple[bool, str]:
     
     return False, "Real creator"
 
-def analyze_channel_with_claude(channel_data: Dict, product_context: str, model: str = DEFAULT_MODEL) -> Dict:
+def analyze_channel_with_claude(channel_data: Dict, product_context: str, model: str = DEFAULT_MODEL,
+                                use_cache: bool = True) -> Dict:
     """Analyze channel relevance using Claude API with enhanced metrics"""
     
-    channel_name = channel_data.get('channel_name', 'Unknown')
-    description = channel_data.get('description', '')[:800]
-    channel_description = channel_data.get('channel_description', '')[:800]
-    subs = channel_data.get('subscriber_count', 0)
-    
-    # Enhanced metrics
-    avg_views = channel_data.get('avg_views_per_video')
-    engagement_rate = channel_data.get('engagement_rate')
-    view_rate = channel_data.get('view_rate')
-    upload_freq = channel_data.get('upload_frequency')
-    consistency = channel_data.get('consistency_score')
-    growth = channel_data.get('growth_trend')
-    viral_count = channel_data.get('recent_viral_count')
-    has_email = bool(channel_data.get('business_email'))
-    has_store = bool(channel_data.get('has_affiliate_store'))
-    has_patreon = bool(channel_data.get('has_patreon'))
-    
-    # Build enhanced metrics section
-    enhanced_metrics_text = ""
-    if avg_views is not None:
-        enhanced_metrics_text += f"\nAverage Views per Video: {avg_views:,}"
-    if view_rate is not None:
-        enhanced_metrics_text += f"\nView Rate: {view_rate:.1f}% (views/subscribers)"
-    if engagement_rate is not None:
-        enhanced_metrics_text += f"\nEngagement Rate: {engagement_rate}% (likes+comments/views)"
-    if upload_freq is not None:
-        enhanced_metrics_text += f"\nUpload Frequency: {upload_freq:.1f} videos/week"
-    if consistency is not None:
-        enhanced_metrics_text += f"\nConsistency Score: {consistency:.2f}/1.0"
-    if growth:
-        enhanced_metrics_text += f"\nGrowth Trend: {growth}"
-    if viral_count:
-        enhanced_metrics_text += f"\nRecent Viral Videos: {viral_count}"
-    if has_email:
-        enhanced_metrics_text += "\n✓ Has Business Email"
-    if has_store:
-        enhanced_metrics_text += "\n✓ Has Affiliate Store/Merch"
-    if has_patreon:
-        enhanced_metrics_text += "\n✓ Has Patreon (monetizing audience)"
-    
-    full_description = channel_description if channel_description else description
-    
-    prompt = f"""Analyze if this YouTube channel's AUDIENCE would be interested in buying this product.
-
-OUR PRODUCT (what we're selling):
-{product_context}
-
-YOUTUBE CHANNEL TO EVALUATE:
-Name: {channel_name}
-Subscribers: {subs:,}
-Description: {full_description if full_description else 'No description available'}
-{enhanced_metrics_text}
-
-CRITICAL EVALUATION CRITERIA:
-
-1. AUDIENCE RESONANCE (0-10):
-   - Would their specific viewers actually BUY this product?
-   - Does their audience demographic match our target buyer?
-   - Would their viewers see clear value in owning this?
-   - Is there a direct problem-solution fit?
-
-2. CONTENT ALIGNMENT (0-10):
-   - Does their content naturally relate to our product's purpose?
-   - Do they create content where this product would be mentioned?
-   - Would featuring this product feel native to their content?
-   - Is the lifestyle/niche an authentic match?
-
-3. ENGAGEMENT POTENTIAL (0-10):
-   Consider channel engagement indicators:
-   - Content quality and production value
-   - Authenticity and trust with audience
-   - History of product mentions or sponsorships
-   - Community interaction level
-   - Likelihood of creating compelling product content
-   - Estimated conversion potential (will viewers actually buy?)
-   - Creator's credibility in recommending products
-   - Audience's trust in creator's recommendations
-   
-   USE ENHANCED METRICS WHEN AVAILABLE:
-   - Engagement Rate >5% = High trust community (score +2)
-   - View Rate >30% = Real engaged audience (score +1)
-   - Growing trend = Rising star, get in early (score +1)
-   - Has business email = Professional, responds (score +1)
-   - Has Patreon/Store = Audience already buys (score +2)
-   - Consistent uploads (>0.8) = Reliable partner (score +1)
-   - Recent virals = Bonus reach potential (score +1)
-
-AVOID HIGH SCORES FOR:
-- Competitors or similar product sellers
-- Generic review/unboxing channels (low conversion)
-- Misaligned demographics (wrong age/interests)
-- Entertainment-only channels (viewers not buyers)
-- Channels with low audience trust
-
-PRIORITIZE HIGH SCORES FOR:
-- Lifestyle match (audience lives this way)
-- Educational content creators (high trust)
-- Community builders (loyal audiences)
-- Niche experts (authority in space)
-- Authentic product users (not just reviewers)
-
-Rate 0-10 (be highly selective):
-- Most channels: 2-5 (not a good fit)
-- Decent channels: 6-7 (possible fit)
-- Great channels: 8-9 (strong fit)
-- Perfect channels: 10 (rare, ideal match)
-
-Respond with ONLY this JSON:
-{{
-  "relevance_score": X,
-  "audience_match_score": X,
-  "engagement_score": X,
-  "overall_score": X,
-  "priority": "low|medium|high",
-  "relevant": true|false,
-  "reason": "Specific reason why their audience would/wouldn't buy this product",
-  "pitch": "Specific pitch angle: how to present this product to THIS creator's unique audience",
-  "engagement_notes": "Expected engagement level and conversion potential"
-}}"""
+    system_prompt = build_scoring_system_prompt(product_context)
+    prompt = build_channel_prompt(channel_data)
 
-    response = generate_with_claude(prompt, model)
+    response = generate_with_claude(prompt, model, use_cache, system=system_prompt)
     
     if not response:
         return {"relevant": False, "reason": "Analysis failed"}
     
-    try:
-        start = response.find('{')
-        end = response.rfind('}') + 1
-        
-        if start >= 0 and end > start:
-            json_str = response[start:end]
-            analysis = json.loads(json_str)
-            
-            if 'relevant' in analysis:
-                return analysis
-    except:
-        pass
+    analysis = parse_analysis_response(response)
+    if analysis:
+        return analysis
+    
+    discard_completion('anthropic', model, CLAUDE_TEMPERATURE, prompt, {'system': system_prompt})
+    return {"relevant": False, "reason": "Could not parse analysis"}
+
+def analyze_channel_with_cheap_model(channel_data: Dict, product_context: str, tier: str,
+                                    use_cache: bool = True) -> Dict:
+    """First-pass score from the cheap cascade tier ('ollama' or 'haiku'), same rubric as Claude"""
+    system_prompt = build_scoring_system_prompt(product_context)
+    prompt = build_channel_prompt(channel_data)
     
+    if tier == 'ollama':
+        result = generate_structured(f"{system_prompt}\n\n{prompt}", ANALYSIS_SCHEMA,
+                                     OLLAMA_SCORING_MODEL, OLLAMA_TEMPERATURE, use_cache)
+        return result.data if result.ok else {"relevant": False, "reason": "Could not parse analysis"}
+    
+    response = generate_with_claude(prompt, CHEAP_CLAUDE_MODEL, use_cache, system=system_prompt)
+    analysis = parse_analysis_response(response)
+    if analysis:
+        return analysis
+    
+    if response:
+        discard_completion('anthropic', CHEAP_CLAUDE_MODEL, CLAUDE_TEMPERATURE, prompt, {'system': system_prompt})
     return {"relevant": False, "reason": "Could not parse analysis"}
 
+def generate_packed_with_cheap_model(system_prompt: str, prompt: str, tier: str, use_cache: bool = True) -> str:
+    """Raw packed-scoring response from the cheap cascade tier ('ollama' or 'haiku')"""
+    if tier == 'ollama':
+        full_prompt = f"{system_prompt}\n\n{prompt}"
+        options = {"temperature": OLLAMA_TEMPERATURE}
+        return cached_completion('ollama', OLLAMA_SCORING_MODEL, OLLAMA_TEMPERATURE, full_prompt,
+                                 lambda: get_ollama_client().generate(full_prompt, OLLAMA_SCORING_MODEL, options),
+                                 use_cache)
+    return generate_with_claude(prompt, CHEAP_CLAUDE_MODEL, use_cache, system=system_prompt)
+
 def workflow_generator(product_context: str, target_direction: str, num_queries: int, results_per_query: int, 
-                      min_subscribers: int = 0, max_subscribers: int = 100000000) -> Generator:
+                      min_subscribers: int = 0, max_subscribers: int = 100000000,
+                      scoring_concurrency: int = SCORING_CONCURRENCY, force_rescore: bool = False,
+                      pack_size: int = 1, cascade: str = 'off',
+                      cascade_band: tuple = CASCADE_BAND, semantic_filter: bool = False,
+                      semantic_threshold: float = SIMILARITY_THRESHOLD, ranker_skip: bool = False,
+                      ranker_skip_below: float = SKIP_SCORE, query_novelty: bool = True,
+                      query_bandit: bool = False) -> Generator:
     """Execute workflow and yield progress updates"""
     
+    # Scoring runs scoring_concurrency requests at once; the HTTP pool must not be the cap
+    ensure_pool_size(scoring_concurrency)
+    
     # Check Claude API
     try:
         # Just verify API key exists, don't create client yet
@@ -471,7 +418,26 @@ def workflow_generator(product_context: str, target_direction: str, num_queries:
     yield {'type': 'status', 'message': 'Generating search queries with AI...'}
     yield {'type': 'log', 'message': '🤖 Step 1: AI-generating search queries...', 'logType': 'info'}
     
-    queries = generate_search_queries(product_context, target_direction, num_queries)
+    seed_queries = top_yield_queries()
+    if seed_queries:
+        yield {'type': 'log', 'message': f'  🌱 Seeding with {len(seed_queries)} highest-yield past queries', 'logType': 'info'}
+    queries = generate_search_queries(product_context, target_direction, num_queries, seed_queries=seed_queries)
+    
+    # Drop rephrasings of queries already searched (this session or any earlier run)
+    novelty = QueryNoveltyFilter() if query_novelty else None
+    if novelty and queries:
+        queries, rejected = novelty.filter(queries, extra_history=SESSION_STATE['used_queries'])
+        if rejected and len(queries) < num_queries:
+            # Rejected phrasings go into the prompt's "already used" list for one top-up round
+            for r in rejected:
+                SESSION_STATE['used_queries'].add(r['query'].lower())
+            extra = generate_search_queries(product_context, target_direction, num_queries - len(queries),
+                                            seed_queries=seed_queries)
+            extra, _ = novelty.filter(extra, extra_history=SESSION_STATE['used_queries'] | {q.lower() for q in queries})
+            queries += extra
+        for r in novelty.rejected:
+            yield {'type': 'log', 'message': f'  ♻️ Skipped "{r["query"]}" ≈ "{r["match"]}" ({r["method"]} {r["similarity"]:.2f})', 'logType': 'info'}
+        novelty.remember(queries, 'control_panel')
     
     if not queries:
         yield {'type': 'log', 'message': '❌ Failed to generate queries', 'logType': 'error'}
@@ -493,165 +459,190 @@ def workflow_generator(product_context: str, target_direction: str, num_queries:
     if total_queries_this_session > len(queries):
         yield {'type': 'log', 'message': f'  ℹ️ Total unique queries this session: {total_queries_this_session}', 'logType': 'info'}
     
-    # Step 2: Search YouTube (Parallel)
-    yield {'type': 'status', 'message': 'Searching YouTube in parallel...'}
-    yield {'type': 'log', 'message': '\n🔍 Step 2: Searching YouTube (parallel)...', 'logType': 'info'}
-    
-    all_channels = {}
-    
-    # Parallelize YouTube searches
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        search_func = partial(search_youtube, max_results=results_per_query)
-        search_results = list(executor.map(search_func, queries))
+    # Steps 2-5 stream: search → channel info → prefilter → enrich → farm filter → save → score
+    yield {'type': 'status', 'message': 'Discovering and analyzing channels (streaming)...'}
+    yield {'type': 'log', 'message': f'\n🔍 Step 2: Streaming discovery → enrichment → farm filter → save → Claude analysis ({YOUTUBE_CONCURRENCY} concurrent YouTube requests, {scoring_concurrency} concurrent Claude requests)...', 'logType': 'info'}
     
-    # Collect all video URLs with their source queries
-    all_video_urls = []
-    for query, video_urls in zip(queries, search_results):
-        yield {'type': 'log', 'message': f'  ✓ "{query}" - found {len(video_urls)} videos', 'logType': 'info'}
-        all_video_urls.extend(video_urls)
+    def accept_channel(channel_info: Dict) -> tuple[bool, str]:
+        """Cheap checks before spending requests on enrichment"""
+        subs = channel_info.get('subscriber_count', 0) or 0  # Handle None
+        
+        # Skip if subscriber count is unavailable
+        if subs == 0:
+            return False, 'subscriber count hidden'
+        
+        # Check if already discovered in this session
+        if channel_info['channel_id'] in SESSION_STATE['discovered_channels']:
+            return False, 'already discovered this session'
+        
+        # Apply subscriber count filter
+        if subs < min_subscribers or subs > max_subscribers:
+            return False, f'{subs:,} subs - outside range'
+        
+        # Heuristic pre-filter (instant, no API cost)
+        passed, reason = quick_filter_channel(channel_info, product_context)
+        if not passed:
+            return False, reason
+        
+        SESSION_STATE['discovered_channels'].add(channel_info['channel_id'])
+        return True, ''
+    
+    def needs_scoring(channel_data: Dict) -> bool:
+        """Deduplicate channels already analyzed this session"""
+        return channel_data['channel_id'] not in SESSION_STATE['analyzed_channels']
+    
+    def score_with_claude(channel_data: Dict) -> Dict:
+        return analyze_channel_with_claude(channel_data, product_context, use_cache=not force_rescore)
+    
+    # Embedding similarity gate: channels far from the product never reach an LLM
+    prefilter = None
+    if semantic_filter:
+        prefilter = SemanticPrefilter(product_context, target_direction, threshold=semantic_threshold)
+        if check_ollama_available() and prefilter.target_vector() is not None:
+            yield {'type': 'log', 'message': f'  🧭 Semantic prefilter: {prefilter.model}, similarity threshold {semantic_threshold:.2f}', 'logType': 'info'}
+        else:
+            prefilter = None
+            yield {'type': 'log', 'message': '  ⚠️ Ollama embeddings unavailable, semantic prefilter disabled', 'logType': 'error'}
+    
+    # Learned ranker trained on past verdicts: skip channels predicted to score very low
+    ranker = None
+    if ranker_skip:
+        ranker = RelevanceRanker.load()
+        if ranker:
+            yield {'type': 'log', 'message': f'  📈 Relevance ranker ({ranker.meta.get("trained_on", 0):,} training channels): skipping predicted scores below {ranker_skip_below}', 'logType': 'info'}
+        else:
+            yield {'type': 'log', 'message': f'  ⚠️ No ranker weights in {RANKER_WEIGHTS_FILE} (run relevance_ranker.py train), ranker disabled', 'logType': 'error'}
+    
+    def score_filter(channels: List[Dict]) -> List[tuple[bool, str]]:
+        """Cheap local gates in front of the LLM (ranker first: no network call)"""
+        verdicts = ranker.check_many(channels, ranker_skip_below) if ranker else [(True, '')] * len(channels)
+        if prefilter:
+            # Only channels the ranker kept are embedded, in one batch
+            kept = [i for i, (keep, _) in enumerate(verdicts) if keep]
+            for i, verdict in zip(kept, prefilter.check_many([channels[i] for i in kept])):
+                verdicts[i] = verdict
+        return verdicts
+    
+    # Cascade: cheap model scores everything, only the uncertainty band reaches DEFAULT_MODEL
+    cascade_scorer = None
+    if cascade == 'ollama' and not check_ollama_available():
+        yield {'type': 'log', 'message': '  ⚠️ Ollama not running, scoring everything with Claude', 'logType': 'error'}
+    elif cascade in ('ollama', 'haiku'):
+        if cascade == 'ollama':
+            load_seconds = get_ollama_client().warmup(OLLAMA_SCORING_MODEL)
+            if load_seconds is not None:
+                yield {'type': 'log', 'message': f'  🔥 {OLLAMA_SCORING_MODEL} loaded in {load_seconds:.1f}s and pinned for this run', 'logType': 'info'}
+        scoring_prefix = build_scoring_system_prompt(product_context)
+        cascade_scorer = CascadeScorer(
+            cheap_score=lambda c: analyze_channel_with_cheap_model(c, product_context, cascade, not force_rescore),
+            strong_score=score_with_claude,
+            cheap_model=OLLAMA_SCORING_MODEL if cascade == 'ollama' else CHEAP_CLAUDE_MODEL,
+            strong_model=DEFAULT_MODEL,
+            prompt_text=lambda c: scoring_prefix + build_channel_prompt(c),
+            band=cascade_band,
+        )
+        yield {'type': 'log', 'message': f'  🪜 Cascaded scoring: {cascade_scorer.cheap_model} first, {DEFAULT_MODEL} for scores {cascade_band[0]}-{cascade_band[1]}', 'logType': 'info'}
     
-    yield {'type': 'log', 'message': f'  Extracting channel info (parallel)...', 'logType': 'info'}
+    def score_channel(channel_data: Dict) -> Dict:
+        if cascade_scorer:
+            analysis = cascade_scorer.score(channel_data)
+        else:
+            analysis = score_with_claude(channel_data)
+        SESSION_STATE['analyzed_channels'].add(channel_data['channel_id'])
+        return analysis
+    
+    # Packed mode: several channels per call, single-channel fallback for bad entries.
+    # With a cascade the packs go to the cheap model and each channel is escalated on its own.
+    if cascade_scorer:
+        packer = PackedScorer(
+            generate=lambda system, prompt: generate_packed_with_cheap_model(system, prompt, cascade, not force_rescore),
+            system_prompt=build_scoring_system_prompt(product_context, packed=True),
+            score_single=lambda c: analyze_channel_with_cheap_model(c, product_context, cascade, not force_rescore),
+            pack_size=pack_size,
+        )
+    else:
+        packer = PackedScorer(
+            generate=lambda system, prompt: generate_with_claude(prompt, DEFAULT_MODEL, not force_rescore, system=system),
+            system_prompt=build_scoring_system_prompt(product_context, packed=True),
+            score_single=score_channel,
+            pack_size=pack_size,
+        )
     
-    # Parallelize channel info extraction
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        channel_infos = list(executor.map(get_channel_info, all_video_urls))
+    def score_pack(channels: List[Dict]) -> Dict[str, Dict]:
+        start = time.perf_counter()
+        analyses = packer.score_channels(channels)
+        if cascade_scorer:
+            share = (time.perf_counter() - start) / len(channels)
+            for channel in channels:
+                cheap = analyses[channel['channel_id']]
+                cascade_scorer.record_cheap(channel, cheap, share)
+                analyses[channel['channel_id']] = cascade_scorer.escalate(channel, cheap)
+        for channel_id in analyses:
+            SESSION_STATE['analyzed_channels'].add(channel_id)
+        return analyses
+    
+    if cascade_scorer and pack_size > 1:
+        yield {'type': 'log', 'message': f'  📦 Packs of up to {pack_size} channels go to {cascade_scorer.cheap_model}; borderline channels are escalated to {DEFAULT_MODEL} one by one', 'logType': 'info'}
+    
+    # Rubric + product context are sent as a cached prefix; check it's long enough to be cached
+    prefix_tokens = estimate_tokens(build_scoring_system_prompt(product_context))
+    if prefix_tokens < PROMPT_CACHE_MIN_TOKENS:
+        yield {'type': 'log', 'message': f'  ℹ️ Scoring prefix is ~{prefix_tokens} tokens; Anthropic only caches prefixes of {PROMPT_CACHE_MIN_TOKENS}+ tokens', 'logType': 'info'}
+    usage_before = get_token_usage()
+    
+    # Bandit: search deeper on queries whose channels pay off, drop the rest
+    bandit = None
+    if query_bandit:
+        bandit = QueryBandit(results_per_query, history=load_query_history())
+        yield {'type': 'log', 'message': f'  🎰 Query bandit: up to {len(queries)} deeper searches (ytsearch up to {bandit.max_depth})', 'logType': 'info'}
+    
+    engine = AsyncDiscoveryEngine(search_youtube, get_channel_info)
+    pipeline = StreamingDiscoveryPipeline(
+        engine, results_per_query,
+        accept_channel=accept_channel,
+        farm_filter=is_ai_content_farm,
+        needs_scoring=needs_scoring,
+        score_channel=score_channel,
+        scoring_model=DEFAULT_MODEL,
+        score_pack=score_pack if pack_size > 1 else None,
+        score_pack_size=pack_size,
+        score_filter=score_filter if (prefilter or ranker) else None,
+        bandit=bandit,
+        stage_workers={'score': max(1, scoring_concurrency)},
+    )
     
-    # Process channel infos
-    for url, channel_info in zip(all_video_urls, channel_infos):
-        if channel_info:
-            channel_id = channel_info['channel_id']
-            subs = channel_info.get('subscriber_count', 0) or 0  # Handle None
-            channel_name = channel_info['channel_name']
-            
-            # Skip if subscriber count is unavailable
-            if subs == 0:
-                yield {'type': 'log', 'message': f'    ⏭️ {channel_name} (subscriber count hidden)', 'logType': 'info'}
-                continue
-            
-            # Check if already discovered in this session
-            if channel_id in SESSION_STATE['discovered_channels']:
-                yield {'type': 'log', 'message': f'    ⏭️ {channel_name} (already discovered this session)', 'logType': 'info'}
-                continue
-            
-            # Apply subscriber count filter
-            if subs < min_subscribers or subs > max_subscribers:
-                yield {'type': 'log', 'message': f'    ⏭️ {channel_name} ({subs:,} subs - outside range)', 'logType': 'info'}
-                continue
-            
-            if channel_id not in all_channels:
-                # Extract enhanced data (Tier 1 metrics)
-                yield {'type': 'log', 'message': f'    ✓ {channel_name} ({subs:,} subs) - extracting enhanced data...', 'logType': 'success'}
-                
-                try:
-                    enhanced_data = get_enhanced_channel_data(channel_info['channel_url'], channel_info)
-                    all_channels[channel_id] = enhanced_data
-                except Exception as e:
-                    yield {'type': 'log', 'message': f'      ⚠️ Enhanced extraction failed, using basic data', 'logType': 'info'}
-                    all_channels[channel_id] = channel_info
-                
-                SESSION_STATE['discovered_channels'].add(channel_id)
-                yield {'type': 'status', 'channels': len(all_channels)}
-    
-    yield {'type': 'log', 'message': f'\n✓ Found {len(all_channels)} unique channels', 'logType': 'success'}
-    
-    if not all_channels:
+    try:
+        yield from iter_pipeline_events(pipeline, queries)
+    finally:
+        engine.close()
+        if cascade_scorer and cascade == 'ollama':
+            get_ollama_client().release(OLLAMA_SCORING_MODEL)  # Back to Ollama's normal unload timer
+    
+    counts = pipeline.counts
+    results = pipeline.results
+    discovered = counts['enriched'] + counts['enrich_failed']
+    
+    yield {'type': 'log', 'message': f'\n✓ Found {discovered} unique channels', 'logType': 'success'}
+    yield {'type': 'log', 'message': f'✓ Filtered {counts["farms"]} AI farms, saved {counts["saved"]} real creators', 'logType': 'success'}
+    if counts['already_analyzed'] > 0:
+        yield {'type': 'log', 'message': f'  ℹ️ Skipped {counts["already_analyzed"]} already-analyzed channels', 'logType': 'info'}
+    if prefilter or ranker:
+        yield {'type': 'log', 'message': f'  🧭 Ranker/semantic prefilter skipped {counts["score_filtered"]} channels before the LLM', 'logType': 'info'}
+    yield {'type': 'log', 'message': f'  ⏱️ {pipeline.timing_summary()}', 'logType': 'info'}
+    yield {'type': 'log', 'message': f'  🗄️ {pipeline.persist_summary()}', 'logType': 'info'}
+    
+    if not discovered:
         yield {'type': 'log', 'message': '❌ No channels found', 'logType': 'error'}
         yield {'type': 'error', 'message': 'No channels found'}
         return
     
-    # Step 3: Filter AI Content Farms
-    yield {'type': 'status', 'message': 'Filtering AI content farms...'}
-    yield {'type': 'log', 'message': '\n🤖 Step 3: Filtering AI content farms...', 'logType': 'info'}
-    
-    real_creators = {}
-    ai_farm_count = 0
-    
-    for channel_id, channel in all_channels.items():
-        is_farm, reason = is_ai_content_farm(channel)
-        if is_farm:
-            ai_farm_count += 1
-            yield {'type': 'log', 'message': f'    ⏭️ {channel["channel_name"]} - {reason}', 'logType': 'info'}
-        else:
-            real_creators[channel_id] = channel
-    
-    yield {'type': 'log', 'message': f'✓ Filtered {ai_farm_count} AI farms, kept {len(real_creators)} real creators', 'logType': 'success'}
-    
-    if not real_creators:
+    if counts['farms'] == discovered:
         yield {'type': 'log', 'message': '❌ No real creators found after filtering', 'logType': 'error'}
         yield {'type': 'error', 'message': 'All channels filtered as AI farms'}
         return
     
-    # Update all_channels to only include real creators
-    all_channels = real_creators
-    
-    # Step 4: Save to database
-    yield {'type': 'status', 'message': 'Saving to database...'}
-    yield {'type': 'log', 'message': '\n💾 Step 4: Saving to database...', 'logType': 'info'}
-    
-    db = ChannelDatabase()
-    db.connect()
-    
-    for channel_id, channel_data in all_channels.items():
-        channel_data['category'] = 'ai_discovered'
-        db.add_channel(channel_data)
-    
-    db.close()
-    
-    yield {'type': 'log', 'message': '✓ Channels saved', 'logType': 'success'}
-    
-    # Filter out already-analyzed channels (deduplication)
-    channels_to_analyze = {
-        ch_id: ch_data for ch_id, ch_data in all_channels.items()
-        if ch_id not in SESSION_STATE['analyzed_channels']
-    }
-    
-    already_analyzed_count = len(all_channels) - len(channels_to_analyze)
-    if already_analyzed_count > 0:
-        yield {'type': 'log', 'message': f'  ℹ️ Skipping {already_analyzed_count} already-analyzed channels', 'logType': 'info'}
-    
-    if not channels_to_analyze:
-        yield {'type': 'log', 'message': '  ⚠️ All channels already analyzed this session', 'logType': 'info'}
-        yield {'type': 'complete', 'results': []}
-        return
-    
-    # Step 5: Deep AI Analysis (expensive, only on filtered channels)
-    yield {'type': 'status', 'message': 'Deep AI analysis with Claude...'}
-    yield {'type': 'log', 'message': f'\n🤖 Step 5: Deep AI analysis ({len(channels_to_analyze)} NEW channels)...', 'logType': 'info'}
-    yield {'type': 'log', 'message': f'⏳ Estimated time: ~{len(channels_to_analyze) * 3} seconds', 'logType': 'info'}
-    
-    results = []
-    analyzed = 0
-    
-    for i, (channel_id, channel_data) in enumerate(channels_to_analyze.items(), 1):
-        yield {'type': 'log', 'message': f'  [{i}/{len(channels_to_analyze)}] Analyzing {channel_data["channel_name"]}...', 'logType': 'info'}
-        
-        analysis = analyze_channel_with_claude(channel_data, product_context)
-        
-        # Mark as analyzed
-        SESSION_STATE['analyzed_channels'].add(channel_id)
-        
-        result = {
-            'channel_id': channel_id,
-            'channel_name': channel_data['channel_name'],
-            'channel_url': channel_data['channel_url'],
-            'subscriber_count': channel_data['subscriber_count'],
-            'analysis': analysis
-        }
-        
-        results.append(result)
-        analyzed += 1
-        
-        score = analysis.get('overall_score', 0)
-        relevant = "✓" if analysis.get('relevant', False) else "✗"
-        
-        yield {'type': 'log', 'message': f'    {relevant} Score: {score}/10', 'logType': 'success' if analysis.get('relevant') else 'info'}
-        yield {'type': 'status', 'analyzed': analyzed}
-        
-        if analysis.get('relevant', False):
-            yield {'type': 'status', 'relevant': len([r for r in results if r['analysis'].get('relevant', False)])}
-    
     # Complete
-    relevant_count = len([r for r in results if r['analysis'].get('relevant', False)])
+    relevant_count = counts['relevant']
     
     yield {'type': 'log', 'message': f'\n🎉 Workflow complete!', 'logType': 'success'}
     yield {'type': 'log', 'message': f'  This run: {len(results)} analyzed | {relevant_count} relevant', 'logType': 'info'}
@@ -661,6 +652,33 @@ def workflow_generator(product_context: str, target_direction: str, num_queries:
     yield {'type': 'log', 'message': f'  • Total unique queries used: {len(SESSION_STATE["used_queries"])}', 'logType': 'info'}
     yield {'type': 'log', 'message': f'  • Total channels discovered: {len(SESSION_STATE["discovered_channels"])}', 'logType': 'info'}
     yield {'type': 'log', 'message': f'  • Total channels analyzed: {len(SESSION_STATE["analyzed_channels"])}', 'logType': 'info'}
+    if novelty:
+        for line in novelty.summary_lines(results_per_query):
+            yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
+    if bandit:
+        for line in bandit.summary_lines():
+            yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
+    
+    # Extraction latency (in-process yt-dlp engine)
+    for line in format_latency_report():
+        yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
+    yield {'type': 'log', 'message': f'  {format_rate_limit_report()}', 'logType': 'info'}
+    yield {'type': 'log', 'message': f'  {format_token_report(since=usage_before)}', 'logType': 'info'}
+    for line in format_client_report():
+        yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
+    yield {'type': 'log', 'message': f'  {format_cache_report()}', 'logType': 'info'}
+    if cascade == 'ollama' and get_parse_stats():
+        yield {'type': 'log', 'message': f'  {format_parse_report()}', 'logType': 'info'}
+        for line in format_ollama_report():
+            yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
+    if pack_size > 1:
+        yield {'type': 'log', 'message': f'  {packer.summary()}', 'logType': 'info'}
+    if cascade_scorer:
+        for line in cascade_scorer.summary_lines():
+            yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
+    if prefilter:
+        for line in prefilter.summary_lines():
+            yield {'type': 'log', 'message': f'  {line}', 'logType': 'info'}
     
     # Update viewer
     try:
@@ -669,7 +687,10 @@ def workflow_generator(product_context: str, target_direction: str, num_queries:
     except:
         pass
     
-    yield {'type': 'complete', 'results': results}
+    yield {'type': 'complete', 'results': results, 'timing': {
+        'time_to_first_result': pipeline.timing['first_result'],
+        'total_wall_time': pipeline.timing['finished'],
+    }}
 
 @app.route('/')
 def index():
@@ -688,6 +709,44 @@ def session_stats():
         'analyzed_channels_count': len(SESSION_STATE['analyzed_channels'])
     })
 
+@app.route('/extractor_stats')
+def extractor_stats():
+    """Get yt-dlp engine pool, per-call latency and Claude HTTP connection statistics"""
+    return jsonify({**get_engine_stats(), 'claude_http': get_client_stats()})
+
+def get_search_db() -> ChannelDatabase:
+    global SEARCH_DB
+    if SEARCH_DB is None:
+        db = ChannelDatabase()
+        db.connect()
+        db.create_search_index()
+        SEARCH_DB = db
+    return SEARCH_DB
+
+@app.route('/search_channels')
+def search_channels():
+    """Ranked full-text search over saved channels (name, description, notes)"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.args.get('limit', SEARCH_LIMIT)), 200))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'limit and offset must be integers'}), 400
+    
+    started = time.perf_counter()
+    try:
+        rows = get_search_db().search_channels(query, limit + 1, offset)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    fields = ['channel_id', 'channel_name', 'channel_url', 'subscriber_count', 'category', 'snippet', 'rank']
+    return jsonify({
+        'query': query,
+        'results': [{f: row.get(f) for f in fields} for row in rows[:limit]],
+        'has_more': len(rows) > limit,
+        'offset': offset,
+        'search_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
+
 @app.route('/reset_session', methods=['POST'])
 def reset_session():
     """Reset session state"""
@@ -705,10 +764,24 @@ def start_workflow():
     results_per_query = int(request.args.get('resultsPerQuery', 5))
     min_subscribers = int(request.args.get('minSubscribers', 0))
     max_subscribers = int(request.args.get('maxSubscribers', 100000000))
+    scoring_concurrency = int(request.args.get('scoringConcurrency', SCORING_CONCURRENCY))
+    force_rescore = request.args.get('forceRescore', 'false').lower() == 'true'
+    pack_size = int(request.args.get('packSize', 1))
+    cascade = request.args.get('cascade', 'off')
+    cascade_band = (float(request.args.get('cascadeLow', CASCADE_BAND[0])),
+                    float(request.args.get('cascadeHigh', CASCADE_BAND[1])))
+    semantic_filter = request.args.get('semanticFilter', 'false').lower() == 'true'
+    semantic_threshold = float(request.args.get('semanticThreshold', SIMILARITY_THRESHOLD))
+    ranker_skip = request.args.get('rankerSkip', 'false').lower() == 'true'
+    ranker_skip_below = float(request.args.get('rankerSkipBelow', SKIP_SCORE))
+    query_novelty = request.args.get('queryNovelty', 'true').lower() == 'true'
+    query_bandit = request.args.get('queryBandit', 'false').lower() == 'true'
     
     def generate():
         for event in workflow_generator(product_context, target_direction, num_queries, results_per_query,
-                                       min_subscribers, max_subscribers):
+                                       min_subscribers, max_subscribers, scoring_concurrency, force_rescore,
+                                       pack_size, cascade, cascade_band, semantic_filter, semantic_threshold,
+                                       ranker_skip, ranker_skip_below, query_novelty, query_bandit):
             event_type = event.pop('type', 'message')
             yield f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
     
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Database Benchmarks
+Run against throwaway databases in a temp directory.
+
+Concurrency: channel writes (add_channel) and viewer-style reads run at the
+same time, in two configurations:
+  before: rollback journal, synchronous=FULL, one ChannelDatabase per thread
+  after:  WAL + tuned pragmas, one ChannelDatabase shared by every thread
+
+Indexes: a synthetic channel table (500k rows by default) is queried with
+HOT_QUERIES, first without and then with the managed indexes. The run fails
+if EXPLAIN QUERY PLAN shows a hot query scanning or sorting without an index.
+
+Search: the same synthetic table, searched with the old LIKE scan and with
+the ranked FTS5 search_channels().
+
+Usage:
+    python db_benchmark.py [seconds] [writers] [readers]
+    python db_benchmark.py indexes [channels]
+    python db_benchmark.py search [channels]
+"""
+
+import itertools
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from channel_database import ChannelDatabase, HOT_QUERIES
+
+SEED_CHANNELS = 5000
+INDEX_BENCHMARK_CHANNELS = 500000
+LOOKUPS = 2000  # Per-channel queries timed per lookup benchmark
+CATEGORIES = ['prepper', 'homestead', 'outdoors', 'diy', 'ai_discovered', 'other']
+DESCRIPTION_WORDS = ('survival prepping homesteading off grid solar power garden canning bushcraft camping '
+                     'knives fishing hunting woodworking tools review beginner budget family farm chickens '
+                     'goats emergency water filter radio firestarter ferrocerium tarp shelter').split()
+SEARCH_TERMS = ['ferrocerium', 'off grid solar', 'homestead', 'bush', 'water filter review', 'w1']
+FILLER_WORDS = [f'w{n}' for n in range(1, 5001)]  # Zipf-distributed filler, so 'w1' is in most descriptions
+FILLER_WEIGHTS = list(itertools.accumulate(1 / n for n in range(1, 5001)))
+
+LEGACY_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def make_channel(channel_id: str, i: int) -> Dict:
+    return {
+        'channel_id': channel_id,
+        'channel_name': f'Benchmark channel {i}',
+        'channel_url': f'https://www.youtube.com/channel/{channel_id}',
+        'subscriber_count': (i * 7919) % 500000,
+        'category': 'benchmark',
+        'channel_description': 'survival prepping homesteading off-grid ' * 5,
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run_scenario(db_file: str, shared: bool, pragmas: Dict, seconds: float,
+                 writers: int, readers: int) -> Dict:
+    setup = ChannelDatabase(db_file, pragmas)
+    setup.connect()
+    setup.create_tables()
+    for i in range(SEED_CHANNELS):
+        setup.cursor.execute('INSERT OR IGNORE INTO channels (channel_id, channel_name, channel_url, subscriber_count) '
+                             'VALUES (?, ?, ?, ?)', (f'seed-{i}', f'Seed {i}', 'u', (i * 7919) % 500000))
+    setup.conn.commit()
+    setup.close()
+
+    shared_db = None
+    if shared:
+        shared_db = ChannelDatabase(db_file, pragmas)
+        shared_db.connect()
+
+    counts = {'writes': 0, 'reads': 0, 'write_errors': 0, 'read_errors': 0}
+    read_latency, lock = [], threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def database() -> ChannelDatabase:
+        if shared_db is not None:
+            return shared_db
+        db = ChannelDatabase(db_file, pragmas)
+        db.connect()
+        return db
+
+    def writer(n: int):
+        db = database()
+        i = 0
+        while time.perf_counter() < stop:
+            # add_channel swallows errors and returns False (e.g. "database is locked")
+            ok = db.add_channel(make_channel(f'w{n}-{i}', i))
+            with lock:
+                counts['writes' if ok else 'write_errors'] += 1
+            i += 1
+        if shared_db is None:
+            db.close()
+
+    def reader():
+        db = database()
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            try:
+                db.get_channels_by_subscriber_range(1000, 100000)
+                db.get_stats()
+                with lock:
+                    counts['reads'] += 1
+                    read_latency.append(time.perf_counter() - started)
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['read_errors'] += 1
+        if shared_db is None:
+            db.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if shared_db is not None:
+        shared_db.close()
+
+    return {
+        'writes_per_sec': counts['writes'] / elapsed,
+        'reads_per_sec': counts['reads'] / elapsed,
+        'write_errors': counts['write_errors'],
+        'read_errors': counts['read_errors'],
+        'read_p95_ms': _percentile(read_latency, 0.95) * 1000,
+    }
+
+
+def build_synthetic_database(db_file: str, channels: int):
+    """channels rows plus ~0.5 contacts and 2 videos per channel, inserted in bulk"""
+    rng = random.Random(42)
+
+    def description() -> str:
+        words = rng.choices(FILLER_WORDS, cum_weights=FILLER_WEIGHTS, k=20)
+        words[0] = rng.choice(DESCRIPTION_WORDS)  # Each topic word lands in ~3% of channels
+        return ' '.join(words)
+
+    db = ChannelDatabase(db_file)
+    db.connect()
+    db.create_tables()
+    db.drop_indexes()
+
+    batch = 50000
+    for start in range(0, channels, batch):
+        ids = range(start, min(start + batch, channels))
+        db.cursor.executemany(
+            'INSERT INTO channels (channel_id, channel_name, channel_url, subscriber_count, category, '
+            'channel_description) VALUES (?, ?, ?, ?, ?, ?)',
+            [(f'UC{i}', f'Channel {i}', f'https://www.youtube.com/channel/UC{i}',
+              int(rng.paretovariate(1.2) * 500), rng.choice(CATEGORIES), description()) for i in ids])
+        db.cursor.executemany(
+            'INSERT INTO contacts (channel_id, contact_type, contact_value) VALUES (?, ?, ?)',
+            [(f'UC{i}', 'email', f'creator{i}@example.com') for i in ids if i % 2 == 0])
+        db.cursor.executemany(
+            'INSERT INTO videos (video_id, channel_id, video_title) VALUES (?, ?, ?)',
+            [(f'v{i}-{n}', f'UC{i}', f'Video {n}') for i in ids for n in range(2)])
+        db.conn.commit()
+    db.close()
+
+
+def time_hot_queries(db: ChannelDatabase, channels: int) -> Dict[str, float]:
+    """Milliseconds per hot query (average over LOOKUPS random ids for per-channel queries)"""
+    rng = random.Random(7)
+    timings = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        if params == ('UC0',):
+            ids = [(f'UC{rng.randrange(channels)}',) for _ in range(LOOKUPS)]
+            started = time.perf_counter()
+            for lookup in ids:
+                db.cursor.execute(sql, lookup).fetchall()
+            timings[name] = (time.perf_counter() - started) * 1000 / LOOKUPS
+        else:
+            started = time.perf_counter()
+            db.cursor.execute(sql, params).fetchall()
+            timings[name] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def run_index_benchmark(channels: int) -> bool:
+    print(f"Building synthetic database: {channels:,} channels...")
+    workdir = tempfile.mkdtemp(prefix='db_benchmark_')
+    try:
+        db_file = os.path.join(workdir, 'indexes.db')
+        started = time.perf_counter()
+        build_synthetic_database(db_file, channels)
+        print(f"✓ Built in {time.perf_counter() - started:.1f}s\n")
+
+        db = ChannelDatabase(db_file)
+        db.connect()
+        before = time_hot_queries(db, channels)
+
+        started = time.perf_counter()
+        db.create_indexes()
+        print(f"✓ Created indexes in {time.perf_counter() - started:.1f}s\n")
+        after = time_hot_queries(db, channels)
+        plans = db.check_query_plans()
+        db.close()
+
+        print(f"{'query':34} {'no index':>11} {'indexed':>11} {'speedup':>8}  plan")
+        for name in HOT_QUERIES:
+            speedup = before[name] / after[name] if after[name] else 0
+            mark = '✓' if plans[name]['uses_index'] else '✗'
+            print(f"{name:34} {before[name]:>9.2f}ms {after[name]:>9.2f}ms {speedup:>7.1f}x  "
+                  f"{mark} {' | '.join(plans[name]['plan'])}")
+
+        missing = [name for name, plan in plans.items() if not plan['uses_index']]
+        if missing:
+            print(f"\n❌ Hot queries without index coverage: {', '.join(missing)}")
+            return False
+        print("\n✓ Every hot query uses an index")
+        return True
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_search_benchmark(channels: int):
+    print(f"Building synthetic database: {channels:,} channels...")
+    workdir = tempfile.mkdtemp(prefix='db_benchmark_')
+    try:
+        db_file = os.path.join(workdir, 'search.db')
+        started = time.perf_counter()
+        build_synthetic_database(db_file, channels)
+        print(f"✓ Built in {time.perf_counter() - started:.1f}s (FTS index maintained by triggers)\n")
+
+        db = ChannelDatabase(db_file)
+        db.connect()
+        db.create_indexes()
+        print(f"{'query':24} {'LIKE scan':>11} {'FTS5 top 50':>12} {'speedup':>8}  best match")
+        for term in SEARCH_TERMS:
+            started = time.perf_counter()
+            db.cursor.execute('SELECT * FROM channels WHERE channel_name LIKE ? OR channel_description LIKE ? '
+                              'ORDER BY subscriber_count DESC LIMIT 50', (f'%{term}%', f'%{term}%')).fetchall()
+            like_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            results = db.search_channels(term)
+            fts_ms = (time.perf_counter() - started) * 1000
+            best = results[0]['channel_name'] if results else '-'
+            print(f"{term:24} {like_ms:>9.1f}ms {fts_ms:>10.1f}ms {like_ms / fts_ms:>7.1f}x  {best}")
+        db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        print("🏁 Database Search Benchmark")
+        print("=" * 60)
+        run_search_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else INDEX_BENCHMARK_CHANNELS)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'indexes':
+        print("🏁 Database Index Benchmark")
+        print("=" * 60)
+        channels = int(sys.argv[2]) if len(sys.argv) > 2 else INDEX_BENCHMARK_CHANNELS
+        if not run_index_benchmark(channels):
+            sys.exit(1)
+        return
+
+    print("🏁 Database Concurrency Benchmark")
+    print("=" * 60)
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f"{writers} writer + {readers} reader threads, {seconds:g}s per scenario, "
+          f"{SEED_CHANNELS:,} seed channels\n")
+
+    workdir = tempfile.mkdtemp(prefix='db_benchmark_')
+    try:
+        scenarios = [
+            ('before', False, LEGACY_PRAGMAS),
+            ('after', True, None),
+        ]
+        results = {}
+        for name, shared, pragmas in scenarios:
+            db_file = os.path.join(workdir, f'{name}.db')
+            results[name] = run_scenario(db_file, shared, pragmas, seconds, writers, readers)
+
+        print(f"{'':8} {'writes/s':>10} {'reads/s':>10} {'read p95':>10} {'errors':>8}")
+        for name, r in results.items():
+            print(f"{name:8} {r['writes_per_sec']:>10.0f} {r['reads_per_sec']:>10.0f} "
+                  f"{r['read_p95_ms']:>8.1f}ms {r['write_errors'] + r['read_errors']:>8}")
+
+        before, after = results['before'], results['after']
+        if before['writes_per_sec'] and before['reads_per_sec']:
+            print(f"\nWAL + shared connections: {after['writes_per_sec'] / before['writes_per_sec']:.1f}x writes, "
+                  f"{after['reads_per_sec'] / before['reads_per_sec']:.1f}x reads")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
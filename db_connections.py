@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+SQLite Connection Manager
+One connection per thread to the same database file, opened on first use
+with WAL journaling and tuned pragmas. WAL lets readers (viewer regeneration,
+the control panel) run while a workflow writes; writers still take turns,
+and the busy timeout makes them wait instead of failing with
+"database is locked".
+"""
+
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+BUSY_TIMEOUT_SECONDS = 30
+
+# Applied to every new connection, in order (journal_mode is persistent in the file)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Safe with WAL; only the last commits can be lost on power failure
+    'cache_size': -32000,  # Negative = KiB, so ~32 MB page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': BUSY_TIMEOUT_SECONDS * 1000,
+}
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Dict):
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+class ConnectionManager:
+    """Per-thread sqlite3 connections to one database file (thread-safe)"""
+
+    def __init__(self, db_file: str, pragmas: Optional[Dict] = None, row_factory=sqlite3.Row):
+        self.db_file = db_file
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self.row_factory = row_factory
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._generation = 0  # Bumped by close_all() so threads don't reuse closed connections
+
+    def get(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            # check_same_thread=False only so close_all() can close other threads' connections
+            conn = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+            conn.row_factory = self.row_factory
+            apply_pragmas(conn, self.pragmas)
+            self._local.conn = conn
+            self._local.generation = self._generation
+            with self._lock:
+                dead = [c for thread, c in self._connections if not thread.is_alive()]
+                self._connections = [(t, c) for t, c in self._connections if t.is_alive()]
+                self._connections.append((threading.current_thread(), conn))
+            # Threads that exited (e.g. finished Flask request threads) can't use theirs again
+            for stale in dead:
+                stale.close()
+        return conn
+
+    def close_thread(self):
+        """Commit and close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._connections = [(t, c) for t, c in self._connections if c is not conn]
+        conn.commit()
+        conn.close()
+
+    def close_all(self):
+        """Close every thread's connection (the calling thread's is committed first)"""
+        self.close_thread()
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for _, conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def open_connections(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+    def settings(self) -> Dict:
+        """Effective pragma values on the calling thread's connection"""
+        conn = self.get()
+        return {name: conn.execute(f'PRAGMA {name}').fetchone()[0] for name in self.pragmas}
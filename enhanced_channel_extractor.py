@@ -5,76 +5,149 @@ Extracts detailed metrics from YouTube channels using yt-dlp
 Tier 1 metrics: avg views, engagement rate, contact info
 """
 
-import subprocess
-import json
 import re
 import statistics
+import concurrent.futures
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+import ytdlp_engine
+from metadata_cache import get_metadata_cache
+from ytdlp_engine import extract_info, get_entries
 
-def get_recent_videos(channel_url: str, count: int = 10) -> List[Dict]:
-    """Get recent videos from a channel"""
+VIDEO_DETAIL_WORKERS = 5  # Concurrent video lookups per batch
+SNAPSHOT_VIDEO_COUNT = 10  # Recent videos listed per channel snapshot
+
+@dataclass
+class ChannelSnapshot:
+    """Everything we read from a channel's /videos tab, from a single fetch"""
+    channel_url: str
+    channel_id: str = ''
+    channel_name: str = ''
+    description: str = ''
+    country: Optional[str] = None
+    video_count: Optional[int] = None
+    subscriber_count: int = 0
+    tags: List[str] = field(default_factory=list)
+    videos: List[Dict] = field(default_factory=list)  # Flat entries, newest first
+    
+    def about(self) -> Dict:
+        """About-page fields in the shape stored on the channel row"""
+        return {
+            'channel_description': self.description[:2000],  # First 2000 chars
+            'channel_country': self.country,
+            'total_video_count': self.video_count,
+        }
+
+def get_channel_snapshot(channel_url: str, count: int = SNAPSHOT_VIDEO_COUNT) -> Optional[ChannelSnapshot]:
+    """
+    Fetch a channel's video list and channel-level metadata in one request
+    
+    The flat /videos listing already carries the channel description,
+    follower count and tags, so recent videos and about-page data no longer
+    need separate downloads of the same page.
+    """
     try:
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--dump-json',
-            '--playlist-end', str(count),
-            '--flat-playlist',
-            f"{channel_url}/videos"
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            videos = []
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    try:
-                        video_data = json.loads(line)
-                        videos.append(video_data)
-                    except:
-                        continue
-            return videos
+        data = extract_info(f"{channel_url}/videos", 'channel_listing', playlistend=count)
     except Exception as e:
-        print(f"Error getting recent videos: {e}")
+        print(f"Error getting channel snapshot: {e}")
+        return None
     
-    return []
+    videos = get_entries(data)
+    
+    snapshot = ChannelSnapshot(
+        channel_url=data.get('channel_url') or channel_url,
+        channel_id=data.get('channel_id') or '',
+        channel_name=data.get('channel') or data.get('uploader') or '',
+        description=data.get('description') or '',
+        country=data.get('channel_country'),
+        video_count=data.get('channel_video_count') or data.get('playlist_count'),
+        subscriber_count=data.get('channel_follower_count') or 0,
+        tags=data.get('tags') or [],
+        videos=videos,
+    )
+    
+    # The channel-level fields change far less often than the video list, so they
+    # are also cached on their own under the long-lived 'channel_about' kind
+    if ytdlp_engine.ENABLE_METADATA_CACHE:
+        get_metadata_cache().put('channel_about', channel_url, {**asdict(snapshot), 'videos': []})
+    return snapshot
+
+def get_channel_about_snapshot(channel_url: str) -> Optional[ChannelSnapshot]:
+    """
+    Channel-level fields only (no videos): served from the 'channel_about'
+    cache while fresh, otherwise from a new get_channel_snapshot fetch
+    """
+    if ytdlp_engine.ENABLE_METADATA_CACHE:
+        cached = get_metadata_cache().get('channel_about', channel_url)
+        if cached is not None:
+            return ChannelSnapshot(**cached)
+    return get_channel_snapshot(channel_url)
+
+def get_recent_videos(channel_url: str, count: int = 10) -> List[Dict]:
+    """Get recent videos from a channel"""
+    snapshot = get_channel_snapshot(channel_url, count)
+    return snapshot.videos if snapshot else []
 
 def get_video_details(video_url: str) -> Optional[Dict]:
     """Get detailed stats for a single video"""
     try:
-        cmd = ['yt-dlp', '--skip-download', '--dump-json', video_url]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            # Ensure required fields exist with defaults
-            return {
-                'view_count': data.get('view_count', 0),
-                'like_count': data.get('like_count', 0),
-                'comment_count': data.get('comment_count', 0),
-                'duration': data.get('duration', 0),
-                'upload_date': data.get('upload_date'),
-                'title': data.get('title', ''),
-            }
+        data = extract_info(video_url, 'video')
+        # Ensure required fields exist with defaults
+        return {
+            'view_count': data.get('view_count', 0),
+            'like_count': data.get('like_count', 0),
+            'comment_count': data.get('comment_count', 0),
+            'duration': data.get('duration', 0),
+            'upload_date': data.get('upload_date'),
+            'title': data.get('title', ''),
+        }
     except Exception as e:
         print(f"      ⚠️ Error getting video details: {e}")
     
     return None
 
-def calculate_engagement_metrics(videos: List[Dict]) -> Dict:
-    """Calculate engagement metrics from video list"""
-    if not videos:
-        return {}
+def get_video_details_many(video_urls: List[str], max_workers: int = VIDEO_DETAIL_WORKERS) -> Iterator[Dict]:
+    """
+    Get detailed stats for a batch of videos, yielding each one as it finishes
+    
+    All lookups share the engine's warm extractor pool. Results arrive in
+    completion order; each carries 'position' (index in video_urls) and
+    'video_url' so callers can restore the original order.
+    """
+    if not video_urls:
+        return
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(get_video_details, url): (position, url)
+            for position, url in enumerate(video_urls)
+        }
+        
+        for future in concurrent.futures.as_completed(futures):
+            details = future.result()
+            if details:
+                position, url = futures[future]
+                details['position'] = position
+                details['video_url'] = url
+                yield details
+
+def calculate_engagement_metrics(videos: Iterable[Dict]) -> Dict:
+    """
+    Calculate engagement metrics from video list
     
+    Accepts any iterable (e.g. the stream from get_video_details_many), so
+    aggregation starts before the last video arrives. Videos with a
+    'position' key are treated as newest-first by that position.
+    """
     view_counts = []
+    positioned_views = []
     like_counts = []
     comment_counts = []
     durations = []
     upload_dates = []
     
-    for video in videos:
+    for index, video in enumerate(videos):
         views = video.get('view_count', 0) or 0
         likes = video.get('like_count', 0) or 0
         comments = video.get('comment_count', 0) or 0
@@ -83,6 +156,7 @@ def calculate_engagement_metrics(videos: List[Dict]) -> Dict:
         
         if views > 0:
             view_counts.append(views)
+            positioned_views.append((video.get('position', index), views))
             like_counts.append(likes)
             comment_counts.append(comments)
             
@@ -141,10 +215,11 @@ def calculate_engagement_metrics(videos: List[Dict]) -> Dict:
         viral_threshold = avg_views * 5
         metrics['recent_viral_count'] = sum(1 for v in view_counts if v > viral_threshold)
     
-    # Growth trend
+    # Growth trend (newest videos first)
     if len(view_counts) >= 6:
-        recent_avg = statistics.mean(view_counts[:3])
-        older_avg = statistics.mean(view_counts[3:6])
+        ordered_views = [views for _, views in sorted(positioned_views)]
+        recent_avg = statistics.mean(ordered_views[:3])
+        older_avg = statistics.mean(ordered_views[3:6])
         
         if recent_avg > older_avg * 1.5:
             metrics['growth_trend'] = 'rapid'
@@ -215,31 +290,8 @@ def extract_social_links(text: str) -> Dict[str, str]:
 
 def get_channel_about_page(channel_url: str) -> Optional[Dict]:
     """Get channel about page information"""
-    try:
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--dump-json',
-            '--playlist-items', '1',
-            f"{channel_url}/videos"
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout.strip().split('\n')[0])
-            
-            channel_info = {
-                'channel_description': data.get('description', '')[:2000],  # First 2000 chars
-                'channel_country': data.get('channel_country'),
-                'total_video_count': data.get('playlist_count') or data.get('channel_video_count'),
-            }
-            
-            return channel_info
-    except Exception as e:
-        print(f"Error getting about page: {e}")
-    
-    return None
+    snapshot = get_channel_about_snapshot(channel_url)
+    return snapshot.about() if snapshot else None
 
 def analyze_title_patterns(titles: List[str]) -> tuple[bool, float, str]:
     """
@@ -309,6 +361,77 @@ def analyze_title_patterns(titles: List[str]) -> tuple[bool, float, str]:
     
     return False, spam_score, "Authentic titles"
 
+def get_snapshot_video_urls(snapshot: Optional[ChannelSnapshot], limit: int = 10) -> List[str]:
+    """Watch URLs for the newest videos in a snapshot"""
+    if not snapshot:
+        return []
+    return [f"https://youtube.com/watch?v={video['id']}"
+            for video in snapshot.videos[:limit] if video.get('id')]
+
+def build_enhanced_channel_data(basic_data: Dict, snapshot: Optional[ChannelSnapshot],
+                                video_details: Iterable[Dict]) -> Dict:
+    """
+    Combine a channel snapshot and per-video details into enhanced data
+    
+    Pure computation (no network), so both the threaded and asyncio
+    fetch paths share it. video_details may be a stream; metrics are
+    aggregated as items arrive.
+    """
+    enhanced_data = {**basic_data}  # Start with basic data
+    detailed_videos = []
+    
+    def collect():
+        for details in video_details:
+            detailed_videos.append(details)
+            yield details
+    
+    metrics = calculate_engagement_metrics(collect())
+    
+    if detailed_videos:
+        enhanced_data.update(metrics)
+        
+        # Store video titles for AI farm detection (newest first)
+        detailed_videos.sort(key=lambda v: v.get('position', 0))
+        enhanced_data['recent_titles'] = [v.get('title', '') for v in detailed_videos if v.get('title')]
+        
+        # Calculate view rate
+        if 'avg_views' in metrics and (basic_data.get('subscriber_count') or 0) > 0:
+            view_rate = (metrics['avg_views'] / basic_data['subscriber_count']) * 100
+            enhanced_data['view_rate'] = round(view_rate, 2)
+    
+    # Channel about data (from the same snapshot)
+    about_data = snapshot.about() if snapshot else None
+    if about_data:
+        enhanced_data.update(about_data)
+        
+        # Extract contact info and links
+        description = about_data.get('channel_description', '')
+        
+        email = extract_email_from_text(description)
+        if email:
+            enhanced_data['business_email'] = email
+            print(f"    ✓ Found business email: {email}")
+        
+        social_links = extract_social_links(description)
+        if social_links:
+            if 'instagram' in social_links:
+                enhanced_data['instagram_handle'] = social_links['instagram']
+                print(f"    ✓ Found Instagram: @{social_links['instagram']}")
+            if 'twitter' in social_links:
+                enhanced_data['twitter_handle'] = social_links['twitter']
+                print(f"    ✓ Found Twitter: @{social_links['twitter']}")
+            if 'website' in social_links:
+                enhanced_data['website_url'] = social_links['website']
+                print(f"    ✓ Found website: {social_links['website']}")
+            if social_links.get('has_store'):
+                enhanced_data['has_affiliate_store'] = 1
+                print(f"    ✓ Has affiliate store/merch")
+            if social_links.get('has_patreon'):
+                enhanced_data['has_patreon'] = 1
+                print(f"    ✓ Has Patreon")
+    
+    return enhanced_data
+
 def get_enhanced_channel_data(channel_url: str, basic_data: Dict) -> Dict:
     """
     Get all enhanced channel data
@@ -325,69 +448,29 @@ def get_enhanced_channel_data(channel_url: str, basic_data: Dict) -> Dict:
     enhanced_data = {**basic_data}  # Start with basic data
     
     try:
-        # Get recent videos for analysis
-        print(f"    📹 Fetching recent videos...")
-        recent_videos = get_recent_videos(channel_url, count=10)
+        # One fetch for recent videos + channel description
+        print(f"    📹 Fetching channel snapshot...")
+        snapshot = get_channel_snapshot(channel_url, count=10)
+        video_urls = get_snapshot_video_urls(snapshot)
         
-        if recent_videos:
-            print(f"    ✓ Found {len(recent_videos)} recent videos")
-            
-            # Get detailed stats for each video
-            detailed_videos = []
-            for i, video in enumerate(recent_videos[:10], 1):
-                video_id = video.get('id')
-                if video_id:
-                    print(f"    📊 Analyzing video {i}/10...", end='\r')
-                    details = get_video_details(f"https://youtube.com/watch?v={video_id}")
-                    if details:
-                        detailed_videos.append(details)
-            
-            print(f"    ✓ Analyzed {len(detailed_videos)} videos     ")
-            
-            # Calculate metrics
-            if detailed_videos:
-                metrics = calculate_engagement_metrics(detailed_videos)
-                enhanced_data.update(metrics)
-                
-                # Store video titles for AI farm detection
-                enhanced_data['recent_titles'] = [v.get('title', '') for v in detailed_videos if v.get('title')]
-                
-                # Calculate view rate
-                if 'avg_views' in metrics and basic_data.get('subscriber_count', 0) > 0:
-                    view_rate = (metrics['avg_views'] / basic_data['subscriber_count']) * 100
-                    enhanced_data['view_rate'] = round(view_rate, 2)
+        if video_urls:
+            print(f"    ✓ Found {len(video_urls)} recent videos")
         
-        # Get channel about page
-        print(f"    📄 Fetching channel description...")
-        about_data = get_channel_about_page(channel_url)
-        if about_data:
-            enhanced_data.update(about_data)
-            
-            # Extract contact info and links
-            description = about_data.get('channel_description', '')
-            
-            email = extract_email_from_text(description)
-            if email:
-                enhanced_data['business_email'] = email
-                print(f"    ✓ Found business email: {email}")
-            
-            social_links = extract_social_links(description)
-            if social_links:
-                if 'instagram' in social_links:
-                    enhanced_data['instagram_handle'] = social_links['instagram']
-                    print(f"    ✓ Found Instagram: @{social_links['instagram']}")
-                if 'twitter' in social_links:
-                    enhanced_data['twitter_handle'] = social_links['twitter']
-                    print(f"    ✓ Found Twitter: @{social_links['twitter']}")
-                if 'website' in social_links:
-                    enhanced_data['website_url'] = social_links['website']
-                    print(f"    ✓ Found website: {social_links['website']}")
-                if social_links.get('has_store'):
-                    enhanced_data['has_affiliate_store'] = 1
-                    print(f"    ✓ Has affiliate store/merch")
-                if social_links.get('has_patreon'):
-                    enhanced_data['has_patreon'] = 1
-                    print(f"    ✓ Has Patreon")
+        # Get detailed stats for all videos in one concurrent batch;
+        # metrics consume videos as they arrive
+        analyzed = 0
+        
+        def stream_details():
+            nonlocal analyzed
+            for details in get_video_details_many(video_urls):
+                analyzed += 1
+                print(f"    📊 Analyzed video {analyzed}/{len(video_urls)}...", end='\r')
+                yield details
+        
+        enhanced_data = build_enhanced_channel_data(basic_data, snapshot, stream_details())
+        
+        if video_urls:
+            print(f"    ✓ Analyzed {analyzed} videos     ")
         
         # Summary
         print(f"    ✓ Enhanced data extraction complete")
@@ -4,9 +4,8 @@ YouTube Channel Finder - Discover more prepper/survival channels
 Searches YouTube for relevant content and extracts channel information
 """
 
-import subprocess
-import json
 from typing import List, Dict
+from ytdlp_engine import extract_info, get_entries, print_latency_report
 
 # Search terms relevant to your product
 SEARCH_TERMS = [
@@ -27,36 +26,20 @@ def search_youtube(query: str, max_results: int = 10) -> List[str]:
     print(f"Searching for: {query}")
     
     try:
-        cmd = [
-            "yt-dlp",
-            "--skip-download",
-            "--get-id",
-            "--flat-playlist",
-            f"ytsearch{max_results}:{query}"
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        video_ids = result.stdout.strip().split('\n')
+        data = extract_info(f"ytsearch{max_results}:{query}", 'search')
+        video_ids = [entry.get('id') for entry in get_entries(data)]
         
         urls = [f"https://www.youtube.com/watch?v={vid_id}" for vid_id in video_ids if vid_id]
         return urls
         
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"Error searching: {e}")
         return []
 
 def get_channel_info(video_url: str) -> Dict:
     """Extract channel info from a video URL"""
     try:
-        cmd = [
-            "yt-dlp",
-            "--skip-download",
-            "--dump-json",
-            video_url
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
+        data = extract_info(video_url, 'video')
         
         return {
             "channel_name": data.get("uploader", ""),
@@ -95,7 +78,9 @@ def main():
         print()
     
     print("=" * 70)
-    print(f"✓ Found {len(all_channels)} unique channels\n")
+    print(f"✓ Found {len(all_channels)} unique channels")
+    print_latency_report()
+    print()
     
     # Sort by subscriber count
     sorted_channels = sorted(all_channels.values(), 
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Persistent LLM Response Cache
+Content-addressed SQLite cache for Claude/Ollama completions, keyed by
+(provider, model, temperature, prompt hash), with size-bounded LRU
+eviction. Identical prompts (same channel, same product context) are
+answered from disk instead of paying for another call.
+"""
+
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+CACHE_FILE = "llm_response_cache.db"
+ENABLE_LLM_CACHE = True
+
+MAX_CACHE_BYTES = 100 * 1024 * 1024
+MAX_CACHE_ENTRIES = 100000
+TOUCH_BATCH = 100  # Hits buffered before their last_access/hit_count updates are written
+
+
+def prompt_hash(prompt: str, extra: Optional[Dict] = None) -> str:
+    """sha256 of the prompt plus any other request fields that change the answer"""
+    content = prompt
+    if extra:
+        content += '\n' + json.dumps(extra, sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU cache of LLM response text (thread-safe)"""
+
+    def __init__(self, cache_file: str = CACHE_FILE, max_bytes: int = MAX_CACHE_BYTES,
+                 max_entries: int = MAX_CACHE_ENTRIES):
+        self.cache_file = cache_file
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.counters = {'hits': 0, 'misses': 0, 'bypassed': 0, 'writes': 0, 'discarded': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                PRIMARY KEY (provider, model, temperature, prompt_hash)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache (last_access)')
+        self.conn.commit()
+
+        # Running totals so put() can check the limits without scanning the table
+        self._count, self._bytes = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache'
+        ).fetchone()
+        self._touched = {}  # key -> [last_access, hits] not yet written
+
+    def get(self, provider: str, model: str, temperature: float, prompt: str,
+            extra: Optional[Dict] = None) -> Optional[str]:
+        """Cached response text, or None on a miss"""
+        key = (provider, model, float(temperature), prompt_hash(prompt, extra))
+
+        with self._lock:
+            row = self.conn.execute('''
+                SELECT response FROM llm_cache
+                WHERE provider = ? AND model = ? AND temperature = ? AND prompt_hash = ?
+            ''', key).fetchone()
+
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+
+            # Hits only touch LRU bookkeeping, so they're written in batches rather than committed each time
+            touch = self._touched.setdefault(key, [0.0, 0])
+            touch[0] = time.time()
+            touch[1] += 1
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches()
+                self.conn.commit()
+            self.counters['hits'] += 1
+            return row[0]
+
+    def put(self, provider: str, model: str, temperature: float, prompt: str, response: str,
+            extra: Optional[Dict] = None):
+        """Store a response, evicting least-recently-used entries if over budget"""
+        key = (provider, model, float(temperature), prompt_hash(prompt, extra))
+        size = len(response.encode('utf-8'))
+        now = time.time()
+
+        with self._lock:
+            self._flush_touches()  # So eviction sees current LRU order
+            self._touched.pop(key, None)
+            replaced = self.conn.execute('''
+                SELECT size FROM llm_cache
+                WHERE provider = ? AND model = ? AND temperature = ? AND prompt_hash = ?
+            ''', key).fetchone()
+            if replaced:
+                self._count -= 1
+                self._bytes -= replaced[0]
+            self.conn.execute('''
+                INSERT OR REPLACE INTO llm_cache
+                (provider, model, temperature, prompt_hash, response, size, created, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (*key, response, size, now, now))
+            self.counters['writes'] += 1
+            self._count += 1
+            self._bytes += size
+            self._evict()
+            self.conn.commit()
+
+    def discard(self, provider: str, model: str, temperature: float, prompt: str,
+                extra: Optional[Dict] = None):
+        """Drop one entry (e.g. a response that turned out to be unparseable)"""
+        key = (provider, model, float(temperature), prompt_hash(prompt, extra))
+        with self._lock:
+            self._touched.pop(key, None)
+            row = self.conn.execute('''
+                SELECT size FROM llm_cache
+                WHERE provider = ? AND model = ? AND temperature = ? AND prompt_hash = ?
+            ''', key).fetchone()
+            if row is None:
+                return
+            self.conn.execute('''
+                DELETE FROM llm_cache
+                WHERE provider = ? AND model = ? AND temperature = ? AND prompt_hash = ?
+            ''', key)
+            self.conn.commit()
+            self._count -= 1
+            self._bytes -= row[0]
+            self.counters['discarded'] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self.counters['bypassed'] += 1
+
+    def _flush_touches(self):
+        """Write buffered hit bookkeeping (lock held; caller commits)"""
+        if self._touched:
+            self.conn.executemany('''
+                UPDATE llm_cache SET last_access = ?, hit_count = hit_count + ?
+                WHERE provider = ? AND model = ? AND temperature = ? AND prompt_hash = ?
+            ''', [(last_access, hits, *key) for key, (last_access, hits) in self._touched.items()])
+            self._touched.clear()
+
+    def flush(self):
+        """Write buffered hit bookkeeping now"""
+        with self._lock:
+            self._flush_touches()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under both size limits (lock held)"""
+        while self._count > self.max_entries or self._bytes > self.max_bytes:
+            rows = self.conn.execute(
+                'SELECT rowid, size FROM llm_cache ORDER BY last_access LIMIT 100'
+            ).fetchall()
+            if not rows:
+                break
+
+            for rowid, size in rows:
+                if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM llm_cache WHERE rowid = ?', (rowid,))
+                self._count -= 1
+                self._bytes -= size
+                self.counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM llm_cache')
+            self.conn.commit()
+            self._touched.clear()
+            self._count, self._bytes = 0, 0
+
+    def stats(self) -> Dict:
+        """Counters plus current size, broken down by provider/model"""
+        with self._lock:
+            self._flush_touches()
+            self.conn.commit()
+            by_model = {
+                f"{provider}/{model}": {'entries': entries, 'bytes': size, 'hits': hits}
+                for provider, model, entries, size, hits in self.conn.execute('''
+                    SELECT provider, model, COUNT(*), SUM(size), SUM(hit_count)
+                    FROM llm_cache GROUP BY provider, model
+                ''')
+            }
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else 0,
+                'entries': sum(m['entries'] for m in by_model.values()),
+                'bytes': sum(m['bytes'] for m in by_model.values()),
+                'by_model': by_model,
+            }
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self.conn.commit()
+            self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Process-wide cache instance (opened on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+            atexit.register(_cache.flush)  # Keep hit counts from the last partial batch
+        return _cache
+
+
+def cached_completion(provider: str, model: str, temperature: float, prompt: str,
+                      generate: Callable[[], str], use_cache: bool = True,
+                      extra: Optional[Dict] = None) -> str:
+    """
+    Return a cached response or call generate() and store its result
+
+    Args:
+        provider: 'anthropic' or 'ollama'
+        generate: Makes the actual LLM call; empty results are not stored
+        use_cache: False to force a fresh call (the new answer replaces the cached one)
+        extra: Other request fields that change the answer (system prompt, schema...)
+    """
+    if not ENABLE_LLM_CACHE:
+        return generate()
+
+    cache = get_llm_cache()
+    if use_cache:
+        cached = cache.get(provider, model, temperature, prompt, extra)
+        if cached is not None:
+            return cached
+    else:
+        cache.record_bypass()
+
+    response = generate()
+    if response:
+        cache.put(provider, model, temperature, prompt, response, extra)
+    return response
+
+
+def store_completion(provider: str, model: str, temperature: float, prompt: str, response: str,
+                     extra: Optional[Dict] = None):
+    """Cache a response obtained outside cached_completion (e.g. after a repair)"""
+    if ENABLE_LLM_CACHE and response:
+        get_llm_cache().put(provider, model, temperature, prompt, response, extra)
+
+
+def discard_completion(provider: str, model: str, temperature: float, prompt: str,
+                       extra: Optional[Dict] = None):
+    """Forget a cached response the caller couldn't use"""
+    if ENABLE_LLM_CACHE:
+        get_llm_cache().discard(provider, model, temperature, prompt, extra)
+
+
+def format_cache_report() -> str:
+    s = get_llm_cache().stats()
+    return (f"LLM cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+            f"{s['bypassed']} bypassed, {s['entries']:,} entries")
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = get_llm_cache()
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'clear':
+        cache.clear()
+        print("✓ Cache cleared")
+
+    stats = cache.stats()
+    print("🗃️ LLM Response Cache")
+    print("=" * 50)
+    print(f"File: {cache.cache_file}")
+    print(f"Entries: {stats['entries']:,} ({stats['bytes'] / 1024 / 1024:.1f} MB)")
+    for name, info in stats['by_model'].items():
+        print(f"  {name}: {info['entries']:,} entries, {info['hits'] or 0:,} lifetime hits, "
+              f"{info['bytes'] / 1024:.0f} KB")
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Persistent yt-dlp Metadata Cache
+Stores extracted JSON in SQLite next to the channel database, keyed by
+request kind + normalized URL, with per-kind TTLs and size-bounded LRU eviction
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+CACHE_FILE = "youtube_metadata_cache.db"
+
+# Seconds each kind of response stays fresh
+KIND_TTLS = {
+    'search': 60 * 60,                    # Search rankings shift quickly
+    'channel_listing': 6 * 60 * 60,       # New uploads appear a few times a day
+    'video_detail': 24 * 60 * 60,         # View/like counts drift slowly
+    'channel_about': 7 * 24 * 60 * 60,    # Descriptions rarely change (stored by get_channel_snapshot)
+}
+
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # Compressed payload budget
+MAX_CACHE_ENTRIES = 200000
+
+# Bulky fields we never read; dropped before storing
+STRIPPED_FIELDS = ('formats', 'requested_formats', 'thumbnails', 'automatic_captions',
+                   'subtitles', 'heatmap', 'http_headers', 'requested_subtitles')
+
+YOUTUBE_HOSTS = {'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com'}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form so equivalent URLs share one cache entry"""
+    url = url.strip()
+
+    # ytsearchN:query -> case/whitespace-insensitive query
+    search_match = re.match(r'^(ytsearch\d*):(.*)$', url, re.IGNORECASE)
+    if search_match:
+        prefix, query = search_match.groups()
+        return f"{prefix.lower()}:{' '.join(query.lower().split())}"
+
+    parsed = urlparse(url if '://' in url else f"https://{url}")
+    host = parsed.netloc.lower()
+
+    if host in ('youtu.be', 'www.youtu.be'):
+        return f"https://www.youtube.com/watch?v={parsed.path.strip('/')}"
+
+    if host in YOUTUBE_HOSTS:
+        if parsed.path == '/watch':
+            video_id = parse_qs(parsed.query).get('v', [''])[0]
+            return f"https://www.youtube.com/watch?v={video_id}"
+        return f"https://www.youtube.com{parsed.path.rstrip('/')}"
+
+    return f"{parsed.scheme}://{host}{parsed.path.rstrip('/')}" + (f"?{parsed.query}" if parsed.query else '')
+
+
+def _compact(data: Dict) -> Dict:
+    """Drop fields we never use, including inside playlist entries"""
+    compact = {k: v for k, v in data.items() if k not in STRIPPED_FIELDS}
+    if isinstance(compact.get('entries'), list):
+        compact['entries'] = [
+            _compact(entry) if isinstance(entry, dict) else entry
+            for entry in compact['entries']
+        ]
+    return compact
+
+
+class MetadataCache:
+    """SQLite-backed TTL + LRU cache for yt-dlp info dicts (thread-safe)"""
+
+    def __init__(self, cache_file: str = CACHE_FILE, max_bytes: int = MAX_CACHE_BYTES,
+                 max_entries: int = MAX_CACHE_ENTRIES):
+        self.cache_file = cache_file
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS metadata_cache (
+                cache_key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                expires REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_metadata_cache_lru ON metadata_cache (last_access)')
+        self.conn.commit()
+
+        # Running totals so put() can check the limits without scanning the table
+        self._count, self._bytes = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM metadata_cache'
+        ).fetchone()
+
+    @staticmethod
+    def make_key(kind: str, url: str, params: Optional[Dict] = None) -> str:
+        key = f"{kind}|{normalize_url(url)}"
+        if params:
+            key += '|' + json.dumps(params, sort_keys=True)
+        return key
+
+    def get(self, kind: str, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """Return a fresh cached payload, or None on miss/expiry"""
+        key = self.make_key(kind, url, params)
+        now = time.time()
+
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT payload, expires FROM metadata_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+
+            payload, expires = row
+            if expires <= now:
+                self.conn.execute('DELETE FROM metadata_cache WHERE cache_key = ?', (key,))
+                self.conn.commit()
+                self._count -= 1
+                self._bytes -= len(payload)
+                self.counters['expired'] += 1
+                self.counters['misses'] += 1
+                return None
+
+            self.conn.execute('UPDATE metadata_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+            self.conn.commit()
+            self.counters['hits'] += 1
+
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, kind: str, url: str, data: Dict, params: Optional[Dict] = None):
+        """Store a payload with the TTL for its kind, evicting LRU entries if over budget"""
+        key = self.make_key(kind, url, params)
+        payload = zlib.compress(json.dumps(_compact(data), separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        ttl = KIND_TTLS.get(kind, KIND_TTLS['search'])
+
+        with self._lock:
+            replaced = self.conn.execute(
+                'SELECT size FROM metadata_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+            if replaced:
+                self._count -= 1
+                self._bytes -= replaced[0]
+            self.conn.execute('''
+                INSERT OR REPLACE INTO metadata_cache
+                (cache_key, kind, url, payload, size, created, expires, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, kind, normalize_url(url), payload, len(payload), now, now + ttl, now))
+            self.counters['writes'] += 1
+            self._count += 1
+            self._bytes += len(payload)
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under both size limits (lock held)"""
+        while self._count > self.max_entries or self._bytes > self.max_bytes:
+            rows = self.conn.execute(
+                'SELECT cache_key, size FROM metadata_cache ORDER BY last_access LIMIT 100'
+            ).fetchall()
+            if not rows:
+                break
+
+            for cache_key, size in rows:
+                if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM metadata_cache WHERE cache_key = ?', (cache_key,))
+                self._count -= 1
+                self._bytes -= size
+                self.counters['evictions'] += 1
+
+    def purge_expired(self) -> int:
+        """Delete all expired entries, returning how many were removed"""
+        with self._lock:
+            cursor = self.conn.execute('DELETE FROM metadata_cache WHERE expires <= ?', (time.time(),))
+            self.conn.commit()
+            self._count, self._bytes = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM metadata_cache'
+            ).fetchone()
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM metadata_cache')
+            self.conn.commit()
+            self._count, self._bytes = 0, 0
+
+    def stats(self) -> Dict:
+        """Counters plus current size, broken down by kind"""
+        with self._lock:
+            by_kind = {
+                kind: {'entries': entries, 'bytes': size}
+                for kind, entries, size in self.conn.execute(
+                    'SELECT kind, COUNT(*), SUM(size) FROM metadata_cache GROUP BY kind'
+                )
+            }
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else 0,
+                'entries': sum(k['entries'] for k in by_kind.values()),
+                'bytes': sum(k['bytes'] for k in by_kind.values()),
+                'by_kind': by_kind,
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Process-wide cache instance (opened on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache()
+        return _cache
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = get_metadata_cache()
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'purge':
+        print(f"✓ Removed {cache.purge_expired()} expired entries")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'clear':
+        cache.clear()
+        print("✓ Cache cleared")
+
+    stats = cache.stats()
+    print("🗃️ Metadata Cache")
+    print("=" * 50)
+    print(f"File: {cache.cache_file}")
+    print(f"Entries: {stats['entries']:,} ({stats['bytes'] / 1024 / 1024:.1f} MB)")
+    for kind, info in stats['by_kind'].items():
+        print(f"  {kind}: {info['entries']:,} entries, {info['bytes'] / 1024:.0f} KB "
+              f"(TTL {KIND_TTLS.get(kind, 0) // 3600}h)")
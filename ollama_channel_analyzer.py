@@ -4,14 +4,18 @@ Ollama-Powered Channel Relevance Analyzer
 Fetches channel About pages and uses LLM to determine if they're relevant for outreach
 """
 
-import json
 import requests
-import subprocess
 from typing import Dict, List, Optional
 from channel_database import ChannelDatabase
+from enhanced_channel_extractor import get_channel_about_snapshot
+from llm_cache import cached_completion, format_cache_report
+from ollama_client import (
+    NO_RESPONSE, RELEVANCE_REPORT_SCHEMA, format_ollama_report, format_parse_report, generate_structured,
+    get_ollama_client
+)
 
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
 DEFAULT_MODEL = "mistral:7b-instruct"  # Using your installed model
+OLLAMA_TEMPERATURE = 0.3  # Lower temp for more consistent analysis
 
 def check_ollama_available() -> bool:
     """Check if Ollama server is running"""
@@ -21,61 +25,33 @@ def check_ollama_available() -> bool:
     except:
         return False
 
-def generate_with_ollama(prompt: str, model: str = DEFAULT_MODEL) -> str:
-    """Generate text using Ollama"""
-    try:
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.3,  # Lower temp for more consistent analysis
-                "top_p": 0.9
-            }
-        }
-        
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=90)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('response', '')
-    except Exception as e:
-        print(f"Error calling Ollama: {e}")
-    
-    return ""
+def generate_with_ollama(prompt: str, model: str = DEFAULT_MODEL, use_cache: bool = True) -> str:
+    """Generate text using Ollama (identical prompts are answered from the LLM cache)"""
+    return cached_completion('ollama', model, OLLAMA_TEMPERATURE, prompt,
+                             lambda: _call_ollama(prompt, model), use_cache)
+
+def _call_ollama(prompt: str, model: str) -> str:
+    options = {"temperature": OLLAMA_TEMPERATURE, "top_p": 0.9}
+    return get_ollama_client().generate(prompt, model, options, timeout=90)
 
 def fetch_channel_about(channel_url: str) -> Optional[Dict]:
-    """Fetch channel information using yt-dlp"""
-    try:
-        # Get channel info
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--dump-json',
-            '--playlist-items', '1',  # Just get one video for channel info
-            f"{channel_url}/videos"
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            
-            return {
-                'channel_id': data.get('channel_id', ''),
-                'channel_name': data.get('channel', ''),
-                'description': data.get('description', ''),
-                'channel_url': data.get('channel_url', ''),
-                'subscriber_count': data.get('channel_follower_count', 0),
-                'tags': data.get('tags', []),
-                'categories': data.get('categories', [])
-            }
-    except Exception as e:
-        print(f"Error fetching channel: {e}")
+    """Fetch channel information using the shared channel snapshot"""
+    snapshot = get_channel_about_snapshot(channel_url)
+    
+    if snapshot:
+        return {
+            'channel_id': snapshot.channel_id,
+            'channel_name': snapshot.channel_name,
+            'description': snapshot.description,
+            'channel_url': snapshot.channel_url,
+            'subscriber_count': snapshot.subscriber_count,
+            'tags': snapshot.tags,
+            'categories': []  # Only available per video, not per channel
+        }
     
     return None
 
-def analyze_channel_relevance(channel_data: Dict, model: str = DEFAULT_MODEL) -> Dict:
+def analyze_channel_relevance(channel_data: Dict, model: str = DEFAULT_MODEL, use_cache: bool = True) -> Dict:
     """Analyze if a channel is relevant for prepper/survival outreach"""
     
     channel_name = channel_data.get('channel_name', 'Unknown')
@@ -124,41 +100,26 @@ Respond with ONLY this JSON (no extra text):
   "positive_signals": ["why they're a good fit"]
 }}"""
 
-    print(f"  🤖 Analyzing {channel_name}...", end=' ')
+    result = generate_structured(prompt, RELEVANCE_REPORT_SCHEMA, model, OLLAMA_TEMPERATURE, use_cache)
     
-    response = generate_with_ollama(prompt, model)
+    if result.ok:
+        repaired = f" (repaired after {result.attempts} attempts)" if result.attempts > 1 else ""
+        print(f"  🤖 {channel_name}: ✓ Score: {result.data['overall_score']}/10{repaired}")
+        return result.data
     
-    if not response:
-        print("❌ Failed")
+    if NO_RESPONSE in result.errors:
+        print(f"  🤖 {channel_name}: ❌ Failed")
         return {"relevant": False, "reason": "Analysis failed"}
     
-    try:
-        # Extract JSON from response
-        start = response.find('{')
-        end = response.rfind('}') + 1
-        
-        if start >= 0 and end > start:
-            json_str = response[start:end]
-            analysis = json.loads(json_str)
-            
-            # Validate required fields
-            if 'relevant' in analysis and 'reason' in analysis:
-                score = analysis.get('overall_score', 0)
-                print(f"✓ Score: {score}/10")
-                return analysis
-    except Exception as e:
-        print(f"⚠️ Parse error: {e}")
-    
-    print("⚠️ Invalid response")
+    print(f"  🤖 {channel_name}: ⚠️ Invalid response: {'; '.join(result.errors[:3])}")
     return {"relevant": False, "reason": "Could not parse analysis"}
 
-def batch_analyze_channels(channel_ids: List[str], model: str = DEFAULT_MODEL) -> List[Dict]:
-    """Analyze multiple channels"""
-    results = []
-    
+def batch_analyze_channels(channel_ids: List[str], model: str = DEFAULT_MODEL, use_cache: bool = True) -> List[Dict]:
+    """Analyze multiple channels (Ollama calls run in parallel up to OLLAMA_NUM_PARALLEL)"""
     db = ChannelDatabase()
     db.connect()
     
+    channels = []
     for i, channel_id in enumerate(channel_ids, 1):
         print(f"\n[{i}/{len(channel_ids)}] Processing channel...")
         
@@ -168,32 +129,36 @@ def batch_analyze_channels(channel_ids: List[str], model: str = DEFAULT_MODEL) -
             print(f"  ⚠️ Channel {channel_id} not in database")
             continue
         
-        channel_url = channel['channel_url']
-        
         # Fetch additional info
         print(f"  📡 Fetching channel data...")
-        about_data = fetch_channel_about(channel_url)
+        about_data = fetch_channel_about(channel['channel_url'])
         
         if about_data:
             # Merge with database data
             combined_data = {**channel, **about_data}
         else:
-            combined_data = channel
+            combined_data = dict(channel)
             combined_data['description'] = combined_data.get('notes', '')
         
-        # Analyze relevance
-        analysis = analyze_channel_relevance(combined_data, model)
+        channels.append((channel, combined_data))
+    
+    # Analyze relevance
+    ollama = get_ollama_client()
+    print(f"\n🤖 Scoring {len(channels)} channels ({ollama.num_parallel} at a time)...")
+    analyses = ollama.map(lambda pair: analyze_channel_relevance(pair[1], model, use_cache), channels)
+    
+    results = []
+    for (channel, _), analysis in zip(channels, analyses):
+        channel_id = channel['channel_id']
         
         # Store results
-        result = {
+        results.append({
             'channel_id': channel_id,
             'channel_name': channel['channel_name'],
-            'channel_url': channel_url,
+            'channel_url': channel['channel_url'],
             'subscriber_count': channel['subscriber_count'],
             'analysis': analysis
-        }
-        
-        results.append(result)
+        })
         
         # Update database with analysis
         if analysis.get('relevant'):
@@ -300,6 +265,12 @@ def main():
     
     print("✓ Ollama server is running")
     
+    # Load the model once and keep it resident for the whole run
+    ollama = get_ollama_client()
+    load_seconds = ollama.warmup(DEFAULT_MODEL)
+    if load_seconds is not None:
+        print(f"✓ {DEFAULT_MODEL} loaded in {load_seconds:.1f}s (keep_alive {ollama.keep_alive})")
+    
     # Connect to database
     db = ChannelDatabase()
     db.connect()
@@ -318,10 +289,12 @@ def main():
     
     print(f"✓ Found {len(channels)} channels in target range")
     
-    # Let user choose how many to analyze
-    if len(sys.argv) > 1:
+    # Let user choose how many to analyze (--rescore ignores cached analyses)
+    force_rescore = '--rescore' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--rescore']
+    if args:
         try:
-            limit = int(sys.argv[1])
+            limit = int(args[0])
             channels = channels[:limit]
         except:
             pass
@@ -338,7 +311,12 @@ def main():
     print(f"\n🎯 Analyzing {len(channel_ids)} channels...")
     print("⏳ This will take a few minutes...\n")
     
-    results = batch_analyze_channels(channel_ids)
+    results = batch_analyze_channels(channel_ids, use_cache=not force_rescore)
+    print(f"\n🗃️ {format_cache_report()}")
+    print(f"🧩 {format_parse_report()}")
+    for line in format_ollama_report():
+        print(f"⚡ {line}")
+    ollama.release(DEFAULT_MODEL)
     
     # Generate report
     print("\n📝 Generating report...")
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Ollama Client
+Shared HTTP layer for local Ollama calls: one persistent session, requests
+capped at OLLAMA_NUM_PARALLEL in flight, models warmed at start and pinned
+with keep_alive for the run, and per-model load time and tokens/sec taken
+from Ollama's response timings.
+
+Structured output: a JSON schema is sent as the request's `format` so
+generation is constrained to valid JSON of the right shape, the decoded
+result is validated against the same schema, and only when that fails is
+the model asked for a bounded number of repairs. Parse outcomes are
+tallied per model.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm_cache import cached_completion, discard_completion, store_completion
+
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_NUM_PARALLEL = int(os.environ.get('OLLAMA_NUM_PARALLEL', '4'))  # Match the server's setting
+KEEP_ALIVE = "30m"  # Keeps the model loaded between channels for the whole run
+RELEASE_KEEP_ALIVE = "5m"  # Ollama's default, restored when a run finishes
+COLD_LOAD_SECONDS = 0.5  # load_duration above this means the model had to be (re)loaded
+MAX_REPAIR_ATTEMPTS = 2  # Extra calls allowed after a result fails validation
+REQUEST_TIMEOUT = 90
+NO_RESPONSE = "no response from Ollama"
+
+SCORE = {"type": "integer", "minimum": 0, "maximum": 10}
+
+# Analysis shape shared with the Claude rubric (scoring_prompts.py)
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "relevance_score": SCORE,
+        "audience_match_score": SCORE,
+        "engagement_score": SCORE,
+        "overall_score": SCORE,
+        "priority": {"type": "string", "enum": ["low", "medium", "high"]},
+        "relevant": {"type": "boolean"},
+        "reason": {"type": "string"},
+        "pitch": {"type": "string"},
+        "engagement_notes": {"type": "string"},
+    },
+    "required": ["relevance_score", "audience_match_score", "engagement_score", "overall_score",
+                 "priority", "relevant", "reason"],
+}
+
+# Variant used by ollama_channel_analyzer.py's report
+RELEVANCE_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "relevance_score": SCORE,
+        "audience_match_score": SCORE,
+        "engagement_score": SCORE,
+        "overall_score": SCORE,
+        "priority": {"type": "string", "enum": ["low", "medium", "high"]},
+        "relevant": {"type": "boolean"},
+        "reason": {"type": "string"},
+        "suggested_pitch": {"type": "string"},
+        "red_flags": {"type": "array", "items": {"type": "string"}},
+        "positive_signals": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["relevance_score", "audience_match_score", "engagement_score", "overall_score",
+                 "priority", "relevant", "reason"],
+}
+
+
+def query_list_schema(num_queries: int) -> Dict:
+    """{"queries": [...]} with exactly num_queries short strings"""
+    return {
+        "type": "object",
+        "properties": {
+            "queries": {
+                "type": "array",
+                "items": {"type": "string", "minLength": 4, "maxLength": 99},
+                "minItems": num_queries,
+                "maxItems": num_queries,
+            },
+        },
+        "required": ["queries"],
+    }
+
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'boolean': bool,
+    'integer': int,
+    'number': (int, float),
+}
+
+
+def validate(value: Any, schema: Dict, path: str = '$') -> List[str]:
+    """
+    Errors for value against the subset of JSON Schema used here
+
+    Supports type, properties, required, enum, minimum/maximum,
+    minLength/maxLength, items and minItems/maxItems. Returns [] when valid.
+    """
+    expected = schema.get('type')
+    if expected:
+        if not isinstance(value, _TYPES[expected]) or (expected in ('integer', 'number') and isinstance(value, bool)):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    errors = []
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f"{path}: {value!r} not one of {schema['enum']}")
+    if 'minimum' in schema and value < schema['minimum']:
+        errors.append(f"{path}: {value} < {schema['minimum']}")
+    if 'maximum' in schema and value > schema['maximum']:
+        errors.append(f"{path}: {value} > {schema['maximum']}")
+    if 'minLength' in schema and len(value) < schema['minLength']:
+        errors.append(f"{path}: shorter than {schema['minLength']} characters")
+    if 'maxLength' in schema and len(value) > schema['maxLength']:
+        errors.append(f"{path}: longer than {schema['maxLength']} characters")
+
+    if expected == 'object':
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{path}.{key}: missing")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors.extend(validate(value[key], subschema, f"{path}.{key}"))
+
+    if expected == 'array':
+        if 'minItems' in schema and len(value) < schema['minItems']:
+            errors.append(f"{path}: fewer than {schema['minItems']} items")
+        if 'maxItems' in schema and len(value) > schema['maxItems']:
+            errors.append(f"{path}: more than {schema['maxItems']} items")
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema.get('items', {}), f"{path}[{i}]"))
+
+    return errors
+
+
+def decode_json(text: str) -> Any:
+    """json.loads, falling back to the outermost {...} / [...] for servers that ignore `format`"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    for open_char, close_char in (('{', '}'), ('[', ']')):
+        start, end = text.find(open_char), text.rfind(close_char) + 1
+        if start >= 0 and end > start:
+            try:
+                return json.loads(text[start:end])
+            except ValueError:
+                continue
+    raise ValueError("no JSON value found in response")
+
+
+@dataclass
+class StructuredResult:
+    """A schema-checked Ollama answer"""
+    data: Optional[Any] = None
+    attempts: int = 0
+    errors: List[str] = field(default_factory=list)  # From the last failed attempt
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+
+class ParseStats:
+    """Per-model tally of first-try successes, repairs and outright failures (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_model = {}
+
+    def record(self, model: str, outcome: str):
+        with self._lock:
+            counts = self.by_model.setdefault(model, {'calls': 0, 'ok_first_try': 0, 'repaired': 0, 'failed': 0})
+            counts['calls'] += 1
+            counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                model: {
+                    **counts,
+                    'first_try_failure_rate': round(1 - counts['ok_first_try'] / counts['calls'], 3),
+                    'failure_rate': round(counts['failed'] / counts['calls'], 3),
+                }
+                for model, counts in self.by_model.items()
+            }
+
+
+_parse_stats = ParseStats()
+
+
+def get_parse_stats() -> Dict[str, Dict]:
+    return _parse_stats.snapshot()
+
+
+def format_parse_report() -> str:
+    stats = get_parse_stats()
+    if not stats:
+        return "Ollama structured output: no calls"
+    return "Ollama structured output: " + "; ".join(
+        f"{model} {s['calls']} calls, {s['repaired']} repaired, {s['failed']} failed "
+        f"({s['first_try_failure_rate']:.0%} needed a repair)"
+        for model, s in stats.items()
+    )
+
+
+class OllamaMetrics:
+    """Per-model request timings from Ollama's *_duration / *_count response fields (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_model = {}
+
+    def _entry(self, model: str) -> Dict:
+        return self.by_model.setdefault(model, {
+            'requests': 0, 'errors': 0, 'cold_loads': 0, 'load_seconds': 0.0,
+            'prompt_tokens': 0, 'prompt_seconds': 0.0, 'eval_tokens': 0, 'eval_seconds': 0.0,
+            'wall_seconds': 0.0, 'warmups': 0, 'warmup_seconds': 0.0,
+        })
+
+    def record(self, model: str, data: Dict, wall_seconds: float):
+        load = data.get('load_duration', 0) / 1e9
+        with self._lock:
+            m = self._entry(model)
+            m['requests'] += 1
+            m['load_seconds'] += load
+            m['cold_loads'] += load > COLD_LOAD_SECONDS
+            m['prompt_tokens'] += data.get('prompt_eval_count', 0)
+            m['prompt_seconds'] += data.get('prompt_eval_duration', 0) / 1e9
+            m['eval_tokens'] += data.get('eval_count', 0)
+            m['eval_seconds'] += data.get('eval_duration', 0) / 1e9
+            m['wall_seconds'] += wall_seconds
+
+    def record_warmup(self, model: str, load_seconds: float):
+        """Explicit model loads are kept out of the request, cold-load and latency figures"""
+        with self._lock:
+            m = self._entry(model)
+            m['warmups'] += 1
+            m['warmup_seconds'] += load_seconds
+
+    def record_error(self, model: str):
+        with self._lock:
+            self._entry(model)['errors'] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            stats = {}
+            for model, m in self.by_model.items():
+                if not m['requests']:
+                    stats[model] = dict(m)
+                    continue
+                stats[model] = {
+                    **m,
+                    'prompt_tokens_per_sec': round(m['prompt_tokens'] / m['prompt_seconds'], 1) if m['prompt_seconds'] else 0,
+                    'eval_tokens_per_sec': round(m['eval_tokens'] / m['eval_seconds'], 1) if m['eval_seconds'] else 0,
+                    'avg_wall_seconds': round(m['wall_seconds'] / m['requests'], 2),
+                }
+            return stats
+
+
+class OllamaClient:
+    """
+    Persistent-session Ollama client
+
+    At most num_parallel requests are in flight; more would only queue
+    inside the server. Every request carries keep_alive so the model stays
+    resident between calls.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, num_parallel: int = OLLAMA_NUM_PARALLEL,
+                 keep_alive: str = KEEP_ALIVE):
+        self.base_url = base_url.rstrip('/')
+        self.num_parallel = max(1, num_parallel)
+        self.keep_alive = keep_alive
+        self.metrics = OllamaMetrics()
+        self._slots = threading.BoundedSemaphore(self.num_parallel)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.num_parallel)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _post(self, payload: Dict, timeout: float, endpoint: str = '/api/generate',
+              record: bool = True) -> Optional[Dict]:
+        """POST to Ollama; record=False leaves the call out of the request metrics"""
+        model = payload['model']
+        start = time.perf_counter()
+        try:
+            with self._slots:
+                response = self.session.post(f"{self.base_url}{endpoint}", json=payload, timeout=timeout)
+            if response.status_code == 200:
+                data = response.json()
+                if record:
+                    self.metrics.record(model, data, time.perf_counter() - start)
+                return data
+            print(f"Error calling Ollama: HTTP {response.status_code}")
+        except Exception as e:
+            print(f"Error calling Ollama: {e}")
+        self.metrics.record_error(model)
+        return None
+
+    def generate(self, prompt: str, model: str, options: Optional[Dict] = None,
+                 format: Optional[Dict] = None, timeout: float = REQUEST_TIMEOUT) -> str:
+        """Non-streaming completion text ('' on failure)"""
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": options or {},
+        }
+        if format is not None:
+            payload["format"] = format
+
+        data = self._post(payload, timeout)
+        return data.get('response', '') if data else ""
+
+    def embed(self, texts: List[str], model: str, timeout: float = REQUEST_TIMEOUT) -> Optional[List[List[float]]]:
+        """Embedding vectors for texts, in order (None on failure)"""
+        payload = {"model": model, "input": texts, "keep_alive": self.keep_alive}
+        data = self._post(payload, timeout, endpoint='/api/embed')
+        if not data or len(data.get('embeddings', [])) != len(texts):
+            return None
+        return data['embeddings']
+
+    def warmup(self, model: str, timeout: float = 300) -> Optional[float]:
+        """Load the model and pin it with keep_alive; returns the load time in seconds"""
+        data = self._post({"model": model, "keep_alive": self.keep_alive}, timeout, record=False)
+        if data is None:
+            return None
+        load_seconds = data.get('load_duration', 0) / 1e9
+        self.metrics.record_warmup(model, load_seconds)
+        return load_seconds
+
+    def release(self, model: str):
+        """Hand the model back to Ollama's normal unload timer"""
+        self._post({"model": model, "keep_alive": RELEASE_KEEP_ALIVE}, timeout=30, record=False)
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """fn over items with up to num_parallel calls in flight; results in input order"""
+        items = list(items)
+        if self.num_parallel == 1 or len(items) < 2:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.num_parallel) as executor:
+            return list(executor.map(fn, items))
+
+    def stats(self) -> Dict:
+        return {
+            'num_parallel': self.num_parallel,
+            'keep_alive': self.keep_alive,
+            'models': self.metrics.snapshot(),
+        }
+
+    def format_report(self) -> List[str]:
+        lines = []
+        for model, m in self.metrics.snapshot().items():
+            warm = f", warmed up in {m['warmup_seconds']:.1f}s" if m['warmups'] else ""
+            if not m['requests']:
+                lines.append(f"Ollama {model}: {m['errors']} failed requests{warm}")
+                continue
+            lines.append(
+                f"Ollama {model}: {m['requests']} requests ({m['errors']} failed), "
+                f"{m['eval_tokens_per_sec']} tok/s generation, {m['prompt_tokens_per_sec']} tok/s prompt, "
+                f"{m['cold_loads']} cold loads ({m['load_seconds']:.1f}s loading){warm}, "
+                f"avg {m['avg_wall_seconds']}s per request at parallel={self.num_parallel}"
+            )
+        return lines
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Process-wide client (created on first use)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
+
+
+def format_ollama_report() -> List[str]:
+    return get_ollama_client().format_report()
+
+
+def _call_ollama(prompt: str, model: str, schema: Dict, temperature: float, timeout: float) -> str:
+    return get_ollama_client().generate(prompt, model, {"temperature": temperature, "top_p": 0.9},
+                                        format=schema, timeout=timeout)
+
+
+def _check(text: str, schema: Dict):
+    """(decoded value, errors)"""
+    try:
+        value = decode_json(text)
+    except ValueError as e:
+        return None, [str(e)]
+    return value, validate(value, schema)
+
+
+def _repair_prompt(prompt: str, text: str, errors: List[str]) -> str:
+    return (
+        f"{prompt}\n\n"
+        f"Your previous answer was:\n{text[:2000]}\n\n"
+        f"It did not match the required JSON format:\n"
+        + "\n".join(f"- {error}" for error in errors[:10])
+        + "\n\nRespond again with ONLY the corrected JSON."
+    )
+
+
+def generate_structured(prompt: str, schema: Dict, model: str, temperature: float,
+                        use_cache: bool = True, max_repairs: int = MAX_REPAIR_ATTEMPTS,
+                        timeout: float = REQUEST_TIMEOUT) -> StructuredResult:
+    """
+    Generate JSON constrained to `schema` and validate it
+
+    The first answer goes through the LLM cache (keyed with the schema). A
+    result that fails to decode or validate is dropped from the cache and
+    the model is re-asked with the errors, up to max_repairs times; a
+    repaired answer is cached under the original prompt.
+    """
+    extra = {'format': schema}
+    text = cached_completion('ollama', model, temperature, prompt,
+                             lambda: _call_ollama(prompt, model, schema, temperature, timeout),
+                             use_cache, extra)
+    if not text:
+        return StructuredResult(None, attempts=1, errors=[NO_RESPONSE])  # Transport failure, not a parse failure
+
+    value, errors = _check(text, schema)
+    if not errors:
+        _parse_stats.record(model, 'ok_first_try')
+        return StructuredResult(value, attempts=1)
+
+    discard_completion('ollama', model, temperature, prompt, extra)
+
+    attempt = 1  # Stays 1 when max_repairs=0 and the loop never runs
+    for attempt in range(2, max_repairs + 2):
+        repaired = _call_ollama(_repair_prompt(prompt, text, errors), model, schema, temperature, timeout)
+        if not repaired:
+            break
+        text = repaired
+        value, errors = _check(text, schema)
+        if not errors:
+            store_completion('ollama', model, temperature, prompt, text, extra)
+            _parse_stats.record(model, 'repaired')
+            return StructuredResult(value, attempts=attempt)
+
+    _parse_stats.record(model, 'failed')
+    return StructuredResult(None, attempts=attempt, errors=errors)
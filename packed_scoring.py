@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Packed Multi-Channel Scoring
+Scores several channels per LLM call: the shared rubric is sent once and
+the model answers with a JSON array keyed by channel_id. Packs are sized by
+count and by an input/output token budget. Entries that come back missing
+or malformed are re-scored one channel at a time.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Dict, List
+
+from claude_scoring import estimate_tokens
+from scoring_prompts import build_channel_prompt
+
+PACK_SIZE = 6  # Max channels per call
+PACK_INPUT_TOKENS = 6000  # Budget for the channel blocks in one call
+OUTPUT_TOKENS_PER_CHANNEL = 250  # Rough size of one analysis object
+MAX_OUTPUT_TOKENS = 2048  # Matches the max_tokens used for scoring calls
+
+SCORE_FIELDS = ('relevance_score', 'audience_match_score', 'engagement_score', 'overall_score')
+
+
+def plan_packs(channels: List[Dict], pack_size: int = PACK_SIZE,
+               input_budget: int = PACK_INPUT_TOKENS) -> List[List[Dict]]:
+    """Greedily group channels so each pack fits the count and token budgets"""
+    max_channels = max(1, min(pack_size, MAX_OUTPUT_TOKENS // OUTPUT_TOKENS_PER_CHANNEL))
+    packs, current, current_tokens = [], [], 0
+
+    for channel in channels:
+        tokens = estimate_tokens(build_channel_prompt(channel))
+        if current and (len(current) >= max_channels or current_tokens + tokens > input_budget):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(channel)
+        current_tokens += tokens
+
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_prompt(channels: List[Dict]) -> str:
+    """Channel blocks for one call, each tagged with its channel_id"""
+    blocks = [
+        f"CHANNEL_ID: {channel['channel_id']}\n{build_channel_prompt(channel)}"
+        for channel in channels
+    ]
+    ids = ', '.join(channel['channel_id'] for channel in channels)
+    return (
+        f"Evaluate each of the following {len(channels)} channels independently.\n\n"
+        + "\n\n---\n\n".join(blocks)
+        + f"\n\n---\n\nRespond with ONLY a JSON array containing one object per channel "
+          f"({ids}). Each object has \"channel_id\" plus exactly the fields described above."
+    )
+
+
+def _valid_analysis(entry) -> bool:
+    if not isinstance(entry, dict) or not isinstance(entry.get('relevant'), bool):
+        return False
+    for field in SCORE_FIELDS:
+        value = entry.get(field)
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 10:
+            return False
+    return True
+
+
+def parse_packed_response(response: str, expected_ids: List[str]) -> Dict[str, Dict]:
+    """Valid analyses from a JSON array response, keyed by channel_id"""
+    if not response:
+        return {}
+    try:
+        start = response.find('[')
+        end = response.rfind(']') + 1
+        entries = json.loads(response[start:end]) if start >= 0 and end > start else []
+    except ValueError:
+        return {}
+
+    expected = set(expected_ids)
+    results = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not _valid_analysis(entry):
+            continue
+        channel_id = str(entry.pop('channel_id', ''))
+        if channel_id in expected and channel_id not in results:
+            results[channel_id] = entry
+    return results
+
+
+class PackedScorer:
+    """
+    Scores lists of channels in packs, falling back to single-channel scoring
+
+    Args:
+        generate: (system_prompt, user_prompt) -> raw response text
+        system_prompt: Rubric + product context shared by every pack
+        score_single: (channel) -> analysis, used for anything a pack didn't return
+    """
+
+    def __init__(self, generate: Callable[[str, str], str], system_prompt: str,
+                 score_single: Callable[[Dict], Dict], pack_size: int = PACK_SIZE,
+                 input_budget: int = PACK_INPUT_TOKENS):
+        self.generate = generate
+        self.system_prompt = system_prompt
+        self.score_single = score_single
+        self.pack_size = pack_size
+        self.input_budget = input_budget
+        self._lock = threading.Lock()
+        self.stats = {'channels': 0, 'packed_calls': 0, 'packed_ok': 0, 'fallbacks': 0,
+                      'packed_seconds': 0.0, 'fallback_seconds': 0.0}
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def score_pack(self, channels: List[Dict]) -> Dict[str, Dict]:
+        """Score one pack; every channel_id gets an analysis"""
+        if len(channels) == 1:
+            start = time.perf_counter()
+            analysis = self.score_single(channels[0])
+            self._count(channels=1, fallbacks=1, fallback_seconds=time.perf_counter() - start)
+            return {channels[0]['channel_id']: analysis}
+
+        start = time.perf_counter()
+        response = self.generate(self.system_prompt, build_packed_prompt(channels))
+        results = parse_packed_response(response, [c['channel_id'] for c in channels])
+        self._count(channels=len(channels), packed_calls=1, packed_ok=len(results),
+                    packed_seconds=time.perf_counter() - start)
+
+        for channel in channels:
+            if channel['channel_id'] not in results:
+                start = time.perf_counter()
+                results[channel['channel_id']] = self.score_single(channel)
+                self._count(fallbacks=1, fallback_seconds=time.perf_counter() - start)
+        return results
+
+    def score_channels(self, channels: List[Dict]) -> Dict[str, Dict]:
+        """Score a whole list, pack by pack"""
+        results = {}
+        for pack in plan_packs(channels, self.pack_size, self.input_budget):
+            results.update(self.score_pack(pack))
+        return results
+
+    def summary(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+        calls = s['packed_calls'] + s['fallbacks']
+        return (f"Packed scoring: {s['channels']} channels in {calls} calls "
+                f"({s['packed_calls']} packed, {s['packed_ok']} answered in packs, "
+                f"{s['fallbacks']} single-channel) | {s['packed_seconds']:.1f}s packed, "
+                f"{s['fallback_seconds']:.1f}s single")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Query Bandit
+Thompson-sampling scheduler over search queries. Every query starts with a
+normal ytsearchN; once the channels it found have cleared the farm filter,
+the bandit picks which queries get a deeper search (ytsearch2N, 4N, ... up
+to MAX_DEPTH) and abandons the ones whose yield is too low to be worth
+another yt-dlp call.
+
+A fetched video pays when its channel is new to the run and passes the farm
+filter, and pays again when the LLM marks the channel relevant, so reward
+per video is (usable + relevant) / 2. Priors come from each query's totals
+in search_terms (see ChannelDatabase.record_query_yield); queries that paid
+off in earlier runs are expanded first.
+
+Usage:
+    python query_bandit.py [limit]     # per-query yield table, best first
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from channel_database import ChannelDatabase, DATABASE_FILE
+from query_novelty import normalize_query
+
+MAX_DEPTH = 40  # Deepest ytsearchN the bandit will ask for
+EXPANSION_BUDGET = 1.0  # Extra searches per run, as a fraction of the initial queries
+ABANDON_YIELD = 0.1  # Posterior mean reward per video below which a query is dropped
+RELATIVE_ABANDON = 0.4  # ... or below this fraction of the best live query's mean
+MIN_VIDEOS_TO_ABANDON = 5
+PRIOR_VIDEOS = 10  # How many videos' worth of weight a query's history gets
+SEED_QUERIES = 5  # Top-yield past queries shown to the query generator
+
+
+def video_reward(usable: int, relevant: int) -> float:
+    return (usable + relevant) / 2
+
+
+@dataclass
+class Arm:
+    query: str
+    alpha: float
+    beta: float
+    depth: int = 0
+    searches: int = 0
+    videos: int = 0
+    usable: int = 0
+    relevant: int = 0
+    exhausted: bool = False  # A deeper search found no new videos
+    abandoned: bool = False
+
+    def posterior(self) -> Tuple[float, float]:
+        reward = min(video_reward(self.usable, self.relevant), self.videos)
+        return self.alpha + reward, self.beta + self.videos - reward
+
+    @property
+    def mean(self) -> float:
+        a, b = self.posterior()
+        return a / (a + b)
+
+
+class QueryBandit:
+    """
+    Batched Thompson sampling: each round samples every live query's yield
+    and expands the better half (at most one per search worker) until the
+    budget is spent
+    """
+
+    def __init__(self, base_depth: int, history: Optional[Dict[str, Dict]] = None,
+                 max_depth: int = MAX_DEPTH, budget: Optional[int] = None,
+                 abandon_below: float = ABANDON_YIELD, seed: Optional[int] = None):
+        self.base_depth = base_depth
+        self.history = history or {}
+        self.max_depth = max_depth
+        self.budget = budget  # None = EXPANSION_BUDGET x initial queries, set at the first round
+        self.abandon_below = abandon_below
+        self.rng = np.random.default_rng(seed)
+
+        self.arms: Dict[str, Arm] = {}
+        self.expansions = 0
+
+        videos = sum(h.get('videos_fetched') or 0 for h in self.history.values())
+        reward = sum(video_reward(h.get('passed_farm_filter') or 0, h.get('relevant_channels') or 0)
+                     for h in self.history.values())
+        self.global_rate = reward / videos if videos else 0.5
+
+    def _prior(self, query: str) -> Tuple[float, float]:
+        past = self.history.get(normalize_query(query))
+        rate = self.global_rate
+        weight = PRIOR_VIDEOS / 2  # Unseen queries: weak prior around the historical average
+        if past and past.get('videos_fetched'):
+            rate = video_reward(past.get('passed_farm_filter') or 0,
+                                past.get('relevant_channels') or 0) / past['videos_fetched']
+            weight = min(PRIOR_VIDEOS, past['videos_fetched'])
+        rate = min(max(rate, 0.0), 1.0)
+        return 1 + rate * weight, 1 + (1 - rate) * weight
+
+    def arm(self, query: str) -> Arm:
+        if query not in self.arms:
+            self.arms[query] = Arm(query, *self._prior(query))
+        return self.arms[query]
+
+    def record_search(self, query: str, depth: int, new_videos: int):
+        arm = self.arm(query)
+        arm.searches += 1
+        arm.videos += new_videos
+        if arm.depth and new_videos == 0:
+            arm.exhausted = True
+        arm.depth = max(arm.depth, depth)
+
+    def record_usable(self, query: str):
+        self.arm(query).usable += 1
+
+    def record_relevant(self, query: str):
+        self.arm(query).relevant += 1
+
+    def next_round(self, max_picks: int) -> List[Tuple[str, int]]:
+        """(query, deeper depth) pairs to search next; empty when the bandit is done"""
+        if self.budget is None:
+            self.budget = max(1, round(len(self.arms) * EXPANSION_BUDGET))
+
+        live = [arm for arm in self.arms.values()
+                if not (arm.abandoned or arm.exhausted or arm.depth >= self.max_depth)]
+        if not live:
+            return []
+        floor = max(self.abandon_below, RELATIVE_ABANDON * max(arm.mean for arm in live))
+
+        candidates = []
+        for arm in live:
+            if arm.videos >= MIN_VIDEOS_TO_ABANDON and arm.mean < floor:
+                arm.abandoned = True
+                continue
+            candidates.append((self.rng.beta(*arm.posterior()), arm.query))
+
+        candidates.sort(reverse=True)
+        picks = []
+        for _, query in candidates[:min(max_picks, self.budget, (len(candidates) + 1) // 2)]:
+            arm = self.arms[query]
+            picks.append((query, min(max(arm.depth, self.base_depth) * 2, self.max_depth)))
+        self.budget -= len(picks)
+        self.expansions += len(picks)
+        return picks
+
+    def summary_lines(self) -> List[str]:
+        arms = list(self.arms.values())
+        searches = sum(a.searches for a in arms)
+        usable = sum(a.usable for a in arms)
+        relevant = sum(a.relevant for a in arms)
+        lines = [
+            f"Query bandit: {len(arms)} queries, {self.expansions} deeper searches, "
+            f"{sum(a.abandoned for a in arms)} abandoned, {sum(a.exhausted for a in arms)} exhausted"
+        ]
+        if searches:
+            lines.append(f"  {usable / searches:.1f} usable and {relevant / searches:.1f} relevant channels per search")
+        for arm in sorted(arms, key=lambda a: a.mean, reverse=True)[:5]:
+            state = 'abandoned' if arm.abandoned else 'exhausted' if arm.exhausted else f'depth {arm.depth}'
+            lines.append(f"  {arm.mean:.2f} \"{arm.query}\" ({arm.videos} videos, {arm.usable} usable, "
+                         f"{arm.relevant} relevant, {state})")
+        return lines
+
+
+def load_query_history(db_file: str = DATABASE_FILE) -> Dict[str, Dict]:
+    """Accumulated yield per search term (empty if the database has none yet)"""
+    db = ChannelDatabase(db_file)
+    db.connect()
+    try:
+        db.create_query_yield_columns()
+        return db.get_query_yields()
+    except Exception as e:
+        print(f"⚠️ Could not load query yields: {e}")
+        return {}
+    finally:
+        db.close()
+
+
+def top_yield_queries(limit: int = SEED_QUERIES, db_file: str = DATABASE_FILE) -> List[str]:
+    """Past queries that found the most relevant channels per search, to seed query generation"""
+    db = ChannelDatabase(db_file)
+    db.connect()
+    try:
+        db.create_query_yield_columns()
+        return [row['search_term'] for row in db.get_top_yield_queries(limit)]
+    except Exception as e:
+        print(f"⚠️ Could not load top queries: {e}")
+        return []
+    finally:
+        db.close()
+
+
+def main():
+    print("🎰 Query Yield")
+    print("=" * 60)
+
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    history = load_query_history()
+    if not history:
+        print("No query yields recorded yet (run a discovery workflow first)")
+        return
+
+    rows = sorted(history.values(),
+                  key=lambda h: ((h['relevant_channels'] or 0) / h['searches'],
+                                 (h['passed_farm_filter'] or 0) / h['searches']),
+                  reverse=True)
+    print(f"{'relevant/search':>15} {'usable/search':>13} {'searches':>8} {'depth':>5}  query")
+    for h in rows[:limit]:
+        print(f"{(h['relevant_channels'] or 0) / h['searches']:>15.2f} "
+              f"{(h['passed_farm_filter'] or 0) / h['searches']:>13.2f} "
+              f"{h['searches']:>8} {h['max_depth'] or 0:>5}  {h['search_term']}")
+
+    total_searches = sum(h['searches'] for h in history.values())
+    total_relevant = sum(h['relevant_channels'] or 0 for h in history.values())
+    total_scored = sum(h['llm_scored'] or 0 for h in history.values())
+    print(f"\n{len(history)} queries, {total_searches} searches, {total_relevant} relevant channels "
+          f"({total_relevant / total_searches:.2f} per search, "
+          f"{total_relevant / total_scored if total_scored else 0:.0%} of LLM-scored channels)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Query Novelty Filter
+Rejects generated search queries that are near-duplicates of queries already
+run (search_terms table + this session's queries) before yt-dlp is called.
+"prepping for beginners" and "beginner prepping guide" return the same
+channels, so only one of them is worth a search.
+
+Similarity is cosine over Ollama embeddings (cached per query in
+youtube_channels.db, query_embeddings). When Ollama isn't running it falls
+back to MinHash over character shingles of lightly stemmed words, which
+catches reordered and re-inflected phrasings but not synonyms.
+
+Usage:
+    python query_novelty.py "query one" "query two" ...   # check candidates against history
+"""
+
+import re
+import sqlite3
+import sys
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from channel_database import ChannelDatabase, DATABASE_FILE
+from ollama_client import get_ollama_client
+from semantic_prefilter import EMBEDDING_MODEL, EMBED_BATCH, _normalize
+
+EMBEDDING_DUPLICATE_SIMILARITY = 0.86  # Cosine at or above this = same search
+MINHASH_DUPLICATE_SIMILARITY = 0.6  # Estimated shingle Jaccard at or above this = same search
+MINHASH_PERMUTATIONS = 64
+MINHASH_PRIME = 4294967311  # Smallest prime above 2^32
+
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'for', 'of', 'to', 'in', 'on', 'with', 'how', 'your', 'my',
+    'is', 'are', 'at', 'by', 'from', 'vs', 'or',
+}
+SUFFIXES = ('ing', 'ers', 'er', 'es', 's')
+
+_rng = np.random.default_rng(20240101)  # Fixed seed: signatures must match across runs
+# Drawn below 2^32 (not up to the prime) so a*h + b can't overflow uint64 in minhash_signature
+_PERM_A = _rng.integers(1, 2 ** 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 2 ** 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalize_query(query: str) -> str:
+    return ' '.join(re.findall(r"[a-z0-9']+", query.lower()))
+
+
+def _stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def shingles(query: str) -> set:
+    """Character trigrams of each stemmed content word (word order doesn't matter)"""
+    words = [_stem(w) for w in normalize_query(query).split() if w not in STOPWORDS]
+    grams = set()
+    for word in words:
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def minhash_signature(query: str) -> np.ndarray:
+    grams = shingles(query)
+    if not grams:
+        return np.full(MINHASH_PERMUTATIONS, MINHASH_PRIME, dtype=np.uint64)
+    hashes = np.array([zlib.crc32(g.encode('utf-8')) for g in grams], dtype=np.uint64)
+    # a, b, h < 2^32, so a*h + b <= (2^32 - 1)^2 + 2^32 - 1 < 2^64 fits in uint64
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % MINHASH_PRIME).min(axis=0)
+
+
+class QueryNoveltyFilter:
+    """
+    Near-duplicate gate for search queries
+
+    filter() returns (novel, rejected) and also dedupes candidates against
+    each other, so one generated batch can't contain two phrasings of the same
+    search.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, threshold: float = EMBEDDING_DUPLICATE_SIMILARITY,
+                 minhash_threshold: float = MINHASH_DUPLICATE_SIMILARITY, use_embeddings: bool = True,
+                 db_file: str = DATABASE_FILE):
+        self.model = model
+        self.threshold = threshold
+        self.minhash_threshold = minhash_threshold
+        self.use_embeddings = use_embeddings
+        self.db_file = db_file
+
+        self._tables_ready = False
+        self.counts = {'checked': 0, 'novel': 0, 'rejected': 0, 'exact': 0,
+                       'embedding_checks': 0, 'minhash_checks': 0, 'cache_hits': 0}
+        self.rejected: List[Dict] = []
+
+    def _db(self) -> ChannelDatabase:
+        db = ChannelDatabase(self.db_file)
+        db.connect()
+        if not self._tables_ready:
+            db.create_embedding_tables()
+            self._tables_ready = True
+        return db
+
+    def history(self, extra: Iterable[str] = ()) -> List[str]:
+        """Every query already run: search_terms plus extra (e.g. this session's queries)"""
+        db = self._db()
+        try:
+            terms = [row['search_term'] for row in db.get_all_search_terms()]
+        except sqlite3.OperationalError:  # Fresh database without search_terms yet
+            terms = []
+        finally:
+            db.close()
+        seen, queries = set(), []
+        for query in list(terms) + list(extra):
+            key = normalize_query(query)
+            if key and key not in seen:
+                seen.add(key)
+                queries.append(key)
+        return queries
+
+    def remember(self, queries: List[str], source: str):
+        """Record queries in search_terms so later runs compare against them"""
+        db = self._db()
+        try:
+            for query in queries:
+                db.add_search_term(normalize_query(query), source)
+        finally:
+            db.close()
+
+    def embed(self, queries: List[str]) -> Optional[Dict[str, np.ndarray]]:
+        """Normalized embeddings by query (cached in the DB); None if any query can't be embedded"""
+        db = self._db()
+        try:
+            cached = db.get_query_embeddings(self.model, queries)
+            self.counts['cache_hits'] += len(cached)
+            vectors = {q: np.frombuffer(blob, dtype=np.float32) for q, blob in cached.items()}
+
+            missing = [q for q in queries if q not in vectors]
+            client = get_ollama_client()
+            for start in range(0, len(missing), EMBED_BATCH):
+                chunk = missing[start:start + EMBED_BATCH]
+                embedded = client.embed(chunk, self.model)
+                if embedded is None:
+                    return None
+                fresh = {q: _normalize(v) for q, v in zip(chunk, embedded)}
+                vectors.update(fresh)
+                db.save_query_embeddings(self.model, {q: v.tobytes() for q, v in fresh.items()},
+                                         len(embedded[0]))
+            return vectors
+        finally:
+            db.close()
+
+    def filter(self, candidates: List[str], history: Optional[List[str]] = None,
+               extra_history: Iterable[str] = ()) -> Tuple[List[str], List[Dict]]:
+        """(novel queries in input order, rejections with the query each one duplicates)"""
+        if history is None:
+            history = self.history(extra_history)
+        keys = [normalize_query(q) for q in candidates]
+
+        vectors = self.embed(list(dict.fromkeys(history + [k for k in keys if k]))) if self.use_embeddings else None
+        method = 'embedding' if vectors is not None else 'minhash'
+        if method == 'embedding':
+            represent, threshold = (lambda q: vectors[q]), self.threshold
+        else:
+            represent, threshold = minhash_signature, self.minhash_threshold
+
+        pool_queries = list(history)
+        pool = [represent(q) for q in pool_queries]
+        seen = set(pool_queries)
+
+        novel, rejected = [], []
+        for query, key in zip(candidates, keys):
+            self.counts['checked'] += 1
+            if not key:
+                continue
+            if key in seen:
+                rejection = {'query': query, 'match': key, 'similarity': 1.0, 'method': 'exact'}
+                self.counts['exact'] += 1
+            else:
+                self.counts[f'{method}_checks'] += 1
+                rejection = None
+                vector = represent(key)
+                if pool:
+                    if method == 'embedding':
+                        sims = np.vstack(pool) @ vector
+                    else:
+                        sims = (np.vstack(pool) == vector).mean(axis=1)
+                    best = int(np.argmax(sims))
+                    if sims[best] >= threshold:
+                        rejection = {'query': query, 'match': pool_queries[best],
+                                     'similarity': round(float(sims[best]), 3), 'method': method}
+                if rejection is None:
+                    novel.append(query)
+                    seen.add(key)
+                    pool_queries.append(key)
+                    pool.append(vector)
+                    continue
+
+            rejected.append(rejection)
+        self.counts['novel'] += len(novel)
+        self.counts['rejected'] += len(rejected)
+        self.rejected.extend(rejected)
+        return novel, rejected
+
+    def summary_lines(self, results_per_query: int) -> List[str]:
+        c = self.counts
+        lines = [
+            f"Query novelty: {c['checked']} candidates, {c['novel']} novel, {c['rejected']} near-duplicates "
+            f"rejected ({c['exact']} exact, {c['embedding_checks']} embedding / {c['minhash_checks']} MinHash checks)"
+        ]
+        if c['rejected']:
+            lines.append(
+                f"  ≈{c['rejected']} YouTube searches and ~{c['rejected'] * results_per_query} channel lookups saved"
+            )
+        return lines
+
+
+def main():
+    print("♻️ Query Novelty Filter")
+    print("=" * 60)
+
+    candidates = sys.argv[1:]
+    if not candidates:
+        print(__doc__)
+        return
+
+    novelty = QueryNoveltyFilter()
+    history = novelty.history()
+    print(f"History: {len(history):,} past queries")
+
+    novel, rejected = novelty.filter(candidates, history)
+    for query in novel:
+        print(f"  ✓ {query}")
+    for r in rejected:
+        print(f"  ✗ {r['query']}  ≈ '{r['match']}' ({r['method']} {r['similarity']:.2f})")
+    print()
+    for line in novelty.summary_lines(results_per_query=5):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Learned Relevance Ranker
+A NumPy-only logistic model trained offline on past LLM verdicts in
+channel_analyses. Features are TF-IDF over the channel name + description
+plus the Tier 1 metrics from calculate_engagement_metrics; the target is
+overall_score / 10, so 10 * sigmoid(w·x) is a predicted LLM score.
+Workflows use it to rank channels and skip the ones the LLM would almost
+certainly reject before spending a Claude call on them.
+
+Text features are kept sparse (CSR arrays + np.bincount), so scoring the
+whole channels table takes a few seconds per 100k rows.
+
+Usage:
+    python relevance_ranker.py train               # fit on every labeled channel, save weights
+    python relevance_ranker.py evaluate            # hold-out metrics (trains on the rest)
+    python relevance_ranker.py rank [limit]        # predicted scores for unscored channels
+"""
+
+import json
+import math
+import re
+import sys
+import time
+import warnings
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from channel_database import ChannelDatabase
+
+WEIGHTS_FILE = "relevance_ranker.npz"
+MAX_VOCAB = 20000
+MIN_DF = 2  # Terms must appear in this many training channels
+DESCRIPTION_CHARS = 2000
+EPOCHS = 400
+LEARNING_RATE = 0.05
+L2 = 1e-4
+SKIP_SCORE = 3.0  # Predicted LLM scores below this are skipped
+RELEVANT_SCORE = 7  # overall_score at which a verdict counts as relevant, for evaluation
+TEST_FRACTION = 0.2
+MIN_TRAINING_CHANNELS = 50
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'+-]{1,}")
+STOPWORDS = frozenset(
+    "the and for you your with this that are our from have will all www http https com "
+    "channel youtube videos video subscribe new can about more what how its not but".split()
+)
+GROWTH_TRENDS = ('rapid', 'growing', 'stable', 'declining')
+
+# (feature name, channel keys tried in order, log-scale)
+NUMERIC_FEATURES = [
+    ('subscribers', ('subscriber_count',), True),
+    ('avg_views', ('avg_views_per_video', 'avg_views'), True),
+    ('median_views', ('median_views',), True),
+    ('engagement_rate', ('engagement_rate',), False),
+    ('view_rate', ('view_rate',), True),
+    ('total_videos', ('total_video_count',), True),
+    ('avg_video_length', ('avg_video_length',), True),
+    ('upload_frequency', ('upload_frequency',), True),
+    ('videos_last_30_days', ('videos_last_30_days',), False),
+    ('consistency', ('consistency_score',), False),
+    ('viral_count', ('recent_viral_count',), False),
+]
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def channel_text(channel: Dict) -> str:
+    description = channel.get('channel_description') or channel.get('description') or ''
+    return f"{channel.get('channel_name') or ''} {description[:DESCRIPTION_CHARS]}"
+
+
+def numeric_row(channel: Dict) -> List[float]:
+    """Raw Tier 1 features; NaN where a metric is missing"""
+    row = []
+    for _, keys, log_scale in NUMERIC_FEATURES:
+        value = next((channel.get(k) for k in keys if channel.get(k) is not None), None)
+        try:
+            value = float(value)
+            row.append(math.log1p(max(value, 0)) if log_scale else value)
+        except (TypeError, ValueError):
+            row.append(float('nan'))
+
+    trend = channel.get('growth_trend')
+    row.extend(1.0 if trend == t else 0.0 for t in GROWTH_TRENDS)
+    row.append(1.0 if channel.get('business_email') else 0.0)
+    row.append(1.0 if channel.get('website_url') else 0.0)
+    row.append(1.0 if channel.get('has_affiliate_store') else 0.0)
+    row.append(1.0 if channel.get('has_patreon') else 0.0)
+    row.append(1.0 if not (channel.get('channel_description') or channel.get('description')) else 0.0)
+    return row
+
+
+def numeric_feature_names() -> List[str]:
+    return ([name for name, _, _ in NUMERIC_FEATURES] + [f'trend_{t}' for t in GROWTH_TRENDS]
+            + ['has_email', 'has_website', 'has_store', 'has_patreon', 'no_description'])
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class SparseRows:
+    """Row-major sparse matrix (CSR) with the two products training needs"""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_rows = len(indptr) - 1
+        self.n_cols = n_cols
+        self.row_ids = np.repeat(np.arange(self.n_rows), np.diff(indptr))
+
+    def dot(self, w: np.ndarray) -> np.ndarray:
+        """X @ w"""
+        return np.bincount(self.row_ids, weights=self.data * w[self.indices], minlength=self.n_rows)
+
+    def t_dot(self, g: np.ndarray) -> np.ndarray:
+        """X.T @ g"""
+        return np.bincount(self.indices, weights=self.data * g[self.row_ids], minlength=self.n_cols)
+
+
+class RelevanceRanker:
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.w_text = np.zeros(0)
+        self.w_num = np.zeros(len(numeric_feature_names()))
+        self.bias = 0.0
+        self.num_mean = np.zeros(len(numeric_feature_names()))
+        self.num_std = np.ones(len(numeric_feature_names()))
+        self.meta: Dict = {}
+
+    # -- features --------------------------------------------------------------
+
+    def _build_vocab(self, channels: List[Dict]):
+        df = Counter()
+        for channel in channels:
+            df.update(set(tokenize(channel_text(channel))))
+        terms = [t for t, n in df.most_common() if n >= MIN_DF][:MAX_VOCAB]
+        self.vocab = {term: i for i, term in enumerate(sorted(terms))}
+        n_docs = len(channels)
+        self.idf = np.array([math.log((1 + n_docs) / (1 + df[t])) + 1 for t in sorted(terms)], dtype=np.float32)
+
+    def text_features(self, channels: List[Dict]) -> SparseRows:
+        """Sublinear TF-IDF rows, L2-normalized"""
+        vocab = self.vocab
+        indptr, indices, counts = [0], [], []
+        for channel in channels:
+            row = Counter(vocab[t] for t in tokenize(channel_text(channel)) if t in vocab)
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        indptr = np.array(indptr)
+        indices = np.array(indices, dtype=np.int64)
+        data = (1 + np.log(np.array(counts, dtype=np.float64))) * self.idf[indices]
+        rows = SparseRows(indptr, indices, data, len(vocab))
+        norms = np.sqrt(np.bincount(rows.row_ids, weights=data * data, minlength=rows.n_rows))
+        rows.data = data / np.where(norms > 0, norms, 1.0)[rows.row_ids]
+        return rows
+
+    def numeric_features(self, channels: List[Dict], fit: bool = False) -> np.ndarray:
+        raw = np.array([numeric_row(c) for c in channels], dtype=np.float64).reshape(len(channels), -1)
+        if fit and len(raw):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # Metrics no training channel has
+                mean, std = np.nanmean(raw, axis=0), np.nanstd(raw, axis=0)
+            self.num_mean = np.nan_to_num(mean)
+            self.num_std = np.where(np.nan_to_num(std) > 0, np.nan_to_num(std), 1.0)
+        standardized = (raw - self.num_mean) / self.num_std
+        return np.nan_to_num(standardized)  # Missing metrics sit at the training mean
+
+    # -- training / prediction -------------------------------------------------
+
+    def fit(self, channels: List[Dict], scores: List[float], epochs: int = EPOCHS,
+            learning_rate: float = LEARNING_RATE, l2: float = L2) -> 'RelevanceRanker':
+        """Full-batch Adam on cross-entropy against score / 10"""
+        self._build_vocab(channels)
+        X_text = self.text_features(channels)
+        X_num = self.numeric_features(channels, fit=True)
+        y = np.clip(np.asarray(scores, dtype=np.float64) / 10.0, 0, 1)
+        n = len(y)
+
+        params = [np.zeros(X_text.n_cols), np.zeros(X_num.shape[1]), np.zeros(1)]
+        m = [np.zeros_like(p) for p in params]
+        v = [np.zeros_like(p) for p in params]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        params[2][0] = math.log(max(y.mean(), 1e-3) / max(1 - y.mean(), 1e-3))  # Start at the base rate
+
+        for step in range(1, epochs + 1):
+            pred = _sigmoid(X_text.dot(params[0]) + X_num @ params[1] + params[2][0])
+            error = (pred - y) / n
+            grads = [X_text.t_dot(error) + l2 * params[0], X_num.T @ error + l2 * params[1],
+                     np.array([error.sum()])]
+            for i, g in enumerate(grads):
+                m[i] = beta1 * m[i] + (1 - beta1) * g
+                v[i] = beta2 * v[i] + (1 - beta2) * g * g
+                m_hat = m[i] / (1 - beta1 ** step)
+                v_hat = v[i] / (1 - beta2 ** step)
+                params[i] -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+
+        self.w_text, self.w_num, self.bias = params[0], params[1], float(params[2][0])
+        self.meta = {'trained_on': n, 'trained_date': datetime.now().isoformat(), 'vocab_size': len(self.vocab)}
+        return self
+
+    def predict_scores(self, channels: List[Dict]) -> np.ndarray:
+        """Predicted LLM overall_score (0-10) per channel"""
+        if not channels:
+            return np.zeros(0)
+        z = self.text_features(channels).dot(self.w_text) + self.numeric_features(channels) @ self.w_num + self.bias
+        return 10.0 * _sigmoid(z)
+
+    def rank(self, channels: List[Dict]) -> List[Tuple[Dict, float]]:
+        """(channel, predicted score), best first"""
+        scores = self.predict_scores(channels)
+        order = np.argsort(-scores, kind='stable')
+        return [(channels[i], float(scores[i])) for i in order]
+
+    def check(self, channel: Dict, skip_below: float = SKIP_SCORE) -> Tuple[bool, str]:
+        """(keep, reason), same shape as the other channel filters"""
+        return self.check_many([channel], skip_below)[0]
+
+    def check_many(self, channels: List[Dict], skip_below: float = SKIP_SCORE) -> List[Tuple[bool, str]]:
+        """check() for several channels with one prediction pass"""
+        return [(False, f'ranker predicts {score:.1f}/10') if score < skip_below else (True, '')
+                for score in self.predict_scores(channels).tolist()]
+
+    def top_terms(self, n: int = 15) -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+        terms = sorted(self.vocab, key=self.vocab.get)
+        order = np.argsort(self.w_text)
+        return ([(terms[i], float(self.w_text[i])) for i in order[::-1][:n]],
+                [(terms[i], float(self.w_text[i])) for i in order[:n]])
+
+    # -- persistence -----------------------------------------------------------
+
+    def save(self, path: str = WEIGHTS_FILE):
+        np.savez_compressed(
+            path,
+            vocab=np.array(sorted(self.vocab, key=self.vocab.get)),
+            idf=self.idf, w_text=self.w_text, w_num=self.w_num, bias=np.array([self.bias]),
+            num_mean=self.num_mean, num_std=self.num_std,
+            meta=np.array(json.dumps({**self.meta, 'features': numeric_feature_names()})),
+        )
+
+    @classmethod
+    def load(cls, path: str = WEIGHTS_FILE) -> Optional['RelevanceRanker']:
+        """Saved ranker, or None if there are no (compatible) weights"""
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data['meta']))
+                if meta.get('features') != numeric_feature_names():
+                    print(f"⚠️ {path} was trained with different features; retrain it")
+                    return None
+                ranker = cls()
+                ranker.vocab = {term: i for i, term in enumerate(data['vocab'].tolist())}
+                ranker.idf = data['idf']
+                ranker.w_text = data['w_text']
+                ranker.w_num = data['w_num']
+                ranker.bias = float(data['bias'][0])
+                ranker.num_mean = data['num_mean']
+                ranker.num_std = data['num_std']
+                ranker.meta = meta
+                return ranker
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading ranker weights: {e}")
+            return None
+
+
+def _auc(labels: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    """Probability a relevant channel outranks an irrelevant one"""
+    positives, negatives = labels.sum(), (~labels).sum()
+    if not positives or not negatives:
+        return None
+    order = np.argsort(scores, kind='stable')
+    ranks = np.empty(len(scores))
+    ranks[order] = np.arange(1, len(scores) + 1)
+    return float((ranks[labels].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def evaluate_predictions(predicted: np.ndarray, actual: np.ndarray, skip_below: float = SKIP_SCORE) -> Dict:
+    relevant = actual >= RELEVANT_SCORE
+    skipped = predicted < skip_below
+    auc = _auc(relevant, predicted)
+    return {
+        'channels': int(len(actual)),
+        'mae': round(float(np.abs(predicted - actual).mean()), 2) if len(actual) else None,
+        'auc': round(auc, 3) if auc is not None else None,
+        'skip_below': skip_below,
+        'skipped': int(skipped.sum()),
+        'skip_rate': round(float(skipped.mean()), 3) if len(actual) else 0,
+        'relevant': int(relevant.sum()),
+        'relevant_skipped': int((relevant & skipped).sum()),
+        'recall': round(float((~skipped[relevant]).mean()), 3) if relevant.any() else None,
+    }
+
+
+def load_training_data(db: ChannelDatabase) -> Tuple[List[Dict], np.ndarray]:
+    db.create_scoring_tables()
+    channels = db.get_analyzed_channels()
+    return channels, np.array([float(c['overall_score']) for c in channels])
+
+
+def train(db: ChannelDatabase, path: str = WEIGHTS_FILE) -> Optional[RelevanceRanker]:
+    channels, scores = load_training_data(db)
+    if len(channels) < MIN_TRAINING_CHANNELS:
+        print(f"❌ Only {len(channels)} labeled channels; need at least {MIN_TRAINING_CHANNELS}")
+        return None
+
+    start = time.perf_counter()
+    ranker = RelevanceRanker().fit(channels, scores)
+    ranker.save(path)
+    print(f"✓ Trained on {len(channels):,} channels ({len(ranker.vocab):,} terms) in "
+          f"{time.perf_counter() - start:.1f}s → {path}")
+    return ranker
+
+
+def evaluate(db: ChannelDatabase, test_fraction: float = TEST_FRACTION, seed: int = 0) -> Optional[Dict]:
+    """Train on a random split, report on the held-out rest"""
+    channels, scores = load_training_data(db)
+    if len(channels) < MIN_TRAINING_CHANNELS:
+        print(f"❌ Only {len(channels)} labeled channels; need at least {MIN_TRAINING_CHANNELS}")
+        return None
+
+    order = np.random.default_rng(seed).permutation(len(channels))
+    n_test = max(1, int(len(channels) * test_fraction))
+    test, train_rows = order[:n_test], order[n_test:]
+
+    ranker = RelevanceRanker().fit([channels[i] for i in train_rows], scores[train_rows])
+    predicted = ranker.predict_scores([channels[i] for i in test])
+    return evaluate_predictions(predicted, scores[test])
+
+
+def main():
+    print("📈 Relevance Ranker")
+    print("=" * 60)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'evaluate'
+    arg = sys.argv[2] if len(sys.argv) > 2 else None
+
+    db = ChannelDatabase()
+    db.connect()
+    try:
+        if command == 'train':
+            ranker = train(db)
+            if ranker:
+                positive, negative = ranker.top_terms(10)
+                print(f"  ↑ {', '.join(t for t, _ in positive)}")
+                print(f"  ↓ {', '.join(t for t, _ in negative)}")
+
+        elif command == 'evaluate':
+            report = evaluate(db)
+            if report:
+                print(f"Held-out channels: {report['channels']:,} ({report['relevant']:,} relevant)")
+                print(f"Score MAE: {report['mae']} | AUC (relevant vs not): {report['auc']}")
+                recall = f"{report['recall']:.1%}" if report['recall'] is not None else 'n/a'
+                print(f"Skipping below {report['skip_below']}: {report['skip_rate']:.1%} of Claude calls avoided, "
+                      f"recall {recall} ({report['relevant_skipped']} relevant skipped)")
+
+        elif command == 'rank':
+            ranker = RelevanceRanker.load()
+            if ranker is None:
+                print(f"❌ No weights in {WEIGHTS_FILE}; run `python relevance_ranker.py train` first")
+                return
+            db.create_scoring_tables()
+            channels = db.get_unscored_channels()
+            start = time.perf_counter()
+            ranked = ranker.rank(channels)
+            elapsed = time.perf_counter() - start
+            skipped = sum(1 for _, score in ranked if score < SKIP_SCORE)
+            print(f"✓ Scored {len(ranked):,} unscored channels in {elapsed:.2f}s; "
+                  f"{skipped:,} below {SKIP_SCORE} would be skipped")
+            for channel, score in ranked[:int(arg) if arg else 20]:
+                print(f"  {score:4.1f}  {channel['channel_name']} ({channel.get('subscriber_count') or 0:,} subs)")
+
+        else:
+            print(__doc__)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
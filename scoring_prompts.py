@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Channel Scoring Prompts
+The Claude scoring prompt, split into a static system prefix (rubric +
+product context, identical for every channel in a run) and a per-channel
+block, plus parsing of the JSON answer. Shared by live, batch and packed
+scoring so they all ask the same question.
+"""
+
+import json
+from typing import Dict, Optional
+
+DEFAULT_PRODUCT_CONTEXT = """Hard drives containing offline knowledge libraries for survival, 
+preparedness, and self-reliance. Includes medical guides, technical manuals, agricultural 
+knowledge, and essential information for grid-down scenarios."""
+
+# Fields of one analysis object, as shown to the model
+ANALYSIS_FIELDS = '''  "relevance_score": X,
+  "audience_match_score": X,
+  "engagement_score": X,
+  "overall_score": X,
+  "priority": "low|medium|high",
+  "relevant": true|false,
+  "reason": "Specific reason why their audience would/wouldn't buy this product",
+  "pitch": "Specific pitch angle: how to present this product to THIS creator's unique audience",
+  "engagement_notes": "Expected engagement level and conversion potential"'''
+
+
+def build_scoring_system_prompt(product_context: str, packed: bool = False) -> str:
+    """
+    Static part of the scoring prompt (rubric + product context)
+
+    Identical for every channel in a run, so it's sent as a cached system
+    prefix and only the channel block is billed at the full input rate.
+    packed=True asks for a JSON array over several CHANNEL_ID-tagged
+    channels (see packed_scoring.build_packed_prompt) instead of one object.
+    """
+    if packed:
+        task = ("You will be given several channels, each introduced by a CHANNEL_ID line. "
+                "Evaluate each channel independently.")
+        answer = ("Respond with ONLY a JSON array containing one object per channel, each in this form:\n"
+                  "[\n  {\n" + '    "channel_id": "CHANNEL_ID from the channel block",\n'
+                  + '\n'.join('  ' + line for line in ANALYSIS_FIELDS.split('\n')) + "\n  }\n]")
+    else:
+        task = "You will be given one channel to evaluate."
+        answer = "Respond with ONLY this JSON:\n{\n" + ANALYSIS_FIELDS + "\n}"
+
+    return f"""Analyze if a YouTube channel's AUDIENCE would be interested in buying this product. {task}
+
+OUR PRODUCT (what we're selling):
+{product_context}
+
+CRITICAL EVALUATION CRITERIA:
+
+1. AUDIENCE RESONANCE (0-10):
+   - Would their specific viewers actually BUY this product?
+   - Does their audience demographic match our target buyer?
+   - Would their viewers see clear value in owning this?
+   - Is there a direct problem-solution fit?
+
+2. CONTENT ALIGNMENT (0-10):
+   - Does their content naturally relate to our product's purpose?
+   - Do they create content where this product would be mentioned?
+   - Would featuring this product feel native to their content?
+   - Is the lifestyle/niche an authentic match?
+
+3. ENGAGEMENT POTENTIAL (0-10):
+   Consider channel engagement indicators:
+   - Content quality and production value
+   - Authenticity and trust with audience
+   - History of product mentions or sponsorships
+   - Community interaction level
+   - Likelihood of creating compelling product content
+   - Estimated conversion potential (will viewers actually buy?)
+   - Creator's credibility in recommending products
+   - Audience's trust in creator's recommendations
+   
+   USE ENHANCED METRICS WHEN AVAILABLE:
+   - Engagement Rate >5% = High trust community (score +2)
+   - View Rate >30% = Real engaged audience (score +1)
+   - Growing trend = Rising star, get in early (score +1)
+   - Has business email = Professional, responds (score +1)
+   - Has Patreon/Store = Audience already buys (score +2)
+   - Consistent uploads (>0.8) = Reliable partner (score +1)
+   - Recent virals = Bonus reach potential (score +1)
+
+AVOID HIGH SCORES FOR:
+- Competitors or similar product sellers
+- Generic review/unboxing channels (low conversion)
+- Misaligned demographics (wrong age/interests)
+- Entertainment-only channels (viewers not buyers)
+- Channels with low audience trust
+
+PRIORITIZE HIGH SCORES FOR:
+- Lifestyle match (audience lives this way)
+- Educational content creators (high trust)
+- Community builders (loyal audiences)
+- Niche experts (authority in space)
+- Authentic product users (not just reviewers)
+
+Rate 0-10 (be highly selective):
+- Most channels: 2-5 (not a good fit)
+- Decent channels: 6-7 (possible fit)
+- Great channels: 8-9 (strong fit)
+- Perfect channels: 10 (rare, ideal match)
+
+READING THE CHANNEL BLOCK:
+Each channel lists its name, subscriber count and description, followed by
+whichever of these metrics could be measured. A missing metric means it wasn't
+measured, not that it is poor: score it neutrally instead of penalizing.
+- Average Views per Video: mean views over the channel's recent uploads
+- View Rate: average views as a percentage of subscribers; below 5% usually
+  means an inactive or bought audience, above 30% a genuinely engaged one
+- Engagement Rate: (likes + comments) / views over recent uploads; 2-5% is
+  typical, above 5% signals a community that trusts the creator
+- Upload Frequency: videos per week over recent uploads
+- Consistency Score: 0-1 regularity of the upload schedule (1.0 = like clockwork)
+- Growth Trend: rapid / growing / stable / declining, newest uploads' views vs the ones before
+- Recent Viral Videos: recent uploads with over 5x the channel's average views
+- ✓ Has Business Email: a contact address is published for sponsorships
+- ✓ Has Affiliate Store/Merch: the audience already buys through this creator
+- ✓ Has Patreon: the audience already pays to support this creator
+
+SCORE FIELDS:
+- relevance_score: CONTENT ALIGNMENT (criterion 2)
+- audience_match_score: AUDIENCE RESONANCE (criterion 1)
+- engagement_score: ENGAGEMENT POTENTIAL (criterion 3), including metric bonuses, capped at 10
+- overall_score: your overall judgment of fit. Weigh audience resonance most
+  heavily; a channel whose viewers would not buy cannot score high on engagement alone
+- priority: "high" for overall 8-10, "medium" for 6-7, "low" for 5 or below
+- relevant: true only when overall_score is 6 or more
+- reason / pitch / engagement_notes: one or two specific sentences each; refer to
+  this channel's actual content and audience, never generic praise
+
+CALIBRATION EXAMPLES:
+- Off-grid homesteading channel, 80K subscribers, weekly uploads, 6% engagement,
+  Patreon: viewers already prepare for self-reliance and pay the creator.
+  audience 9, content 9, engagement 9, overall 9, priority high
+- Camping gear review channel, 400K subscribers, 1.5% engagement: outdoor
+  audience but buys gear on impulse; reviews are generic.
+  audience 5, content 5, engagement 4, overall 5, priority low, not relevant
+- Backyard gardening and food preservation channel, 25K subscribers, growing:
+  adjacent self-reliance audience; fits a "knowledge that outlasts the grid" angle.
+  audience 7, content 6, engagement 7, overall 7, priority medium
+- Doomsday news commentary channel, 1M subscribers, 0.4% engagement:
+  entertainment viewers with little trust; a competitor-style audience.
+  audience 3, content 4, engagement 2, overall 3, priority low, not relevant
+
+{answer}"""
+
+
+def build_channel_prompt(channel_data: Dict) -> str:
+    """Per-channel part of the scoring prompt (works for pipeline dicts and DB rows)"""
+    channel_name = channel_data.get('channel_name', 'Unknown')
+    description = (channel_data.get('description') or '')[:800]
+    channel_description = (channel_data.get('channel_description') or '')[:800]
+    subs = channel_data.get('subscriber_count') or 0
+    
+    # Enhanced metrics
+    avg_views = channel_data.get('avg_views_per_video')
+    engagement_rate = channel_data.get('engagement_rate')
+    view_rate = channel_data.get('view_rate')
+    upload_freq = channel_data.get('upload_frequency')
+    consistency = channel_data.get('consistency_score')
+    growth = channel_data.get('growth_trend')
+    viral_count = channel_data.get('recent_viral_count')
+    has_email = bool(channel_data.get('business_email'))
+    has_store = bool(channel_data.get('has_affiliate_store'))
+    has_patreon = bool(channel_data.get('has_patreon'))
+    
+    # Build enhanced metrics section
+    enhanced_metrics_text = ""
+    if avg_views is not None:
+        enhanced_metrics_text += f"\nAverage Views per Video: {avg_views:,}"
+    if view_rate is not None:
+        enhanced_metrics_text += f"\nView Rate: {view_rate:.1f}%"
+    if engagement_rate is not None:
+        enhanced_metrics_text += f"\nEngagement Rate: {engagement_rate}%"
+    if upload_freq is not None:
+        enhanced_metrics_text += f"\nUpload Frequency: {upload_freq:.1f} videos/week"
+    if consistency is not None:
+        enhanced_metrics_text += f"\nConsistency Score: {consistency:.2f}/1.0"
+    if growth:
+        enhanced_metrics_text += f"\nGrowth Trend: {growth}"
+    if viral_count:
+        enhanced_metrics_text += f"\nRecent Viral Videos: {viral_count}"
+    if has_email:
+        enhanced_metrics_text += "\n✓ Has Business Email"
+    if has_store:
+        enhanced_metrics_text += "\n✓ Has Affiliate Store/Merch"
+    if has_patreon:
+        enhanced_metrics_text += "\n✓ Has Patreon"
+    
+    full_description = channel_description if channel_description else description
+    
+    return f"""YOUTUBE CHANNEL TO EVALUATE:
+Name: {channel_name}
+Subscribers: {subs:,}
+Description: {full_description if full_description else 'No description available'}
+{enhanced_metrics_text}"""
+
+
+def parse_analysis_response(response: str) -> Optional[Dict]:
+    """Pull the analysis JSON out of a model response; None if it can't be used"""
+    if not response:
+        return None
+    try:
+        start = response.find('{')
+        end = response.rfind('}') + 1
+
+        if start >= 0 and end > start:
+            analysis = json.loads(response[start:end])
+            if isinstance(analysis, dict) and 'relevant' in analysis:
+                return analysis
+    except ValueError:
+        pass
+    return None
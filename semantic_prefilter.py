@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Semantic Prefilter
+Embeds the product context + target direction once, embeds each channel's
+name and description with a local Ollama embedding model, and rejects
+channels whose cosine similarity to the target falls below a threshold
+before any LLM scoring call. Channel embeddings are cached in
+youtube_channels.db (channel_embeddings), so re-discovered channels cost
+nothing. Past LLM verdicts in channel_analyses are used to measure how many
+relevant channels the threshold would have thrown away.
+
+Usage:
+    python semantic_prefilter.py evaluate [threshold]   # recall / pass rate on past LLM labels
+    python semantic_prefilter.py calibrate [recall]     # highest threshold keeping that recall
+
+Set PRODUCT_CONTEXT_FILE / TARGET_DIRECTION to match the run being calibrated.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from channel_database import ChannelDatabase, DATABASE_FILE
+from ollama_client import get_ollama_client
+
+EMBEDDING_MODEL = "nomic-embed-text"
+SIMILARITY_THRESHOLD = 0.45  # Model-specific; run `calibrate` after changing the model or product
+TARGET_RECALL = 0.95  # Share of LLM-relevant channels calibrate keeps
+EMBED_BATCH = 32  # Texts per /api/embed request
+DESCRIPTION_CHARS = 1000
+
+
+def channel_text(channel: Dict) -> str:
+    """The text a channel is embedded from"""
+    name = channel.get('channel_name') or ''
+    description = channel.get('channel_description') or channel.get('description') or channel.get('notes') or ''
+    return f"{name}\n{description[:DESCRIPTION_CHARS]}".strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def recall_report(similarities: List[float], labels: List[bool], threshold: float) -> Dict:
+    """How a threshold would have treated channels the LLM already labeled"""
+    sims = np.asarray(similarities, dtype=np.float32)
+    relevant = np.asarray(labels, dtype=bool)
+    passed = sims >= threshold
+    return {
+        'threshold': threshold,
+        'labeled': int(len(sims)),
+        'relevant': int(relevant.sum()),
+        'pass_rate': round(float(passed.mean()), 3) if len(sims) else 0,
+        'recall': round(float(passed[relevant].mean()), 3) if relevant.any() else None,
+        'llm_calls_avoided': int((~passed).sum()),
+        'relevant_lost': int((relevant & ~passed).sum()),
+    }
+
+
+class SemanticPrefilter:
+    """
+    Cosine-similarity gate in front of LLM scoring (thread-safe)
+
+    Fails open: if Ollama can't produce an embedding the channel passes and
+    the LLM decides as before.
+    """
+
+    def __init__(self, product_context: str, target_direction: str = '', model: str = EMBEDDING_MODEL,
+                 threshold: float = SIMILARITY_THRESHOLD, db_file: str = DATABASE_FILE):
+        self.target_text = f"{product_context}\n{target_direction}".strip()
+        self.model = model
+        self.threshold = threshold
+        self.db_file = db_file
+
+        self._target = None
+        self._target_failed = False
+        self._target_lock = threading.Lock()  # Held only while the one target embedding call runs
+        self._lock = threading.Lock()
+        self._database = None
+        self.counts = {'checked': 0, 'passed': 0, 'rejected': 0, 'embed_failed': 0, 'cache_hits': 0}
+
+    def _db(self) -> ChannelDatabase:
+        """Shared across scoring threads; ChannelDatabase gives each thread its own connection"""
+        with self._lock:
+            if self._database is None:
+                self._database = ChannelDatabase(self.db_file)
+                self._database.connect()
+                self._database.create_embedding_tables()
+            return self._database
+
+    def _get_embeddings(self, channel_ids: List[str]) -> Dict[str, Dict]:
+        return self._db().get_channel_embeddings(self.model, channel_ids)
+
+    def _save_embeddings(self, rows: List[Dict]):
+        self._db().save_channel_embeddings(self.model, rows)
+
+    def _labeled_channels(self) -> List[Dict]:
+        db = self._db()
+        db.create_scoring_tables()
+        return db.get_analyzed_channels()
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.counts[key] += value
+
+    def target_vector(self) -> Optional[np.ndarray]:
+        """Product + audience embedding, computed once (a failed attempt isn't retried)"""
+        with self._target_lock:
+            if self._target is None and not self._target_failed:
+                vectors = get_ollama_client().embed([self.target_text], self.model)
+                if vectors:
+                    self._target = _normalize(vectors[0])
+                else:
+                    self._target_failed = True
+            return self._target
+
+    def embed_channels(self, channels: List[Dict], embed_missing: bool = True,
+                       count: bool = False) -> Dict[str, np.ndarray]:
+        """Normalized embeddings by channel_id, from the DB cache or freshly embedded and stored"""
+        texts = {c['channel_id']: channel_text(c) for c in channels if c.get('channel_id')}
+        cached = self._get_embeddings(list(texts))
+
+        vectors, missing = {}, []
+        for channel_id, text in texts.items():
+            entry = cached.get(channel_id)
+            if entry and entry['text_hash'] == text_hash(text):
+                vectors[channel_id] = np.frombuffer(entry['embedding'], dtype=np.float32)
+            elif text:
+                missing.append(channel_id)
+        if count:
+            self._count(cache_hits=len(vectors))
+
+        if not embed_missing or not missing:
+            return vectors
+
+        client = get_ollama_client()
+        for start in range(0, len(missing), EMBED_BATCH):
+            chunk = missing[start:start + EMBED_BATCH]
+            embedded = client.embed([texts[channel_id] for channel_id in chunk], self.model)
+            if embedded is None:
+                continue
+
+            rows = []
+            for channel_id, vector in zip(chunk, embedded):
+                vector = _normalize(vector)
+                vectors[channel_id] = vector
+                rows.append({'channel_id': channel_id, 'text_hash': text_hash(texts[channel_id]),
+                             'dim': len(vector), 'embedding': vector.tobytes()})
+            self._save_embeddings(rows)
+        return vectors
+
+    def similarities(self, channels: List[Dict], embed_missing: bool = True,
+                     count: bool = False) -> Dict[str, float]:
+        """Cosine similarity to the target for every channel that could be embedded"""
+        target = self.target_vector()
+        if target is None:
+            return {}
+        vectors = self.embed_channels(channels, embed_missing, count)
+        if not vectors:
+            return {}
+        ids = list(vectors)
+        sims = np.vstack([vectors[channel_id] for channel_id in ids]) @ target
+        return dict(zip(ids, sims.tolist()))
+
+    def check(self, channel: Dict) -> Tuple[bool, str]:
+        """(keep, reason), same shape as the other channel filters"""
+        return self.check_many([channel])[0]
+
+    def check_many(self, channels: List[Dict]) -> List[Tuple[bool, str]]:
+        """check() for several channels, embedding the uncached ones EMBED_BATCH per request"""
+        sims = self.similarities(channels, count=True)
+        verdicts = []
+        for channel in channels:
+            similarity = sims.get(channel.get('channel_id'))
+            if similarity is None:
+                self._count(checked=1, passed=1, embed_failed=1)
+                verdicts.append((True, ''))
+            elif similarity < self.threshold:
+                self._count(checked=1, rejected=1)
+                verdicts.append((False, f'semantic similarity {similarity:.2f} < {self.threshold:.2f}'))
+            else:
+                self._count(checked=1, passed=1)
+                verdicts.append((True, ''))
+        return verdicts
+
+    def evaluate(self, threshold: Optional[float] = None, embed_missing: bool = True) -> Dict:
+        """Recall and pass rate against every channel that already has an LLM verdict"""
+        labeled = self._labeled_channels()
+        sims = self.similarities(labeled, embed_missing)
+        pairs = [(sims[c['channel_id']], bool(c['relevant'])) for c in labeled if c['channel_id'] in sims]
+        return recall_report([s for s, _ in pairs], [l for _, l in pairs],
+                             self.threshold if threshold is None else threshold)
+
+    def calibrate(self, target_recall: float = TARGET_RECALL) -> Optional[float]:
+        """Highest threshold that still passes target_recall of the LLM-relevant channels"""
+        labeled = self._labeled_channels()
+        sims = self.similarities(labeled)
+        relevant = sorted(sims[c['channel_id']] for c in labeled if c['relevant'] and c['channel_id'] in sims)
+        if not relevant:
+            return None
+        keep_from = int(np.floor(len(relevant) * (1 - target_recall)))
+        return round(relevant[min(keep_from, len(relevant) - 1)] - 1e-4, 4)
+
+    def summary_lines(self) -> List[str]:
+        with self._lock:
+            c = dict(self.counts)
+        lines = [
+            f"Semantic prefilter ({self.model}, threshold {self.threshold:.2f}): {c['checked']} checked, "
+            f"{c['rejected']} rejected = LLM calls avoided, {c['embed_failed']} passed unembedded, "
+            f"{c['cache_hits']} cached embeddings"
+        ]
+        # Only channels embedded already; no new embedding calls for the report
+        report = self.evaluate(embed_missing=False)
+        if report['recall'] is not None:
+            lines.append(
+                f"  on {report['labeled']} past LLM verdicts: recall {report['recall']:.0%} of "
+                f"{report['relevant']} relevant channels, {report['pass_rate']:.0%} would reach the LLM"
+            )
+        return lines
+
+
+def main():
+    from batch_scoring import load_product_context
+
+    print("🧭 Semantic Prefilter")
+    print("=" * 60)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'evaluate'
+    arg = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    prefilter = SemanticPrefilter(load_product_context(), os.environ.get('TARGET_DIRECTION', ''))
+
+    if prefilter.target_vector() is None:
+        print(f"❌ Could not embed with {EMBEDDING_MODEL} (is Ollama running? ollama pull {EMBEDDING_MODEL})")
+        return
+
+    if command == 'calibrate':
+        target_recall = arg or TARGET_RECALL
+        threshold = prefilter.calibrate(target_recall)
+        if threshold is None:
+            print("❌ No relevant channels in channel_analyses to calibrate against")
+            return
+        print(f"✓ Threshold {threshold:.4f} keeps {target_recall:.0%} of LLM-relevant channels")
+        arg = threshold
+    elif command != 'evaluate':
+        print(__doc__)
+        return
+
+    report = prefilter.evaluate(arg)
+    print(f"Labeled channels: {report['labeled']:,} ({report['relevant']:,} relevant)")
+    print(f"Threshold: {report['threshold']:.4f}")
+    if report['recall'] is not None:
+        print(f"Recall on relevant channels: {report['recall']:.1%} ({report['relevant_lost']} lost)")
+    print(f"Pass rate: {report['pass_rate']:.1%} | LLM calls avoided: {report['llm_calls_avoided']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Streaming Discovery Pipeline
+search → channel info → prefilter → enrich → farm filter → persist → score filter → score
+
+Each stage is a pool of asyncio workers connected by bounded queues, so a
+channel moves on as soon as it's ready instead of waiting for the whole
+previous step to finish. YouTube traffic still goes through the
+AsyncDiscoveryEngine's global limit; DB writes and LLM scoring run on
+their own executors so they never take YouTube slots.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import time
+import traceback
+from collections import defaultdict
+from functools import partial
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+from async_discovery import AsyncDiscoveryEngine
+from channel_database import ChannelDatabase
+from query_bandit import QueryBandit
+from query_novelty import normalize_query
+
+QUEUE_SIZE = 100  # Max items waiting between two stages
+
+# Saved channels are written in batches (one transaction each) instead of one commit per channel
+PERSIST_BATCH = 50
+PERSIST_MAX_DELAY = 2.0  # Also flush when this many seconds passed since the last write (rest flushes at the end)
+
+SCORE_FILTER_BATCH = 32  # Max channels per score_filter call (one embedding request for the semantic prefilter)
+
+# Workers per stage (YouTube stages are additionally bounded by the engine)
+STAGE_WORKERS = {
+    'search': 5,
+    'channel_info': 10,
+    'prefilter': 1,
+    'enrich': 10,
+    'farm_filter': 1,
+    'persist': 1,
+    'score_filter': 1,
+    'score': 1,
+}
+
+# Stages whose items are still "in flight" for the query that found them
+FRONT_STAGES = ('search', 'channel_info', 'prefilter', 'enrich', 'farm_filter')
+
+_DONE = object()  # End-of-stream marker passed down the queues
+
+
+class StreamingDiscoveryPipeline:
+    """One discovery run as a chain of concurrently running stages"""
+
+    def __init__(self, engine: AsyncDiscoveryEngine, results_per_query: int,
+                 accept_channel: Callable[[Dict], Tuple[bool, str]],
+                 farm_filter: Callable[[Dict], Tuple[bool, str]],
+                 needs_scoring: Callable[[Dict], bool],
+                 score_channel: Callable[[Dict], Dict],
+                 emit: Callable[[Dict], None] = print,
+                 category: str = 'ai_discovered',
+                 scoring_model: str = '',
+                 score_pack: Optional[Callable[[List[Dict]], Dict[str, Dict]]] = None,
+                 score_pack_size: int = 1,
+                 score_filter: Optional[Callable[[List[Dict]], List[Tuple[bool, str]]]] = None,
+                 bandit: Optional[QueryBandit] = None,
+                 queue_size: int = QUEUE_SIZE,
+                 stage_workers: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            engine: Gate for all YouTube requests
+            results_per_query: Videos fetched per search (ytsearchN)
+            accept_channel: (channel_info) -> (keep, reason) before enrichment
+            farm_filter: (enhanced) -> (is_farm, reason)
+            needs_scoring: (channel) -> False to skip LLM scoring (e.g. already analyzed)
+            score_channel: (channel) -> analysis dict; blocking, runs on the scoring executor
+            emit: Receives progress events ({'type': 'log' | 'status' | 'result', ...})
+            scoring_model: Recorded with each analysis stored in channel_analyses
+            score_pack: ([channels]) -> {channel_id: analysis}; with score_pack_size > 1
+                each score worker packs whatever channels are already queued into one call
+            score_filter: ([channels]) -> [(keep, reason)] per channel, after saving and before
+                scoring (semantic prefilter, learned ranker); gets whatever saved channels are
+                already waiting, blocking, runs on the default executor
+            bandit: Decides which queries get deeper searches once their channels
+                have cleared the farm filter (None = one ytsearchN per query)
+        """
+        self.engine = engine
+        self.results_per_query = results_per_query
+        self.accept_channel = accept_channel
+        self.farm_filter = farm_filter
+        self.needs_scoring = needs_scoring
+        self.score_channel = score_channel
+        self.emit = emit
+        self.category = category
+        self.scoring_model = scoring_model
+        self.score_pack = score_pack
+        self.score_pack_size = score_pack_size if score_pack else 1
+        self.score_filter = score_filter
+        self.bandit = bandit
+        self.queue_size = queue_size
+        self.workers = {**STAGE_WORKERS, **(stage_workers or {})}
+
+        self.results: List[Dict] = []
+        self.counts = {
+            'queries': 0, 'videos': 0, 'channels_seen': 0, 'prefiltered': 0,
+            'enriched': 0, 'enrich_failed': 0, 'farms': 0, 'saved': 0,
+            'already_analyzed': 0, 'score_filtered': 0, 'analyzed': 0, 'relevant': 0, 'errors': 0,
+        }
+        self.timing = {'started': None, 'first_result': None, 'finished': None}
+        self._seen_channels = set()
+
+        # Per-query yield, written to search_terms when the run ends
+        self.query_yield = defaultdict(lambda: {
+            'searches': 0, 'videos': 0, 'new_channels': 0, 'passed_farm_filter': 0,
+            'llm_scored': 0, 'relevant': 0, 'depth': 0,
+        })
+        self._query_videos = defaultdict(set)
+        self._in_flight = defaultdict(int)  # Query -> searches + videos not yet past the farm filter
+        self._settled = None
+
+        self._pending_saves: List[Dict] = []
+        self._last_flush = 0.0
+        self.persist_stats = {'batches': 0, 'rows': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'seconds': 0.0}
+
+        self._db_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+        self._score_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers['score'], thread_name_prefix='score'
+        )
+        self._db = None
+
+    # -- helpers -----------------------------------------------------------
+
+    def _log(self, message: str, log_type: str = 'info'):
+        self.emit({'type': 'log', 'message': message, 'logType': log_type})
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.timing['started'], 2)
+
+    async def _in_db_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_executor, partial(func, *args))
+
+    def _query_of(self, item) -> Optional[str]:
+        if isinstance(item, tuple):
+            return item[0]
+        if isinstance(item, dict):
+            return item.get('source_query')
+        return None
+
+    async def _release(self, query: Optional[str]):
+        """One search or video of query is done with the front stages"""
+        if query is None:
+            return
+        self._in_flight[query] -= 1
+        if self._settled is not None and not any(self._in_flight.values()):
+            async with self._settled:
+                self._settled.notify_all()
+
+    async def _submit(self, inbox: asyncio.Queue, query: str, depth: int):
+        self._in_flight[query] += 1
+        await inbox.put((query, depth))
+
+    async def _expand(self, inbox: asyncio.Queue):
+        """Bandit rounds: wait for the front stages to drain, then search deeper where it pays"""
+        while True:
+            async with self._settled:
+                await self._settled.wait_for(lambda: not any(self._in_flight.values()))
+            picks = self.bandit.next_round(self.workers['search'])
+            if not picks:
+                return
+            for query, depth in picks:
+                self._log(f'  🎰 Searching deeper: "{query}" (ytsearch{depth})')
+                await self._submit(inbox, query, depth)
+
+    async def _run_stage(self, name: str, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                         next_workers: int, handler: Callable):
+        """Run a stage's workers until the inbox is drained, then signal the next stage"""
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                try:
+                    outputs = await handler(item)
+                except Exception as e:
+                    self.counts['errors'] += 1
+                    self._log(f'    ⚠️ {name} stage error: {e}', 'error')
+                    traceback.print_exc()
+                    if name in FRONT_STAGES:
+                        await self._release(self._query_of(item))
+                    continue
+                if outbox is not None:
+                    for output in outputs or []:
+                        await outbox.put(output)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers[name])))
+        if outbox is not None:
+            for _ in range(next_workers):
+                await outbox.put(_DONE)
+
+    # -- stages --------------------------------------------------------------
+
+    async def _search(self, item: Tuple[str, int]) -> List[Tuple[str, str]]:
+        query, depth = item
+        video_urls = await self.engine.search(query, depth)
+        # Deeper searches return the earlier results again; only new videos go on
+        new_urls = [url for url in video_urls if url not in self._query_videos[query]]
+        self._query_videos[query].update(new_urls)
+
+        stats = self.query_yield[query]
+        stats['searches'] += 1
+        stats['videos'] += len(new_urls)
+        stats['depth'] = max(stats['depth'], depth)
+        if self.bandit:
+            self.bandit.record_search(query, depth, len(new_urls))
+
+        self.counts['videos'] += len(new_urls)
+        self._log(f'  ✓ "{query}" - found {len(new_urls)} videos')
+        self._in_flight[query] += len(new_urls)
+        await self._release(query)
+        return [(query, url) for url in new_urls]
+
+    async def _channel_info(self, item: Tuple[str, str]) -> List[Dict]:
+        query, video_url = item
+        info = await self.engine.channel_info(video_url)
+        if not info or info['channel_id'] in self._seen_channels:
+            await self._release(query)
+            return []
+        self._seen_channels.add(info['channel_id'])
+        self.counts['channels_seen'] += 1
+        info['source_query'] = query
+        if not await self._in_db_thread(self._channel_known, info['channel_id']):
+            self.query_yield[query]['new_channels'] += 1
+        return [info]
+
+    async def _prefilter(self, info: Dict) -> List[Dict]:
+        keep, reason = self.accept_channel(info)
+        if not keep:
+            self.counts['prefiltered'] += 1
+            self._log(f'    ⏭️ {info["channel_name"]} ({reason})')
+            await self._release(info.get('source_query'))
+            return []
+        self._log(f'    ✓ {info["channel_name"]} ({info.get("subscriber_count", 0):,} subs) - extracting enhanced data...', 'success')
+        return [info]
+
+    async def _enrich(self, info: Dict) -> List[Dict]:
+        data, ok = await self.engine.enrich(info)
+        if ok:
+            self.counts['enriched'] += 1
+        else:
+            self.counts['enrich_failed'] += 1
+            self._log(f'      ⚠️ Enhanced extraction failed for {info["channel_name"]}, using basic data')
+        self.emit({'type': 'status', 'channels': self.counts['enriched'] + self.counts['enrich_failed']})
+        return [data]
+
+    async def _farm_filter(self, channel: Dict) -> List[Dict]:
+        is_farm, reason = self.farm_filter(channel)
+        query = channel.get('source_query')
+        if is_farm:
+            self.counts['farms'] += 1
+            self._log(f'    ⏭️ {channel["channel_name"]} - {reason}')
+            await self._release(query)
+            return []
+        if query is not None:
+            self.query_yield[query]['passed_farm_filter'] += 1
+            if self.bandit:
+                self.bandit.record_usable(query)
+        await self._release(query)
+        return [channel]
+
+    async def _persist(self, channel: Dict) -> List[Dict]:
+        channel['category'] = self.category
+        self._pending_saves.append(channel)
+        if (len(self._pending_saves) >= PERSIST_BATCH
+                or time.perf_counter() - self._last_flush >= PERSIST_MAX_DELAY):
+            await self._flush_saves()
+
+        if not self.needs_scoring(channel):
+            self.counts['already_analyzed'] += 1
+            self._log(f'    ℹ️ {channel["channel_name"]} already analyzed this session')
+            return []
+        return [channel]
+
+    async def _score_filter(self, channels: List[Dict]) -> List[Dict]:
+        if self.score_filter is None:
+            return channels
+
+        loop = asyncio.get_running_loop()
+        verdicts = await loop.run_in_executor(None, self.score_filter, channels)
+        kept = []
+        for channel, (keep, reason) in zip(channels, verdicts):
+            if keep:
+                kept.append(channel)
+            else:
+                self.counts['score_filtered'] += 1
+                self._log(f'    ⏭️ {channel["channel_name"]} - {reason}')
+        return kept
+
+    async def _score(self, channel: Dict) -> List[Dict]:
+        self._log(f'  🤖 Analyzing {channel["channel_name"]}...')
+
+        loop = asyncio.get_running_loop()
+        analysis = await loop.run_in_executor(self._score_executor, self.score_channel, channel)
+        await self._record_result(channel, analysis)
+        return []
+
+    async def _score_packed(self, channels: List[Dict]) -> List[Dict]:
+        names = ', '.join(channel['channel_name'] for channel in channels)
+        self._log(f'  🤖 Analyzing {len(channels)} channels in one call: {names}')
+
+        loop = asyncio.get_running_loop()
+        analyses = await loop.run_in_executor(self._score_executor, self.score_pack, channels)
+        for channel in channels:
+            await self._record_result(channel, analyses[channel['channel_id']])
+        return []
+
+    async def _run_batch_stage(self, name: str, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                               next_workers: int, handler: Callable, batch_size: int):
+        """Like _run_stage, but each worker takes one item plus whatever else is already waiting"""
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+
+                batch, done = [item], False
+                while len(batch) < batch_size:
+                    try:
+                        queued = inbox.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if queued is _DONE:
+                        done = True
+                        break
+                    batch.append(queued)
+
+                try:
+                    outputs = await handler(batch)
+                except Exception as e:
+                    self.counts['errors'] += 1
+                    self._log(f'    ⚠️ {name} stage error: {e}', 'error')
+                    traceback.print_exc()
+                    outputs = []
+                if outbox is not None:
+                    for output in outputs or []:
+                        await outbox.put(output)
+                if done:
+                    return
+
+        await asyncio.gather(*(worker() for _ in range(self.workers[name])))
+        if outbox is not None:
+            for _ in range(next_workers):
+                await outbox.put(_DONE)
+
+    async def _record_result(self, channel: Dict, analysis: Dict):
+        result = {
+            'channel_id': channel['channel_id'],
+            'channel_name': channel['channel_name'],
+            'channel_url': channel['channel_url'],
+            'subscriber_count': channel['subscriber_count'],
+            'analysis': analysis
+        }
+        if 'overall_score' in analysis:  # Failed analyses stay pending for batch scoring
+            await self._in_db_thread(self._save_analysis, channel['channel_id'], analysis)
+
+        query = channel.get('source_query')
+        if query is not None:
+            self.query_yield[query]['llm_scored'] += 1
+            if analysis.get('relevant', False):
+                self.query_yield[query]['relevant'] += 1
+                if self.bandit:
+                    self.bandit.record_relevant(query)
+
+        self.results.append(result)
+        self.counts['analyzed'] += 1
+        if self.timing['first_result'] is None:
+            self.timing['first_result'] = self._elapsed()
+
+        score = analysis.get('overall_score', 0)
+        relevant = analysis.get('relevant', False)
+        self._log(f'    {"✓" if relevant else "✗"} {channel["channel_name"]} - Score: {score}/10',
+                  'success' if relevant else 'info')
+        self.emit({'type': 'result', 'result': result})
+        self.emit({'type': 'status', 'analyzed': self.counts['analyzed']})
+        if relevant:
+            self.counts['relevant'] += 1
+            self.emit({'type': 'status', 'relevant': self.counts['relevant']})
+
+    # -- DB thread -------------------------------------------------------------
+
+    def _get_db(self) -> ChannelDatabase:
+        if self._db is None:
+            self._db = ChannelDatabase()
+            self._db.connect()
+            self._db.create_scoring_tables()
+            self._db.create_indexes()
+            self._db.create_search_index()
+        return self._db
+
+    def _channel_known(self, channel_id: str) -> bool:
+        return self._get_db().get_channel(channel_id) is not None
+
+    def _save_query_yields(self):
+        db = self._get_db()
+        db.create_query_yield_columns()
+        for query, stats in self.query_yield.items():
+            db.record_query_yield(normalize_query(query), stats['searches'], stats['videos'], stats['new_channels'],
+                                  stats['passed_farm_filter'], stats['llm_scored'], stats['relevant'],
+                                  stats['depth'])
+
+    async def _flush_saves(self):
+        """Write every buffered channel in one add_channels_bulk call"""
+        batch, self._pending_saves = self._pending_saves, []
+        self._last_flush = time.perf_counter()
+        if not batch:
+            return
+        result = await self._in_db_thread(self._save_channels, batch)
+        self.counts['saved'] += result['saved']
+        self.persist_stats['batches'] += 1
+        self.persist_stats['rows'] += result['saved']
+        for key in ('inserted', 'updated', 'skipped'):
+            self.persist_stats[key] += result[key]
+        self.persist_stats['seconds'] += result['seconds']
+
+    def _save_channels(self, channels: List[Dict]) -> Dict:
+        return self._get_db().add_channels_bulk(channels, verbose=False)
+
+    def _save_analysis(self, channel_id: str, analysis: Dict):
+        # Cascaded scoring records which tier's model produced the answer
+        model = analysis.get('scored_by', self.scoring_model)
+        self._get_db().save_analyses([{'channel_id': channel_id, 'analysis': analysis}],
+                                     model, source='live')
+
+    def _close_db(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # -- run -----------------------------------------------------------------
+
+    async def run(self, queries: List[str]) -> List[Dict]:
+        """Push queries through every stage; returns scored results"""
+        self.timing['started'] = time.perf_counter()
+        self.counts['queries'] = len(queries)
+        self._settled = asyncio.Condition()
+
+        stages = [
+            ('search', self._search),
+            ('channel_info', self._channel_info),
+            ('prefilter', self._prefilter),
+            ('enrich', self._enrich),
+            ('farm_filter', self._farm_filter),
+            ('persist', self._persist),
+            ('score_filter', self._score_filter),
+            ('score', self._score),
+        ]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in stages]
+
+        async def feed():
+            for query in queries:
+                await self._submit(queues[0], query, self.results_per_query)
+            if self.bandit:
+                await self._expand(queues[0])
+            for _ in range(self.workers['search']):
+                await queues[0].put(_DONE)
+
+        runners = []
+        for i, (name, handler) in enumerate(stages):
+            outbox = queues[i + 1] if i + 1 < len(stages) else None
+            next_workers = self.workers[stages[i + 1][0]] if outbox is not None else 0
+            if name == 'score_filter':
+                runners.append(self._run_batch_stage(name, queues[i], outbox, next_workers, handler,
+                                                     SCORE_FILTER_BATCH))
+            elif name == 'score' and self.score_pack_size > 1:
+                runners.append(self._run_batch_stage(name, queues[i], None, 0, self._score_packed,
+                                                     self.score_pack_size))
+            else:
+                runners.append(self._run_stage(name, queues[i], outbox, next_workers, handler))
+
+        try:
+            await asyncio.gather(feed(), *runners)
+        finally:
+            await self._flush_saves()
+            await self._in_db_thread(self._save_query_yields)
+            await self._in_db_thread(self._close_db)
+            self._db_executor.shutdown(wait=False)
+            self._score_executor.shutdown(wait=False)
+            self.timing['finished'] = self._elapsed()
+
+        return self.results
+
+    def timing_summary(self) -> str:
+        first = self.timing['first_result']
+        first_text = f'{first}s' if first is not None else 'n/a'
+        return f'Time to first scored channel: {first_text} | Total wall time: {self.timing["finished"]}s'
+
+    def persist_summary(self) -> str:
+        stats = self.persist_stats
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+        return (f'DB writes: {stats["rows"]} channels in {stats["batches"]} transactions '
+                f'({stats["inserted"]} new, {stats["updated"]} updated, {stats["skipped"]} unchanged; '
+                f'{rate:,.0f} rows/sec)')
+
+
+def iter_pipeline_events(pipeline: StreamingDiscoveryPipeline, queries: List[str]) -> Generator[Dict, None, None]:
+    """
+    Run a pipeline on a background event loop and yield its events as they
+    happen (for the synchronous Flask SSE generator)
+    """
+    events = queue.Queue()
+    pipeline.emit = events.put
+
+    def runner():
+        try:
+            asyncio.run(pipeline.run(queries))
+        except Exception as e:
+            traceback.print_exc()
+            events.put({'type': 'log', 'message': f'❌ Pipeline error: {e}', 'logType': 'error'})
+        finally:
+            events.put(_DONE)
+
+    thread = threading.Thread(target=runner, name='discovery-pipeline', daemon=True)
+    thread.start()
+
+    while True:
+        event = events.get()
+        if event is _DONE:
+            break
+        yield event
+
+    thread.join()
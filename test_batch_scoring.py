@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Batch scoring against the local Message Batches stub: analyses are written,
+errored requests are resubmitted by the next run, and nothing is left pending.
+
+Usage:
+    python -m pytest test_batch_scoring.py
+"""
+
+import pytest
+
+import anthropic_clients
+import batch_api_stub
+import batch_scoring
+from channel_database import ChannelDatabase
+
+CHANNELS = 25  # With ERROR_EVERY = 10, requests 10 and 20 of the first batch error
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    server = batch_api_stub.start_stub_server(0)
+    monkeypatch.chdir(tmp_path)  # run() opens youtube_channels.db in the working directory
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', f'http://127.0.0.1:{server.server_port}')
+    # A key of its own so get_client builds a fresh client pointed at this stub
+    monkeypatch.setattr(batch_scoring, 'ANTHROPIC_API_KEY', f'stub-{server.server_port}')
+
+    db = ChannelDatabase()
+    db.connect()
+    db.create_tables()
+    db.add_channels_bulk([{
+        'channel_id': f'UC{i}',
+        'channel_name': f'Prepper Channel {i}',
+        'channel_url': f'https://www.youtube.com/channel/UC{i}',
+        'subscriber_count': 1000 * (i + 1),
+        'channel_description': 'Survival, prepping and off-grid homesteading',
+    } for i in range(CHANNELS)], verbose=False)
+    db.close()
+
+    yield server
+
+    anthropic_clients.close_clients()
+    server.shutdown()
+
+
+def open_database() -> ChannelDatabase:
+    db = ChannelDatabase()
+    db.connect()
+    return db
+
+
+def test_run_writes_analyses_and_retries_errored(stub, capsys):
+    errored = batch_api_stub.ERROR_EVERY and CHANNELS // batch_api_stub.ERROR_EVERY
+
+    first = batch_scoring.run(poll_interval=0)
+    assert len(first) == 1
+    assert first[0]['errored'] == errored
+    assert first[0]['written'] == CHANNELS - errored
+
+    db = open_database()
+    try:
+        assert len(db.get_analyzed_channels()) == CHANNELS - errored
+        assert len(db.get_unscored_channels()) == errored
+    finally:
+        db.close()
+
+    # The errored channels were left unscored, so the next run submits just those
+    second = batch_scoring.run(poll_interval=0)
+    assert len(second) == 1
+    assert second[0]['written'] == errored
+
+    db = open_database()
+    try:
+        batches = db.get_scoring_batches()  # Newest first
+        assert [b['request_count'] for b in batches] == [errored, CHANNELS]
+        assert all(b['status'] == 'collected' for b in batches)
+        assert len(db.get_analyzed_channels()) == CHANNELS
+
+        capsys.readouterr()
+        batch_scoring.print_status(db)
+        assert '0 channels pending' in capsys.readouterr().out
+    finally:
+        db.close()
+
+
+def test_run_resumes_open_batch(stub):
+    db = open_database()
+    try:
+        batch_ids = batch_scoring.submit_pending(db, batch_scoring.load_product_context())
+        assert len(batch_ids) == 1
+        assert [b['batch_id'] for b in db.get_scoring_batches(open_only=True)] == batch_ids
+    finally:
+        db.close()
+
+    # A restarted run collects the open batch instead of submitting those channels
+    # again; only its errored requests go into a new batch
+    summaries = batch_scoring.run(poll_interval=0)
+    assert len(summaries) == 2
+
+    db = open_database()
+    try:
+        resubmitted, resumed = db.get_scoring_batches()  # Newest first
+        assert resumed['batch_id'] == batch_ids[0]
+        assert resumed['status'] == resubmitted['status'] == 'collected'
+        assert resubmitted['request_count'] == summaries[0]['errored']
+        assert len(db.get_analyzed_channels()) == CHANNELS
+    finally:
+        db.close()
+
+
+def test_collect_skips_results_without_a_channel(stub):
+    db = open_database()
+    try:
+        batch_id, = batch_scoring.submit_pending(db, batch_scoring.load_product_context())
+        request_map = db.get_scoring_batches(open_only=True)[0]['request_map']
+        missing = request_map.pop(sorted(request_map)[0])  # Its channel_id
+
+        batch_scoring.wait_for_batch(batch_id, poll_interval=0)
+        summary = batch_scoring.collect_results(db, batch_id, request_map=request_map)
+
+        assert summary['unmapped'] == 1
+        analyzed = {c['channel_id'] for c in db.get_analyzed_channels()}
+        assert missing not in analyzed
+        assert analyzed <= set(request_map.values())
+    finally:
+        db.close()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Channel upserts: partial updates of known channels only touch the supplied
+fields, and unchanged rows aren't rewritten.
+
+Usage:
+    python -m pytest test_channel_database.py
+"""
+
+import pytest
+
+from channel_database import ChannelDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ChannelDatabase(str(tmp_path / 'channels.db'))
+    db.connect()
+    db.create_tables()
+    db.add_channel({
+        'channel_id': 'UC1',
+        'channel_name': 'Prepper Channel',
+        'channel_url': 'https://www.youtube.com/channel/UC1',
+        'subscriber_count': 5000,
+        'notes': 'first pass',
+    })
+    yield db
+    db.close()
+
+
+def test_partial_update_without_name_or_url(db):
+    assert db.add_channel({'channel_id': 'UC1', 'notes': 'AI Score: 8/10'})
+    assert db.add_channel({'channel_id': 'UC1', 'engagement_rate': 4.2, 'subscriber_count': 6000})
+
+    channel = db.get_channel('UC1')
+    assert channel['notes'] == 'AI Score: 8/10'
+    assert channel['engagement_rate'] == 4.2
+    assert channel['subscriber_count'] == 6000
+    assert channel['channel_name'] == 'Prepper Channel'
+    assert channel['channel_url'] == 'https://www.youtube.com/channel/UC1'
+
+
+def test_bulk_partial_updates_stay_in_one_chunk(db):
+    result = db.add_channels_bulk([
+        {'channel_id': 'UC1', 'notes': 'rescored'},
+        {'channel_id': 'UC2', 'channel_name': 'Homestead Channel',
+         'channel_url': 'https://www.youtube.com/channel/UC2'},
+        {'channel_id': 'UC1', 'subscriber_count': 5000},
+    ], verbose=False)
+
+    assert result['failed'] == 0
+    assert (result['inserted'], result['updated'], result['skipped']) == (1, 1, 0)
+    assert db.get_channel('UC1')['notes'] == 'rescored'
+
+    unchanged = db.add_channels_bulk([{'channel_id': 'UC1', 'subscriber_count': 5000}], verbose=False)
+    assert (unchanged['updated'], unchanged['skipped']) == (0, 1)
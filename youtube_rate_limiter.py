@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Adaptive YouTube Rate Limiter
+Shared token bucket for every YouTube fetch. Detects throttling in yt-dlp
+errors (HTTP 429, "Sign in to confirm you're not a bot") and adapts the
+request rate: multiplicative decrease on throttle, additive increase after
+a run of successes (AIMD), with exponential backoff + jitter between retries
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Dict
+
+INITIAL_RATE = 5.0  # Requests per second
+MIN_RATE = 0.2
+MAX_RATE = 20.0
+BURST = 10  # Bucket capacity
+
+DECREASE_FACTOR = 0.5  # Rate multiplier on each throttle event
+ADDITIVE_STEP = 0.5  # Rate added after INCREASE_AFTER consecutive successes
+INCREASE_AFTER = 20
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0  # Seconds
+BACKOFF_CAP = 60.0
+
+THROTTLE_PATTERNS = re.compile(
+    r"HTTP Error 429|Too Many Requests|sign in to confirm|not a bot|rate[- ]limit",
+    re.IGNORECASE,
+)
+
+
+class ThrottledError(RuntimeError):
+    """YouTube kept throttling after all retries were used"""
+
+
+def is_throttle_error(message: str) -> bool:
+    """True if a yt-dlp error/stderr message indicates YouTube throttling"""
+    return bool(message and THROTTLE_PATTERNS.search(message))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for retry number `attempt` (0-based)"""
+    delay = min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.5)
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket whose refill rate adapts to throttling"""
+
+    def __init__(self, rate: float = INITIAL_RATE, min_rate: float = MIN_RATE,
+                 max_rate: float = MAX_RATE, burst: int = BURST):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.cooldown_until = 0.0
+        self._last_refill = time.monotonic()
+        self._consecutive_successes = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            'requests': 0,
+            'throttle_events': 0,
+            'retries': 0,
+            'gave_up': 0,
+            'wait_seconds': 0.0,
+        }
+        self.last_throttle_rate = None
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self.cooldown_until:
+                    wait = self.cooldown_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.counters['requests'] += 1
+                    self.counters['wait_seconds'] += waited
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self):
+        """Additive increase after a streak of un-throttled requests"""
+        with self._lock:
+            self._consecutive_successes += 1
+            if self._consecutive_successes >= INCREASE_AFTER:
+                self.rate = min(self.max_rate, self.rate + ADDITIVE_STEP)
+                self._consecutive_successes = 0
+
+    def on_throttle(self, attempt: int) -> float:
+        """Multiplicative decrease plus a shared cooldown; returns the backoff delay"""
+        delay = backoff_delay(attempt)
+        with self._lock:
+            self.last_throttle_rate = self.rate
+            self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+            self.tokens = 0
+            self._consecutive_successes = 0
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+            self.counters['throttle_events'] += 1
+        return delay
+
+    def on_retry(self):
+        with self._lock:
+            self.counters['retries'] += 1
+
+    def on_give_up(self):
+        with self._lock:
+            self.counters['gave_up'] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'rate': round(self.rate, 2),
+                'min_rate': self.min_rate,
+                'max_rate': self.max_rate,
+                'last_throttle_rate': round(self.last_throttle_rate, 2) if self.last_throttle_rate else None,
+                'cooling_down': time.monotonic() < self.cooldown_until,
+                **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.counters.items()},
+            }
+
+
+_limiter = AdaptiveRateLimiter()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Process-wide limiter shared by every YouTube fetch path"""
+    return _limiter
+
+
+def call_with_rate_limit(func, *args, **kwargs):
+    """
+    Call a YouTube fetch under the shared limiter, retrying throttled calls
+
+    Non-throttle errors are re-raised immediately. If YouTube is still
+    throttling after MAX_RETRIES retries, ThrottledError is raised so the
+    caller's log shows why results are missing.
+    """
+    limiter = get_rate_limiter()
+
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_throttle_error(str(e)):
+                raise
+
+            delay = limiter.on_throttle(attempt)
+            if attempt == MAX_RETRIES:
+                limiter.on_give_up()
+                raise ThrottledError(f"YouTube throttling persisted after {MAX_RETRIES} retries: {e}") from e
+
+            print(f"    ⚠️ YouTube throttling detected, rate → {limiter.rate:.2f}/s, "
+                  f"retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES})")
+            limiter.on_retry()
+            continue
+
+        limiter.on_success()
+        return result
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Shared yt-dlp Extraction Engine
+Drives yt_dlp.YoutubeDL in-process with a pool of warm extractor instances,
+so metadata lookups no longer pay a process spawn + import per call
+"""
+
+import json
+import queue
+import statistics
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from metadata_cache import get_metadata_cache
+from youtube_rate_limiter import call_with_rate_limit, get_rate_limiter
+
+try:
+    import yt_dlp
+    YT_DLP_AVAILABLE = True
+except ImportError:
+    yt_dlp = None
+    YT_DLP_AVAILABLE = False  # Falls back to the yt-dlp command line
+
+POOL_SIZE = 10  # Warm extractor instances kept per profile
+SOCKET_TIMEOUT = 30  # Seconds, matches the old subprocess timeout
+LATENCY_WINDOW = 1000  # Recent calls kept per profile for percentiles
+ENABLE_METADATA_CACHE = True  # Persist responses in metadata_cache.CACHE_FILE
+
+BASE_PARAMS = {
+    'quiet': True,
+    'no_warnings': True,
+    'noprogress': True,
+    'skip_download': True,
+    'socket_timeout': SOCKET_TIMEOUT,
+}
+
+# Extraction profiles: YoutubeDL params for in-process use, the
+# equivalent CLI flags for the subprocess fallback, and the cache kind used
+# unless the caller names another
+PROFILES = {
+    'search': {'params': {'extract_flat': 'in_playlist'}, 'cli': ['--flat-playlist'], 'cache_kind': 'search'},
+    'video': {'params': {}, 'cli': [], 'cache_kind': 'video_detail'},
+    'channel_listing': {'params': {'extract_flat': 'in_playlist'}, 'cli': ['--flat-playlist'],
+                        'cache_kind': 'channel_listing'},
+}
+
+# Per-call overrides that may be applied to a pooled instance
+OVERRIDE_FLAGS = {
+    'playlistend': '--playlist-end',
+    'playlist_items': '--playlist-items',
+}
+
+
+class ExtractorPool:
+    """Pool of reusable YoutubeDL instances, one queue per profile"""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._idle = {name: queue.LifoQueue() for name in PROFILES}
+        self._created = {name: 0 for name in PROFILES}
+        self._lock = threading.Lock()
+
+    def _new_instance(self, profile: str):
+        params = {**BASE_PARAMS, **PROFILES[profile]['params']}
+        return yt_dlp.YoutubeDL(params)
+
+    def acquire(self, profile: str):
+        """Check out a warm instance, creating one if the pool isn't full"""
+        try:
+            return self._idle[profile].get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created[profile] < self.size
+            if can_create:
+                self._created[profile] += 1
+
+        if can_create:
+            return self._new_instance(profile)
+        return self._idle[profile].get()
+
+    def release(self, profile: str, ydl):
+        """Return an instance to the pool"""
+        self._idle[profile].put(ydl)
+
+    def stats(self) -> Dict:
+        return {
+            name: {'created': self._created[name], 'idle': self._idle[name].qsize()}
+            for name in PROFILES
+        }
+
+
+_pool = ExtractorPool()
+_latency_lock = threading.Lock()
+_latencies = {name: deque(maxlen=LATENCY_WINDOW) for name in PROFILES}
+_call_counts = {name: {'calls': 0, 'errors': 0, 'cache_hits': 0} for name in PROFILES}
+
+
+def _record_latency(profile: str, elapsed: float, ok: bool):
+    with _latency_lock:
+        _latencies[profile].append(elapsed)
+        _call_counts[profile]['calls'] += 1
+        if not ok:
+            _call_counts[profile]['errors'] += 1
+
+
+def _extract_in_process(url: str, profile: str, overrides: Dict) -> Dict:
+    ydl = _pool.acquire(profile)
+    previous = {key: ydl.params.get(key) for key in overrides}
+    try:
+        ydl.params.update(overrides)
+        info = ydl.extract_info(url, download=False)
+        return ydl.sanitize_info(info)
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                ydl.params.pop(key, None)
+            else:
+                ydl.params[key] = value
+        _pool.release(profile, ydl)
+
+
+def _extract_subprocess(url: str, profile: str, overrides: Dict) -> Dict:
+    cmd = ['yt-dlp', '--skip-download', '--dump-single-json'] + PROFILES[profile]['cli']
+    for key, value in overrides.items():
+        cmd += [OVERRIDE_FLAGS[key], str(value)]
+    cmd.append(url)
+
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=SOCKET_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"yt-dlp exited with {result.returncode}")
+    return json.loads(result.stdout)
+
+
+def _timed_fetch(url: str, profile: str, overrides: Dict) -> Dict:
+    """One network attempt, with its latency recorded"""
+    start = time.perf_counter()
+    ok = False
+    try:
+        if YT_DLP_AVAILABLE:
+            data = _extract_in_process(url, profile, overrides)
+        else:
+            data = _extract_subprocess(url, profile, overrides)
+        ok = True
+        return data
+    finally:
+        _record_latency(profile, time.perf_counter() - start, ok)
+
+
+def _record_cache_hit(profile: str):
+    with _latency_lock:
+        _call_counts[profile]['cache_hits'] += 1
+
+
+def extract_info(url: str, profile: str = 'video', cache_kind: Optional[str] = None,
+                 use_cache: bool = True, **overrides) -> Dict:
+    """
+    Extract metadata for a URL (video, channel tab or ytsearchN: query)
+
+    Args:
+        url: Anything yt-dlp accepts
+        profile: 'search', 'video' or 'channel_listing'
+        cache_kind: Metadata cache kind (TTL class); defaults to the profile's
+        use_cache: Set False to force a fresh fetch (the result is still stored)
+        **overrides: Per-call params such as playlistend or playlist_items
+
+    Returns:
+        The info dict yt-dlp would print with --dump-single-json
+
+    Raises:
+        Whatever yt-dlp raised (ThrottledError if YouTube kept throttling);
+        callers keep their own error handling
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown extraction profile: {profile}")
+    unknown = set(overrides) - set(OVERRIDE_FLAGS)
+    if unknown:
+        raise ValueError(f"Unsupported overrides: {', '.join(sorted(unknown))}")
+
+    cache = get_metadata_cache() if ENABLE_METADATA_CACHE else None
+    cache_kind = cache_kind or PROFILES[profile]['cache_kind']
+
+    if cache and use_cache:
+        cached = cache.get(cache_kind, url, overrides)
+        if cached is not None:
+            _record_cache_hit(profile)
+            return cached
+
+    # Every network fetch goes through the shared adaptive rate limiter
+    data = call_with_rate_limit(_timed_fetch, url, profile, overrides)
+
+    if cache:
+        cache.put(cache_kind, url, data, overrides)
+    return data
+
+
+def get_entries(data: Optional[Dict]) -> List[Dict]:
+    """Playlist/search entries from an info dict, skipping unavailable ones"""
+    if not data:
+        return []
+    return [entry for entry in (data.get('entries') or []) if entry]
+
+
+def get_latency_stats() -> Dict:
+    """Per-profile call counts and latency percentiles (milliseconds)"""
+    stats = {}
+    with _latency_lock:
+        for profile, samples in _latencies.items():
+            counts = _call_counts[profile]
+            if not counts['calls']:
+                if counts['cache_hits']:
+                    stats[profile] = {'calls': 0, 'errors': 0, 'cache_hits': counts['cache_hits']}
+                continue
+
+            ordered = sorted(samples)
+            stats[profile] = {
+                'calls': counts['calls'],
+                'errors': counts['errors'],
+                'cache_hits': counts['cache_hits'],
+                'avg_ms': round(statistics.mean(ordered) * 1000, 1),
+                'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1),
+            }
+    return stats
+
+
+def get_engine_stats() -> Dict:
+    """Backend, pool occupancy and latency stats in one dict"""
+    return {
+        'backend': 'in-process' if YT_DLP_AVAILABLE else 'subprocess',
+        'pool': _pool.stats(),
+        'latency': get_latency_stats(),
+        'cache': get_metadata_cache().stats() if ENABLE_METADATA_CACHE else None,
+        'rate_limiter': get_rate_limiter().stats(),
+    }
+
+
+def format_latency_report() -> List[str]:
+    """Human-readable latency summary lines"""
+    stats = get_latency_stats()
+    if not stats:
+        return ["No yt-dlp calls made"]
+
+    backend = 'in-process' if YT_DLP_AVAILABLE else 'subprocess'
+    lines = [f"yt-dlp engine ({backend}):"]
+    for profile, s in stats.items():
+        if not s['calls']:
+            lines.append(f"  {profile}: {s['cache_hits']} cache hits, no network calls")
+            continue
+        lines.append(
+            f"  {profile}: {s['calls']} calls, {s['errors']} errors, {s['cache_hits']} cache hits | "
+            f"avg {s['avg_ms']}ms, p50 {s['p50_ms']}ms, p95 {s['p95_ms']}ms, max {s['max_ms']}ms"
+        )
+
+    r = get_rate_limiter().stats()
+    lines.append(
+        f"  rate limiter: {r['rate']}/s now, {r['throttle_events']} throttle events, "
+        f"{r['retries']} retries, {r['gave_up']} gave up, {r['wait_seconds']}s waiting"
+    )
+
+    if ENABLE_METADATA_CACHE:
+        c = get_metadata_cache().stats()
+        lines.append(
+            f"  cache: {c['hits']} hits / {c['misses']} misses ({c['hit_rate']:.0%}), "
+            f"{c['evictions']} evictions, {c['entries']:,} entries"
+        )
+    return lines
+
+
+def print_latency_report():
+    """Print latency summary to stdout"""
+    print("\n⏱️  " + "\n".join(format_latency_report()))
+
+
+if __name__ == "__main__":
+    import sys
+
+    test_url = sys.argv[1] if len(sys.argv) > 1 else "ytsearch3:prepping for beginners"
+    profile = 'search' if test_url.startswith('ytsearch') else 'video'
+
+    print("🧪 Testing yt-dlp Extraction Engine")
+    print("=" * 60)
+
+    for attempt in range(1, 4):
+        data = extract_info(test_url, profile)
+        print(f"  Call {attempt}: {data.get('title') or data.get('id')} "
+              f"({len(get_entries(data))} entries)")
+
+    print_latency_report()